@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+로컬 가짜 YouTube 서버 - 실제 YouTube 없이 재현 가능한 벤치마크용
+
+사용법:
+    python3 benchmarks/fake_youtube.py                               # http://127.0.0.1:8765
+    python3 benchmarks/fake_youtube.py --duration 600 --throttle 2M  # 10분 음원, 연결당 2MB/s
+    python3 benchmarks/fake_youtube.py --error-403 0.05 --error-429 0.02
+
+경로:
+    GET /watch?v=ID          동영상 페이지 (제목만 있는 HTML)
+    GET /api/player?v=ID     동영상 정보 JSON (id, title, duration, formats)
+    GET /audio/ID/251        합성 음원 Opus/WebM (Range 요청 지원)
+    GET /audio/ID/140        합성 음원 AAC/M4A (Range 요청 지원)
+    GET /stats               요청/전송 바이트/주입한 오류 수
+
+- 합성 음원은 ffmpeg로 사인파를 인코딩해 한 번만 만들고 모든 동영상 ID가 같은 데이터를 사용
+  (ffmpeg가 없으면 같은 크기의 임의 바이트 - 다운로드 측정만 가능, FLAC 변환 불가)
+- --throttle: 연결 하나당 전송 속도 제한 (YouTube의 연결별 속도 제한 흉내)
+- --error-403 / --error-429: 요청마다 해당 확률로 403 / 429 응답 (429는 Retry-After 포함)
+
+각 라이브러리를 이 서버로 향하게 하는 방법:
+- yt-dlp: benchmarks/yt_dlp_plugins/extractor/fake_youtube.py 플러그인
+  (PYTHONPATH=benchmarks 로 실행하면 http://127.0.0.1:PORT/watch?v=ID URL을 처리)
+- streamlink: benchmarks/streamlink_plugins/fake_youtube.py 플러그인 (load_streamlink_plugins)
+- pytube: 추출기 플러그인 구조가 없으므로 FakePytubeBackend가 정보 추출만 대신하고
+  스트림은 PytubeBackend와 같은 방식(http_chunks)으로 받음
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+# 공용 모듈(저장소 루트의 yt_common 패키지) 경로 추가
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from yt_common.backends import AudioSource, PytubeBackend
+from yt_common.streaming import http_chunks
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+STREAMLINK_PLUGIN_DIR = BENCHMARKS_DIR / 'streamlink_plugins'
+
+DEFAULT_PORT = 8765
+DEFAULT_DURATION = 180  # 초
+
+# 포맷 (YouTube itag 번호와 같게)
+FORMATS = {
+    '251': {'ext': 'webm', 'acodec': 'opus', 'abr': 160, 'mime': 'audio/webm',
+            'ffmpeg': ['-c:a', 'libopus', '-b:a', '160k', '-f', 'webm']},
+    '140': {'ext': 'm4a', 'acodec': 'mp4a.40.2', 'abr': 128, 'mime': 'audio/mp4',
+            'ffmpeg': ['-c:a', 'aac', '-b:a', '128k', '-f', 'ipod']},
+}
+
+SEND_SIZE = 64 * 1024
+RANGE_RE = re.compile(r'bytes=(\d*)-(\d*)')
+
+
+def parse_rate(value):
+    """'2M', '500K', '1000000' → 초당 바이트 (0이면 제한 없음)"""
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)([KkMmGg]?)', str(value).strip())
+    if not match:
+        raise argparse.ArgumentTypeError(f"잘못된 속도: {value}")
+    number, unit = match.groups()
+    return int(float(number) * {'': 1, 'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3}[unit.lower()])
+
+
+def make_audio(itag, duration):
+    """
+    합성 음원 생성 (440Hz 사인파, 48kHz 스테레오)
+
+    Returns:
+        tuple: (데이터, 실제 음원 여부) - ffmpeg가 없으면 같은 크기의 임의 바이트
+    """
+    fmt = FORMATS[itag]
+    if shutil.which('ffmpeg'):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, f'audio.{fmt["ext"]}')
+            subprocess.run([
+                'ffmpeg', '-hide_banner', '-nostdin', '-y', '-loglevel', 'error',
+                '-f', 'lavfi', '-i', f'sine=frequency=440:sample_rate=48000:duration={duration}',
+                '-ac', '2', *fmt['ffmpeg'], path,
+            ], check=True)
+            with open(path, 'rb') as f:
+                return f.read(), True
+    return random.Random(itag).randbytes(fmt['abr'] * 1000 // 8 * duration), False
+
+
+class FakeYouTube:
+    """
+    가짜 YouTube 서버 (별도 스레드에서 실행)
+
+    Examples:
+        >>> with FakeYouTube(duration=60, throttle=2 * 1024 ** 2) as server:
+        ...     url = server.video_url('fake0000001')
+        ...     source = YtDlpBackend().open(url)
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, duration=DEFAULT_DURATION, throttle=0,
+                 error_403=0.0, error_429=0.0, seed=None):
+        """
+        Args:
+            host (str): 바인드 주소
+            port (int): 포트 (0이면 빈 포트 자동 선택)
+            duration (int): 합성 음원 길이 (초)
+            throttle (int): 연결당 전송 속도 제한 (초당 바이트, 0이면 제한 없음)
+            error_403 (float): 403 응답 확률
+            error_429 (float): 429 응답 확률
+            seed (int): 오류 주입 난수 시드 (재현용)
+        """
+        self.duration = duration
+        self.throttle = throttle
+        self.error_403 = error_403
+        self.error_429 = error_429
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.audio = {}
+        self.real_audio = True
+        for itag in FORMATS:
+            self.audio[itag], real = make_audio(itag, duration)
+            self.real_audio = self.real_audio and real
+        self.counters = {'requests': 0, 'bytes_sent': 0, 'injected_403': 0, 'injected_429': 0}
+
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def video_url(self, video_id):
+        return f'{self.base_url}/watch?v={video_id}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='fake-youtube', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def inject_error(self):
+        """이번 요청에 주입할 오류 상태 코드 (없으면 None)"""
+        with self._lock:
+            self.counters['requests'] += 1
+            roll = self._random.random()
+        if roll < self.error_403:
+            self.count('injected_403')
+            return 403
+        if roll < self.error_403 + self.error_429:
+            self.count('injected_429')
+            return 429
+        return None
+
+    def player_response(self, video_id):
+        """동영상 정보 (yt-dlp info dict와 비슷한 형식)"""
+        return {
+            'id': video_id,
+            'title': f'Fake track {video_id}',
+            'duration': self.duration,
+            'uploader': 'Fake YouTube',
+            'formats': [
+                {
+                    'format_id': itag,
+                    'url': f'{self.base_url}/audio/{video_id}/{itag}',
+                    'ext': fmt['ext'],
+                    'acodec': fmt['acodec'],
+                    'abr': fmt['abr'],
+                    'filesize': len(self.audio[itag]),
+                    'mime_type': fmt['mime'],
+                }
+                for itag, fmt in FORMATS.items()
+            ],
+        }
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def send_body(self, status, body, content_type, headers=()):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def send_error_status(self, status):
+                message = {403: 'Forbidden', 429: 'Too Many Requests'}.get(status, 'Error')
+                headers = [('Retry-After', '1')] if status == 429 else []
+                self.send_body(status, message.encode(), 'text/plain', headers)
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                query = parse_qs(parsed.query)
+                video_id = (query.get('v') or [''])[0]
+
+                if parsed.path == '/stats':
+                    with server._lock:
+                        body = json.dumps(server.counters).encode()
+                    return self.send_body(200, body, 'application/json')
+
+                status = server.inject_error()
+                if status:
+                    return self.send_error_status(status)
+
+                if parsed.path == '/watch' and video_id:
+                    title = server.player_response(video_id)['title']
+                    body = f'<html><head><title>{title} - YouTube</title></head></html>'.encode()
+                    return self.send_body(200, body, 'text/html; charset=utf-8')
+                if parsed.path == '/api/player' and video_id:
+                    body = json.dumps(server.player_response(video_id)).encode()
+                    return self.send_body(200, body, 'application/json')
+
+                match = re.fullmatch(r'/audio/([\w-]+)/(\d+)', parsed.path)
+                if match and match.group(2) in server.audio:
+                    return self.send_audio(server.audio[match.group(2)], FORMATS[match.group(2)]['mime'])
+
+                self.send_body(404, b'Not Found', 'text/plain')
+
+            def send_audio(self, data, content_type):
+                """Range 요청 처리 + 연결당 전송 속도 제한"""
+                total = len(data)
+                start, end = 0, total - 1
+                match = RANGE_RE.fullmatch(self.headers.get('Range', ''))
+                if match and (match.group(1) or match.group(2)):
+                    if match.group(1):
+                        start = int(match.group(1))
+                        end = min(int(match.group(2)), total - 1) if match.group(2) else total - 1
+                    else:
+                        start = max(0, total - int(match.group(2)))
+                    if start >= total:
+                        self.send_response(416)
+                        self.send_header('Content-Range', f'bytes */{total}')
+                        self.send_header('Content-Length', '0')
+                        self.end_headers()
+                        return
+                    self.send_response(206)
+                    self.send_header('Content-Range', f'bytes {start}-{end}/{total}')
+                else:
+                    self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(end - start + 1))
+                self.send_header('Accept-Ranges', 'bytes')
+                self.end_headers()
+
+                started = time.monotonic()
+                sent = 0
+                try:
+                    for offset in range(start, end + 1, SEND_SIZE):
+                        block = data[offset:min(offset + SEND_SIZE, end + 1)]
+                        self.wfile.write(block)
+                        sent += len(block)
+                        if server.throttle:
+                            ahead = sent / server.throttle - (time.monotonic() - started)
+                            if ahead > 0:
+                                time.sleep(ahead)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # 클라이언트가 먼저 연결을 닫음 (헤지 취소 등)
+                server.count('bytes_sent', sent)
+
+        return Handler
+
+
+def fetch_player(url):
+    """가짜 서버의 동영상 정보 JSON 가져오기 (/watch?v=ID URL 기준)"""
+    parsed = urlparse(url)
+    video_id = parse_qs(parsed.query)['v'][0]
+    api = f'{parsed.scheme}://{parsed.netloc}/api/player?v={video_id}'
+    with urllib.request.urlopen(api, timeout=30) as response:
+        return json.load(response)
+
+
+class FakePytubeBackend(PytubeBackend):
+    """
+    pytube 백엔드 대역
+
+    pytube에는 추출기를 바꿔 끼울 방법이 없으므로 정보 추출만 가짜 서버 API로 대신하고
+    가장 높은 비트레이트 스트림을 PytubeBackend와 같은 방식(http_chunks)으로 받음
+    """
+
+    def open(self, url, cancel=None):
+        info = fetch_player(url)
+        fmt = max(info['formats'], key=lambda f: f['abr'])
+        return AudioSource(self.name, info['title'], info['id'], http_chunks(fmt['url'], cancel=cancel))
+
+
+def load_streamlink_plugins(session):
+    """streamlink 세션에 가짜 서버 플러그인 등록 (streamlink 버전별 API 차이 처리)"""
+    plugins = getattr(session, 'plugins', None)
+    if plugins is not None and hasattr(plugins, 'load_path'):
+        plugins.load_path(STREAMLINK_PLUGIN_DIR)
+    else:
+        session.load_plugins(str(STREAMLINK_PLUGIN_DIR))
+    return session
+
+
+def main():
+    parser = argparse.ArgumentParser(description='로컬 가짜 YouTube 서버')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--duration', type=int, default=DEFAULT_DURATION, help='합성 음원 길이 (초)')
+    parser.add_argument('--throttle', type=parse_rate, default=0, help='연결당 전송 속도 (예: 2M, 500K)')
+    parser.add_argument('--error-403', type=float, default=0.0, help='403 응답 확률 (0~1)')
+    parser.add_argument('--error-429', type=float, default=0.0, help='429 응답 확률 (0~1)')
+    parser.add_argument('--seed', type=int, help='오류 주입 난수 시드')
+    args = parser.parse_args()
+
+    server = FakeYouTube(args.host, args.port, args.duration, args.throttle,
+                         args.error_403, args.error_429, args.seed)
+    print(f"🎭 가짜 YouTube 서버: {server.base_url}")
+    if not server.real_audio:
+        print("⚠️  ffmpeg가 없어 임의 바이트를 보냅니다 (FLAC 변환 불가)")
+    print(f"   예: PYTHONPATH={BENCHMARKS_DIR} yt-dlp -x --audio-format flac {server.video_url('fake0000001')}")
+    print("   종료: Ctrl+C")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
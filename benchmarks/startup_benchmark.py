@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+시작 시간 벤치마크 - 진입점별 import 시간 (-X importtime)
+
+사용법:
+    python3 benchmarks/startup_benchmark.py                      # 예산(ms) 검사
+    python3 benchmarks/startup_benchmark.py --save-baseline      # 현재 값을 기준선으로 저장
+    python3 benchmarks/startup_benchmark.py --threshold 0.3      # 기준선 대비 30% 초과 시 실패
+
+각 진입점 파일을 새 프로세스에서 모듈로 불러오기만 하고(main() 실행 안 함)
+-X importtime 출력의 self 시간을 합산합니다. 여러 번 실행해 중앙값을 사용합니다.
+
+다음 경우 종료 코드 1로 실패합니다.
+- 시작 시점에 무거운 모듈(yt_dlp, pytube, pydub, requests, streamlink)이 import됨
+- import 시간이 예산(--budget-ms)을 넘음
+- 기준선 파일이 있을 때 기준선보다 threshold 비율 이상 느려짐
+설치되지 않은 의존성(flask, tkinter 등) 때문에 불러올 수 없는 진입점은 건너뜁니다.
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+ENTRY_POINTS = (
+    'youtube_audio_downloader.py',
+    'tkinter/youtube_audio_downloader.py',
+    'web/youtube_audio_downloader_web.py',
+    'yt-dlp/youtube_downloader_final.py',
+    'simple/youtube_downloader_simple.py',
+    'pytube/youtube_downloader_pytube.py',
+    'pytube2/youtube_flac_final.py',
+    'streamlink/youtube_flac_downloader.py',
+    'cli/youtube_download.py',
+)
+
+# 시작 시점에 import되면 안 되는 모듈 (처음 사용할 때 import)
+HEAVY_MODULES = ('yt_dlp', 'pytube', 'pydub', 'requests', 'streamlink')
+
+DEFAULT_BUDGET_MS = 400
+DEFAULT_THRESHOLD = 0.2
+DEFAULT_RUNS = 5
+DEFAULT_BASELINE = Path(__file__).resolve().parent / 'startup_baseline.json'
+
+# 진입점 파일을 __main__이 아닌 이름으로 불러옴 (main()이 실행되지 않음)
+LOADER = """
+import importlib.util, os, sys
+path = sys.argv[1]
+sys.path[0] = os.path.dirname(path)
+spec = importlib.util.spec_from_file_location('startup_probe', path)
+spec.loader.exec_module(importlib.util.module_from_spec(spec))
+"""
+
+IMPORTTIME_RE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+MISSING_RE = re.compile(r"No module named '([^']+)'")
+
+
+def measure(entry):
+    """
+    진입점 하나의 import 시간 측정
+
+    Returns:
+        tuple: (import 시간 합계(ms), import된 모듈 이름 집합) 또는 (None, 빠진 모듈 이름)
+    """
+    env = dict(os.environ, SYSTEM_VERSION_COMPAT='0', PYTHONDONTWRITEBYTECODE='1')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', LOADER, str(ROOT / entry)],
+        capture_output=True, text=True, env=env, timeout=120,
+    )
+    if result.returncode != 0:
+        missing = MISSING_RE.search(result.stderr)
+        if missing:
+            return None, missing.group(1)
+        raise RuntimeError(f"{entry} 불러오기 실패:\n{result.stderr[-2000:]}")
+
+    total_us = 0
+    modules = set()
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            total_us += int(match.group(1))
+            modules.add(match.group(4))
+    return total_us / 1000, modules
+
+
+def load_baseline(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='진입점별 시작(import) 시간 측정')
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS, help='진입점별 측정 횟수 (중앙값 사용)')
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS, help='진입점별 import 시간 예산 (ms)')
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE, help='기준선 JSON 파일')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='기준선 대비 허용 증가 비율')
+    parser.add_argument('--save-baseline', action='store_true', help='측정 결과를 기준선으로 저장')
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.baseline)
+    results = {}
+    failures = []
+
+    print(f"{'진입점':<40} {'import(ms)':>11} {'기준선':>9}  결과")
+    print("-" * 72)
+
+    for entry in ENTRY_POINTS:
+        samples = []
+        modules = set()
+        for _ in range(args.runs):
+            elapsed, modules = measure(entry)
+            if elapsed is None:
+                break
+            samples.append(elapsed)
+
+        if not samples:
+            print(f"{entry:<40} {'-':>11} {'-':>9}  건너뜀 ({modules} 없음)")
+            continue
+
+        elapsed = statistics.median(samples)
+        results[entry] = round(elapsed, 1)
+        problems = []
+
+        heavy = sorted({name.split('.')[0] for name in modules} & set(HEAVY_MODULES))
+        if heavy:
+            problems.append(f"무거운 모듈 import: {', '.join(heavy)}")
+        if elapsed > args.budget_ms:
+            problems.append(f"예산 {args.budget_ms:.0f}ms 초과")
+        previous = baseline.get(entry)
+        if previous and elapsed > previous * (1 + args.threshold):
+            problems.append(f"기준선 대비 {(elapsed / previous - 1) * 100:.0f}% 증가")
+
+        base_text = f"{previous:.1f}" if previous else '-'
+        print(f"{entry:<40} {elapsed:>11.1f} {base_text:>9}  {'; '.join(problems) or 'OK'}")
+        failures.extend(f"{entry}: {problem}" for problem in problems)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n기준선 저장: {args.baseline}")
+        return 0
+
+    if failures:
+        print("\n실패:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,37 @@
+"""
+streamlink 플러그인 - 로컬 가짜 YouTube 서버 (benchmarks/fake_youtube.py)
+
+fake_youtube.load_streamlink_plugins(session)으로 세션에 등록합니다
+(명령행에서는 streamlink --plugin-dirs benchmarks/streamlink_plugins).
+스트림 이름은 YouTube 플러그인과 같게 audio_opus / audio_mp4a로 제공합니다.
+"""
+
+import re
+
+from streamlink.plugin import Plugin, pluginmatcher
+from streamlink.plugin.api import validate
+from streamlink.stream.http import HTTPStream
+
+STREAM_NAMES = {'opus': 'audio_opus', 'mp4a.40.2': 'audio_mp4a'}
+
+
+@pluginmatcher(re.compile(r'https?://(?:127\.0\.0\.1|localhost):\d+/watch\?v=(?P<video_id>[\w-]+)'))
+class FakeYouTube(Plugin):
+    def _get_streams(self):
+        video_id = self.match.group('video_id')
+        base_url = re.match(r'https?://[^/]+', self.url).group(0)
+        data = self.session.http.get(
+            f'{base_url}/api/player',
+            params={'v': video_id},
+            schema=validate.Schema(validate.parse_json()),
+        )
+        self.id = data['id']
+        self.title = data['title']
+        self.author = data.get('uploader')
+        return {
+            STREAM_NAMES.get(fmt['acodec'], f"audio_{fmt['format_id']}"): HTTPStream(self.session, fmt['url'])
+            for fmt in data['formats']
+        }
+
+
+__plugin__ = FakeYouTube
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+처리량 벤치마크 - 로컬 가짜 YouTube 서버(fake_youtube.py)로 백엔드별/동시 작업 수별 측정
+
+사용법:
+    python3 benchmarks/throughput_benchmark.py                                    # 기본 설정
+    python3 benchmarks/throughput_benchmark.py --backends yt-dlp,streamlink --concurrency 1,4,16
+    python3 benchmarks/throughput_benchmark.py --throttle 1M --error-429 0.02 --seed 1
+    python3 benchmarks/throughput_benchmark.py --transcode --json results.json    # FLAC 변환 포함
+
+가짜 서버는 이 프로세스의 스레드에서 실행하고, 백엔드/동시 작업 수 조합마다 새 측정 프로세스에서
+tracks개의 작업을 concurrency개씩 동시에 실행합니다.
+(ru_maxrss는 프로세스 수명 동안의 최댓값이므로 조합마다 새 프로세스 사용 - 서버 메모리는 제외)
+
+작업 하나 = 백엔드 open(정보 추출) → 스트림 끝까지 읽기 (--transcode면 stream_to_flac으로 FLAC 저장)
+결과: 곡/분, MB/s, 작업 지연 p50/p99, 최대 RSS, 오류 종류별 실패 수
+설치되지 않은 백엔드(yt_dlp, streamlink)는 건너뜁니다.
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# 공용 모듈(저장소 루트의 yt_common 패키지) 경로 추가
+# (이 폴더도 sys.path에 있어야 yt-dlp가 yt_dlp_plugins의 가짜 추출기를 불러옴)
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+ROOT = BENCHMARKS_DIR.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(BENCHMARKS_DIR))
+
+from fake_youtube import DEFAULT_DURATION, FakePytubeBackend, FakeYouTube, load_streamlink_plugins, parse_rate
+
+BACKENDS = ('yt-dlp', 'pytube', 'streamlink')
+DEFAULT_CONCURRENCY = (1, 4, 8)
+DEFAULT_TRACKS = 16
+DEFAULT_BENCH_DURATION = 60  # 합성 음원 길이 (초) - 서버 기본값보다 짧게 해서 빨리 끝나도록
+
+HTTP_STATUS_RE = re.compile(r'\b(403|404|429|5\d\d)\b')
+
+
+def make_backend(name):
+    """백엔드 생성 (가짜 서버를 향하도록 설정)"""
+    if name == 'yt-dlp':
+        import yt_dlp  # noqa: F401 - 설치 여부 확인 (yt_dlp_plugins의 가짜 추출기가 함께 등록됨)
+        from yt_common.backends import YtDlpBackend
+        return YtDlpBackend()
+    if name == 'pytube':
+        return FakePytubeBackend()
+    if name == 'streamlink':
+        from yt_common.backends import StreamlinkBackend
+        backend = StreamlinkBackend()
+        load_streamlink_plugins(backend.get_session())
+        return backend
+    raise ValueError(f"알 수 없는 백엔드: {name}")
+
+
+def error_class(error):
+    """오류 종류 (HTTP 상태 코드가 보이면 'HTTP 429' 형식, 아니면 예외 이름)"""
+    code = getattr(error, 'code', None) or getattr(error, 'status', None)
+    if not isinstance(code, int):
+        match = HTTP_STATUS_RE.search(str(error))
+        code = int(match.group(1)) if match else None
+    return f'HTTP {code}' if code else type(error).__name__
+
+
+def run_job(backend, url, output_dir, transcode):
+    """
+    작업 하나 실행
+
+    Returns:
+        tuple: (작업 시간(초), 받은 바이트)
+    """
+    started = time.perf_counter()
+    source = backend.open(url)
+    received = 0
+
+    def counted(chunks):
+        nonlocal received
+        for chunk, total in chunks:
+            received += len(chunk)
+            yield chunk, total
+
+    if transcode:
+        from yt_common.streaming import stream_to_flac
+        output = os.path.join(output_dir, f'{source.video_id}.flac')
+        stream_to_flac(counted(source.chunks), output)
+        os.remove(output)
+    else:
+        for _ in counted(source.chunks):
+            pass
+    return time.perf_counter() - started, received
+
+
+def peak_rss_mb():
+    """이 프로세스와 자식 프로세스(ffmpeg) 중 최대 RSS (MB)"""
+    maxrss = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                 resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    if sys.platform != 'darwin':
+        maxrss *= 1024  # Linux는 KB 단위
+    return maxrss / (1024 * 1024)
+
+
+def worker(backend_name, concurrency, tracks, base_url, transcode):
+    """--worker 모드: 조합 하나를 측정해 JSON 한 줄로 출력"""
+    try:
+        backend = make_backend(backend_name)
+    except ImportError as e:
+        print(json.dumps({'missing': e.name or str(e)}))
+        return
+
+    latencies = []
+    errors = Counter()
+    received = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = [
+                pool.submit(run_job, backend, f'{base_url}/watch?v=bench{index:06d}', tmp, transcode)
+                for index in range(tracks)
+            ]
+            for future in futures:
+                try:
+                    elapsed, size = future.result()
+                except Exception as e:
+                    errors[error_class(e)] += 1
+                    continue
+                latencies.append(elapsed)
+                received += size
+        wall = time.perf_counter() - started
+
+    print(json.dumps({
+        'latencies': latencies,
+        'errors': dict(errors),
+        'bytes': received,
+        'wall_seconds': wall,
+        'peak_rss_mb': peak_rss_mb(),
+    }))
+
+
+def percentile(values, p):
+    """백분위수 (nearest-rank)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def measure(backend, concurrency, tracks, base_url, transcode):
+    """
+    조합 하나를 새 프로세스에서 측정
+
+    Returns:
+        dict: 측정 결과 (설치되지 않은 백엔드면 {'missing': 모듈 이름})
+    """
+    result = subprocess.run(
+        [sys.executable, __file__, '--worker', backend, str(concurrency), str(tracks), base_url,
+         '1' if transcode else '0'],
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{backend} x{concurrency} 측정 실패:\n{result.stderr[-2000:]}")
+    raw = json.loads(result.stdout.strip().splitlines()[-1])
+    if 'missing' in raw:
+        return raw
+
+    latencies = raw['latencies']
+    wall = raw['wall_seconds']
+    return {
+        'backend': backend,
+        'concurrency': concurrency,
+        'tracks': tracks,
+        'succeeded': len(latencies),
+        'failed': sum(raw['errors'].values()),
+        'errors': raw['errors'],
+        'tracks_per_min': round(len(latencies) / wall * 60, 2) if wall else None,
+        'mb_per_s': round(raw['bytes'] / wall / (1024 * 1024), 2) if wall else None,
+        'p50_seconds': round(percentile(latencies, 50), 3) if latencies else None,
+        'p99_seconds': round(percentile(latencies, 99), 3) if latencies else None,
+        'peak_rss_mb': round(raw['peak_rss_mb'], 1),
+        'wall_seconds': round(wall, 2),
+    }
+
+
+def main():
+    if sys.argv[1:2] == ['--worker']:
+        backend, concurrency, tracks, base_url, transcode = sys.argv[2:7]
+        worker(backend, int(concurrency), int(tracks), base_url, transcode == '1')
+        return 0
+
+    parser = argparse.ArgumentParser(description='가짜 YouTube 서버로 백엔드별 처리량 측정')
+    parser.add_argument('--backends', default=','.join(BACKENDS), help=f"쉼표로 구분 ({', '.join(BACKENDS)})")
+    parser.add_argument('--concurrency', default=','.join(map(str, DEFAULT_CONCURRENCY)),
+                        help='동시 작업 수 목록 (쉼표로 구분)')
+    parser.add_argument('--tracks', type=int, default=DEFAULT_TRACKS, help='조합마다 다운로드할 곡 수')
+    parser.add_argument('--duration', type=int, default=DEFAULT_BENCH_DURATION,
+                        help=f'합성 음원 길이 (초, 서버 단독 실행 기본값 {DEFAULT_DURATION})')
+    parser.add_argument('--throttle', type=parse_rate, default=0, help='연결당 전송 속도 (예: 2M, 500K)')
+    parser.add_argument('--error-403', type=float, default=0.0, help='403 응답 확률 (0~1)')
+    parser.add_argument('--error-429', type=float, default=0.0, help='429 응답 확률 (0~1)')
+    parser.add_argument('--seed', type=int, help='오류 주입 난수 시드')
+    parser.add_argument('--transcode', action='store_true', help='받은 스트림을 FLAC로 변환 (ffmpeg 필요)')
+    parser.add_argument('--json', type=Path, help='결과를 JSON 파일로 저장')
+    args = parser.parse_args()
+
+    backends = [name.strip() for name in args.backends.split(',') if name.strip()]
+    levels = [int(level) for level in args.concurrency.split(',') if level.strip()]
+
+    server = FakeYouTube(duration=args.duration, throttle=args.throttle, error_403=args.error_403,
+                         error_429=args.error_429, seed=args.seed).start()
+    if args.transcode and not server.real_audio:
+        print("ffmpeg가 없어 합성 음원을 만들 수 없습니다 (--transcode 불가).")
+        server.stop()
+        return 1
+
+    print(f"가짜 서버: {server.base_url} · 음원 {args.duration}초 · 곡 {args.tracks}개"
+          f"{' · FLAC 변환' if args.transcode else ''}\n")
+    print(f"{'백엔드':<11} {'동시':>4} {'성공':>7} {'곡/분':>8} {'MB/s':>8} "
+          f"{'p50(초)':>8} {'p99(초)':>8} {'최대 RSS(MB)':>13}  오류")
+    print("-" * 90)
+
+    results = []
+    try:
+        for backend in backends:
+            for concurrency in levels:
+                row = measure(backend, concurrency, args.tracks, server.base_url, args.transcode)
+                if 'missing' in row:
+                    print(f"{backend:<11} {'-':>4}  건너뜀 ({row['missing']} 없음)")
+                    break
+                results.append(row)
+                errors = ', '.join(f"{name} x{count}" for name, count in sorted(row['errors'].items())) or '-'
+                p50 = f"{row['p50_seconds']:.2f}" if row['p50_seconds'] is not None else '-'
+                p99 = f"{row['p99_seconds']:.2f}" if row['p99_seconds'] is not None else '-'
+                print(f"{backend:<11} {concurrency:>4} {row['succeeded']:>3}/{row['tracks']:<3} "
+                      f"{row['tracks_per_min']:>8.1f} {row['mb_per_s']:>8.2f} {p50:>8} {p99:>8} "
+                      f"{row['peak_rss_mb']:>13.1f}  {errors}")
+    finally:
+        stats = dict(server.counters)
+        server.stop()
+
+    print(f"\n서버: 요청 {stats['requests']}회 · 전송 {stats['bytes_sent'] / (1024 * 1024):.1f}MB · "
+          f"주입한 403 {stats['injected_403']}회 · 429 {stats['injected_429']}회")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                'settings': {
+                    'duration': args.duration, 'tracks': args.tracks, 'throttle': args.throttle,
+                    'error_403': args.error_403, 'error_429': args.error_429, 'seed': args.seed,
+                    'transcode': args.transcode,
+                },
+                'results': results,
+                'server': stats,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"결과 저장: {args.json}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FLAC 변환 벤치마크 - pydub 전체 디코딩 vs ffmpeg 스트리밍 변환
+
+사용법:
+    python3 benchmarks/transcode_benchmark.py            # 기본: 10분, 60분 음원
+    python3 benchmarks/transcode_benchmark.py 30 180     # 30분, 180분 음원
+
+ffmpeg로 합성 음원(사인파, Opus/WebM - YouTube 오디오와 같은 형식)을 만든 뒤
+각 방식을 별도 프로세스에서 실행해 실행 시간과 최대 메모리(RSS)를 비교합니다.
+최대 RSS는 자식 프로세스(ffmpeg 포함) 중 가장 큰 값입니다.
+pydub이 설치되어 있지 않으면 해당 방식은 건너뜁니다.
+"""
+
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 공용 모듈(저장소 루트의 yt_common 패키지) 경로 추가
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+DEFAULT_MINUTES = (10, 60)
+
+
+def make_source(path, minutes):
+    """합성 음원 생성 (48kHz 스테레오 Opus)"""
+    subprocess.run([
+        'ffmpeg', '-hide_banner', '-nostdin', '-y', '-loglevel', 'error',
+        '-f', 'lavfi', '-i', f'sine=frequency=440:sample_rate=48000:duration={minutes * 60}',
+        '-ac', '2', '-c:a', 'libopus', '-b:a', '160k', str(path),
+    ], check=True)
+
+
+def run_worker(method, source, output):
+    """
+    변환 방식 하나를 별도 프로세스에서 실행
+
+    Returns:
+        tuple: (실행 시간(초), 최대 RSS(MB))
+    """
+    started = time.perf_counter()
+    subprocess.run([sys.executable, __file__, '--worker', method, str(source), str(output)], check=True)
+    elapsed = time.perf_counter() - started
+
+    maxrss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    if sys.platform != 'darwin':
+        maxrss *= 1024  # Linux는 KB 단위
+    return elapsed, maxrss / (1024 * 1024)
+
+
+def worker(method, source, output):
+    """--worker 모드: 실제 변환 실행"""
+    if method == 'pydub':
+        from pydub import AudioSegment
+        audio = AudioSegment.from_file(source)
+        audio.export(output, format='flac')
+    else:
+        from yt_common.transcode import transcode_to_flac
+        transcode_to_flac(source, output)
+
+
+def main():
+    if sys.argv[1:2] == ['--worker']:
+        worker(*sys.argv[2:5])
+        return
+    if sys.argv[1:2] == ['--measure']:
+        print(*run_worker(*sys.argv[2:5]))
+        return
+
+    minutes_list = [int(arg) for arg in sys.argv[1:]] or list(DEFAULT_MINUTES)
+    try:
+        import pydub  # noqa: F401
+        methods = ['ffmpeg', 'pydub']
+    except ImportError:
+        print("pydub이 설치되지 않아 ffmpeg 방식만 측정합니다.\n")
+        methods = ['ffmpeg']
+
+    print(f"{'길이':>6}  {'방식':<8} {'시간(초)':>10} {'최대 RSS(MB)':>14}")
+    print("-" * 44)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for minutes in minutes_list:
+            source = Path(tmp) / f'source_{minutes}.webm'
+            make_source(source, minutes)
+
+            # ru_maxrss는 프로세스 수명 동안의 최댓값이므로 방식마다 새 측정 프로세스 사용
+            for method in methods:
+                output = Path(tmp) / f'{method}_{minutes}.flac'
+                result = subprocess.run(
+                    [sys.executable, __file__, '--measure', method, str(source), str(output)],
+                    check=True, capture_output=True, text=True,
+                )
+                elapsed, rss = map(float, result.stdout.split())
+                print(f"{minutes:>4}분  {method:<8} {elapsed:>10.2f} {rss:>14.1f}")
+                os.remove(output)
+
+
+if __name__ == '__main__':
+    main()
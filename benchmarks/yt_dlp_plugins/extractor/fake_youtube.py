@@ -0,0 +1,40 @@
+"""
+yt-dlp 추출기 플러그인 - 로컬 가짜 YouTube 서버 (benchmarks/fake_youtube.py)
+
+benchmarks 폴더가 sys.path(PYTHONPATH)에 있으면 yt-dlp가 자동으로 불러옵니다.
+http://127.0.0.1:PORT/watch?v=ID 또는 http://localhost:PORT/watch?v=ID URL을 처리하며
+포맷 선택, 다운로드, 후처리는 실제 YouTube와 같은 yt-dlp 경로를 그대로 탑니다.
+"""
+
+import re
+
+from yt_dlp.extractor.common import InfoExtractor
+
+
+class FakeYouTubeIE(InfoExtractor):
+    IE_NAME = 'fakeyoutube'
+    IE_DESC = '로컬 가짜 YouTube 서버 (벤치마크용)'
+    _VALID_URL = r'https?://(?:127\.0\.0\.1|localhost):\d+/watch\?v=(?P<id>[\w-]+)'
+
+    def _real_extract(self, url):
+        video_id = self._match_id(url)
+        base_url = re.match(r'https?://[^/]+', url).group(0)
+        data = self._download_json(f'{base_url}/api/player', video_id, query={'v': video_id})
+
+        formats = [{
+            'format_id': fmt['format_id'],
+            'url': fmt['url'],
+            'ext': fmt['ext'],
+            'acodec': fmt['acodec'],
+            'vcodec': 'none',
+            'abr': fmt['abr'],
+            'filesize': fmt.get('filesize'),
+        } for fmt in data['formats']]
+
+        return {
+            'id': data['id'],
+            'title': data['title'],
+            'duration': data.get('duration'),
+            'uploader': data.get('uploader'),
+            'formats': formats,
+        }
@@ -11,13 +11,79 @@
 =========================================================
 """
 
-from yt_dlp import YoutubeDL
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime
 from pathlib import Path
 
+# 공용 모듈(저장소 루트의 yt_common 패키지) 경로 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from yt_common.info_cache import InfoCache, extract_info_once, is_stale_url_error
+from yt_common.library import LibraryIndex, final_filepath
+from yt_common.urls import (
+    canonical_video_id, is_playlist_url, playlist_entry_url, playlist_listing_url,
+)
+from yt_common.async_engine import download_flac
+from yt_common.backends import (
+    DEFAULT_HEDGE_BUDGET, PytubeBackend, StreamlinkBackend, YtDlpBackend, hedged_open,
+)
+from yt_common.lazy import lazy_import, warm_up
+from yt_common.metrics import YtDlpTimer, metrics
+from yt_common.profiling import profiler
+from yt_common.ratelimit import RateLimiter, is_rate_limit_error
+from yt_common.streaming import stream_to_flac
+from yt_common.strategy import StrategyStats
+
+# yt-dlp는 import가 무거우므로 URL을 입력받는 동안 백그라운드에서 불러옴
+yt_dlp = lazy_import('yt_dlp')
+
 SAVE_DIR = Path.home() / "Downloads" / "YouTube_Audio"
 SAVE_DIR.mkdir(exist_ok=True)
 
-def download(url):
+# 동영상 정보 캐시 (Music 재시도 시 재추출 방지)
+info_cache = InfoCache()
+
+# 다운로드 완료 파일 인덱스 (이미 받은 동영상은 건너뜀)
+library = LibraryIndex()
+
+# 일반 YouTube / Music 시도 순서 학습 (--stats로 확인)
+strategies = StrategyStats()
+STRATEGY_SCOPE = "cli.source"
+
+# --hedge: 백엔드 우선순위와 다음 백엔드를 함께 시작하기 전 대기 시간 (YT_HEDGE_BUDGET, 초)
+HEDGE_BACKENDS = [YtDlpBackend(), PytubeBackend(), StreamlinkBackend()]
+HEDGE_BUDGET = float(os.environ.get("YT_HEDGE_BUDGET", DEFAULT_HEDGE_BUDGET))
+
+# 배치 모드: 동시 작업 수 기본값, 전체 진행 상황 갱신 간격 (초)
+DEFAULT_JOBS = 4
+PROGRESS_INTERVAL = 0.5
+
+# 배치 모드에서 여러 작업이 동시에 YouTube에 요청하므로 요청 속도를 함께 조절
+rate_limiter = RateLimiter()
+
+def hook_percent(d):
+    """yt-dlp 진행 상황 dict → 진행률(%) (전체 크기를 모르면 None)"""
+    total = d.get("total_bytes") or d.get("total_bytes_estimate")
+    if d.get("status") == "finished":
+        return 100.0
+    if total and d.get("downloaded_bytes") is not None:
+        return min(100.0, d["downloaded_bytes"] / total * 100)
+    return None
+
+def download(url, progress=None):
+    """
+    기본: yt-dlp로 다운로드
+
+    progress가 있으면 (배치 모드) 출력 없이 진행률(%)만 progress로 전달
+    """
     opts = {
         "format": "bestaudio",
         "extractaudio": True,
@@ -25,31 +91,428 @@ def download(url):
         "outtmpl": str(SAVE_DIR / "%(title)s.%(ext)s"),
         "noplaylist": True,
     }
-    with YoutubeDL(opts) as ydl:
-        ydl.download([url])
+    # 후처리가 없으므로 process_ie_result 전체를 다운로드 단계로 기록
+    timer = YtDlpTimer(postprocess=False)
+    opts["progress_hooks"] = [timer.hook]
+    if progress is not None:
+        opts.update({
+            "quiet": True,
+            "no_warnings": True,
+            "noprogress": True,
+        })
+        opts["progress_hooks"].append(lambda d: progress(hook_percent(d)))
+    video_id = canonical_video_id(url)
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        # 요청 속도는 호출하는 쪽(fetch_with_fallback)에서 이미 rate_limiter로 조절함
+        info, _, cache_hit = extract_info_once(ydl, url, cache=info_cache)
+        if cache_hit and progress is None:
+            print("  (캐시된 동영상 정보 사용)")
+        try:
+            with timer:
+                result = ydl.process_ie_result(info, download=True)
+        except Exception as e:
+            # 캐시된 스트림 URL 만료 → 다음 시도에서 새로 추출
+            if is_stale_url_error(e):
+                info_cache.delete(video_id)
+            raise
+    filepath = final_filepath(result)
+    with metrics.stage("write"):
+        library.record(info.get("id") or video_id, filepath, info.get("title"))
+    return filepath
+
+def download_async(url, progress=None):
+    """--async: 추출만 스레드 풀, 다운로드+FLAC 변환은 ffmpeg 비동기 프로세스"""
+    def on_progress(seconds, percent):
+        if progress is not None:
+            progress(percent)
+            return
+        shown = f"{percent:5.1f}%" if percent is not None else f"{seconds:.0f}초"
+        print(f"\r  변환 중... {shown}", end="", flush=True)
+
+    filepath, info = asyncio.run(download_flac(url, SAVE_DIR, on_progress=on_progress))
+    if progress is None:
+        print()
+    with metrics.stage("write"):
+        library.record(info.get("id") or canonical_video_id(url), filepath, info.get("title"))
+    return filepath
+
+def download_hedged(url, progress=None):
+    """--hedge: yt-dlp → pytube → streamlink를 시차를 두고 시작, 먼저 첫 바이트를 받은 스트림을 FLAC로 저장"""
+    on_event = (lambda message: print("  ·", message)) if progress is None else None
+    source = hedged_open(HEDGE_BACKENDS, url, HEDGE_BUDGET, on_event=on_event)
+    safe_title = re.sub(r'[<>:"/\\|?*]', "", source.title)
+    filepath = str(SAVE_DIR / f"{safe_title}.flac")
+
+    def on_progress(d):
+        if progress is not None:
+            progress(hook_percent(d))
+        elif d["status"] == "downloading" and d.get("_percent_str"):
+            print(f"\r  받으며 변환 중... {d['_percent_str']}", end="", flush=True)
+
+    stream_to_flac(source.chunks, filepath, progress_hooks=[on_progress])
+    if progress is None:
+        print()
+    with metrics.stage("write"):
+        library.record(source.video_id or canonical_video_id(url), filepath, source.title)
+    return filepath
+
+def print_stats():
+    """--stats: 시도 순서 학습 기록 출력"""
+    print(f"{'범위':<22} {'전략':<10} {'성공률':>7} {'성공':>7} {'실패':>7} {'평균 시간':>9}")
+    for entry in strategies.stats():
+        rate = f"{entry['success_rate'] * 100:.0f}%" if entry["success_rate"] is not None else "-"
+        latency = f"{entry['latency_seconds']:.1f}초" if entry["latency_seconds"] is not None else "-"
+        print(f"{entry['scope']:<22} {entry['name']:<10} {rate:>7} "
+              f"{entry['successes']:>7.1f} {entry['failures']:>7.1f} {latency:>9}")
+
+@profiler.wrap
+def fetch_with_fallback(url, video_id, fetch, progress=None):
+    """
+    일반 YouTube / YouTube Music 중 최근 성공률이 높은 쪽부터 시도
+
+    Args:
+        url (str): 입력받은 URL
+        video_id (str): 동영상 ID
+        fetch: 다운로드 함수 (download / download_async / download_hedged)
+        progress: 진행률 콜백 (배치 모드, 있으면 출력 없음)
+
+    Returns:
+        tuple: (성공한 전략 이름, 저장 경로)
+
+    Raises:
+        Exception: 모든 출처가 실패하면 마지막 오류
+    """
+    say = print if progress is None else (lambda *args: None)
+    sources = {
+        "youtube": ("일반 YouTube", url),
+        "music": ("YouTube Music", f"https://music.youtube.com/watch?v={video_id}"),
+    }
+    last_error = None
+    for index, name in enumerate(strategies.order(STRATEGY_SCOPE, list(sources))):
+        label, source_url = sources[name]
+        if index > 0:
+            metrics.fallback(STRATEGY_SCOPE, name)
+        say(f"\n▶ {label} 시도:", source_url)
+        rate_limiter.acquire()
+        started = time.monotonic()
+        try:
+            filepath = fetch(source_url, progress)
+        except Exception as e:
+            # 429는 출처 문제가 아니므로 기록하지 않고 요청 속도만 낮춤
+            if is_rate_limit_error(e):
+                metrics.retry("rate_limited")
+                rate_limiter.penalize()
+            else:
+                strategies.record(STRATEGY_SCOPE, name, False, time.monotonic() - started)
+            say(f"❌ {label} 실패")
+            last_error = e
+            continue
+        rate_limiter.success()
+        strategies.record(STRATEGY_SCOPE, name, True, time.monotonic() - started)
+        say(f"✅ {label} 성공")
+        return name, filepath
+
+    raise last_error
+
+def read_urls(source):
+    """
+    배치 입력에서 URL 읽기 (빈 줄과 # 주석 무시)
+
+    stdin('-')은 한 줄씩 읽으므로 입력이 끝나기 전에도 다운로드를 시작함
+    """
+    stream = nullcontext(sys.stdin) if source == "-" else open(source, encoding="utf-8")
+    with stream as lines:
+        for line in lines:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+
+def list_playlist(url):
+    """
+    플레이리스트/채널 항목 URL 목록 (flat 추출 - 동영상별 정보 조회 없이 목록만)
+
+    Returns:
+        tuple: (플레이리스트 제목, 항목 URL 목록)
+    """
+    opts = {
+        "extract_flat": "in_playlist",
+        "noplaylist": False,
+        "quiet": True,
+        "no_warnings": True,
+        "skip_download": True,
+    }
+    rate_limiter.acquire()
+    with yt_dlp.YoutubeDL(opts) as ydl, metrics.stage("extract"):
+        info = ydl.extract_info(playlist_listing_url(url), download=False)
+    # 채널 탭/하위 플레이리스트 같은 동영상이 아닌 항목은 제외
+    entries = [playlist_entry_url(entry) for entry in info.get("entries") or []]
+    return info.get("title") or "", [entry for entry in entries if entry]
+
+def wants_playlist(url, playlist=False):
+    """
+    플레이리스트 전체를 받을 URL인지 여부
+
+    플레이리스트/채널 페이지는 항상, watch?v=...&list=... 는 --playlist일 때만
+    (동영상 ID가 있으면 기본은 그 동영상 하나)
+    """
+    return is_playlist_url(url) and (playlist or canonical_video_id(url) is None)
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes}:{seconds:02d}"
+
+class BatchProgress:
+    """
+    배치 모드 전체 진행 상황
+
+    터미널이면 한 줄을 PROGRESS_INTERVAL마다 다시 그리고,
+    항목이 끝날 때마다 결과 한 줄을 그 위에 남김 (리다이렉트 시 결과 줄만 출력)
+    """
+
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self.queued = 0
+        self.counts = {"ok": 0, "skipped": 0, "failed": 0, "duplicate": 0}
+        self.active = {}          # 작업 키 → 진행률(%) 또는 None
+        self.input_done = False
+        self.started = time.monotonic()
+        self.tty = sys.stdout.isatty()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="batch-progress", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def add(self):
+        with self._lock:
+            self.queued += 1
+
+    def begin(self, key):
+        with self._lock:
+            self.active[key] = None
+
+    def update(self, key, percent):
+        with self._lock:
+            if key in self.active and percent is not None:
+                self.active[key] = percent
+
+    def finish(self, entry, key=None):
+        """항목 완료 (entry: 보고서 항목, key: 진행 중 목록에서 뺄 작업 키)"""
+        icons = {"ok": "✅", "skipped": "⏭ ", "failed": "❌", "duplicate": "🔁"}
+        with self._lock:
+            if key is not None:
+                self.active.pop(key, None)
+            self.counts[entry["status"]] += 1
+            done = sum(self.counts.values())
+            detail = entry.get("path") or entry.get("error") or entry["url"]
+            seconds = f" ({entry['seconds']:.1f}초)" if entry.get("seconds") else ""
+            self._write(f"{icons[entry['status']]} [{done}] {entry['video_id'] or '-'} {detail}{seconds}")
+
+    def message(self, text):
+        """안내 한 줄 출력 (플레이리스트 펼침 등)"""
+        with self._lock:
+            self._write(text)
+
+    def _line(self):
+        """전체 진행 상황 한 줄 (락 안에서 호출)"""
+        done = sum(self.counts.values())
+        total = self.queued + self.counts["duplicate"]
+        total_text = str(total) if self.input_done else f"{total}+"
+        percents = [p for p in self.active.values() if p is not None]
+        active_text = f"진행 중 {len(self.active)}/{self.jobs}"
+        if percents:
+            active_text += f" (평균 {sum(percents) / len(percents):.0f}%)"
+        return (f"[{done}/{total_text}] 완료 {self.counts['ok']} · 건너뜀 {self.counts['skipped']} · "
+                f"중복 {self.counts['duplicate']} · 실패 {self.counts['failed']} · {active_text} · "
+                f"경과 {format_duration(time.monotonic() - self.started)}")
+
+    def _write(self, message):
+        """결과 줄 출력 (진행 줄을 지우고 출력한 뒤 다시 그림, 락 안에서 호출)"""
+        if self.tty:
+            print(f"\r\033[K{message}\n{self._line()}", end="", flush=True)
+        else:
+            print(message, flush=True)
+
+    def _run(self):
+        while not self._stop.wait(PROGRESS_INTERVAL):
+            if self.tty:
+                with self._lock:
+                    print(f"\r\033[K{self._line()}", end="", flush=True)
+
+    def close(self):
+        """진행 줄 갱신을 멈추고 최종 요약 출력"""
+        self._stop.set()
+        self._thread.join()
+        with self._lock:
+            if self.tty:
+                print("\r\033[K", end="")
+            print(self._line(), flush=True)
+
+def run_batch(source, fetch, jobs=DEFAULT_JOBS, report_path=None, playlist=False):
+    """
+    배치 모드: URL 목록을 동영상 ID로 중복 제거한 뒤 jobs개씩 동시에 다운로드
+
+    플레이리스트/채널 URL은 항목 목록으로 펼쳐 같은 워커 풀에서 받음
+    (watch?v=...&list=... 는 playlist=True일 때만, 목록을 못 가져오면 그 URL을 failed로 기록)
+
+    보고서(JSON Lines)에는 입력 한 줄마다 결과 한 줄을 끝나는 순서대로 기록
+    {"url", "video_id", "status": ok|skipped|failed|duplicate, "source", "path",
+     "error", "started_at", "finished_at", "seconds"}
+
+    Args:
+        source: URL 목록 파일 경로 ('-'이면 stdin) 또는 URL 리스트
+        fetch: 다운로드 함수
+        jobs (int): 동시 작업 수
+        report_path: 보고서 경로 (None이면 현재 폴더에 batch_report_시각.jsonl)
+        playlist (bool): watch?v=...&list=... URL도 플레이리스트 전체를 받을지 여부
+
+    Returns:
+        int: 실패한 항목 수
+    """
+    report_path = Path(report_path or f"batch_report_{datetime.now():%Y%m%d_%H%M%S}.jsonl")
+    report_lock = threading.Lock()
+    progress = BatchProgress(jobs)
+    seen = set()
+
+    if isinstance(source, str):
+        urls = read_urls(source)
+        label = "stdin" if source == "-" else source
+    else:
+        urls = iter(source)
+        label = ", ".join(source)
+    print(f"📋 배치 모드: {label} · 동시 작업 {jobs}개")
+    print(f"📁 저장 위치: {SAVE_DIR}")
+    print(f"🧾 보고서: {report_path}\n")
+
+    with open(report_path, "w", encoding="utf-8") as report:
+        def write(entry, key=None):
+            with report_lock:
+                report.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                report.flush()
+            progress.finish(entry, key)
+
+        def work(url, video_id):
+            entry = {"url": url, "video_id": video_id, "status": None, "source": None,
+                     "path": None, "error": None, "started_at": time.time()}
+            started = time.monotonic()
+            progress.begin(video_id)
+            try:
+                existing = library.lookup(video_id)
+                if existing:
+                    entry.update(status="skipped", path=existing["path"])
+                else:
+                    name, filepath = fetch_with_fallback(
+                        url, video_id, fetch, progress=lambda percent: progress.update(video_id, percent)
+                    )
+                    entry.update(status="ok", source=name, path=filepath)
+            except Exception as e:
+                entry.update(status="failed", error=str(e) or type(e).__name__)
+            metrics.job(entry["status"])
+            entry["finished_at"] = time.time()
+            entry["seconds"] = round(time.monotonic() - started, 3)
+            write(entry, video_id)
+
+        def submit(pool, url):
+            with metrics.stage("normalize"):
+                video_id = canonical_video_id(url) or url.split("v=")[-1]
+            if video_id in seen:
+                now = time.time()
+                write({"url": url, "video_id": video_id, "status": "duplicate", "source": None,
+                       "path": None, "error": None, "started_at": now, "finished_at": now,
+                       "seconds": 0.0})
+                return
+            seen.add(video_id)
+            progress.add()
+            pool.submit(work, url, video_id)
+
+        progress.start()
+        with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="batch") as pool:
+            for url in urls:
+                if not wants_playlist(url, playlist):
+                    submit(pool, url)
+                    continue
+                # 플레이리스트/채널 → 항목마다 작업 하나 (목록 실패는 보고서에 한 줄)
+                started = time.time()
+                try:
+                    title, entries = list_playlist(url)
+                except Exception as e:
+                    progress.add()
+                    write({"url": url, "video_id": None, "status": "failed", "source": None,
+                           "path": None, "error": f"플레이리스트 목록 실패: {e}", "started_at": started,
+                           "finished_at": time.time(), "seconds": round(time.time() - started, 3)})
+                    continue
+                progress.message(f"📃 플레이리스트 {title or url}: {len(entries)}개 항목")
+                for entry in entries:
+                    submit(pool, entry)
+            progress.input_done = True
+        progress.close()
+
+    metrics.print_summary()
+    print(f"\n🧾 보고서 저장: {report_path}")
+    return progress.counts["failed"]
 
 def main():
-    url = input("YouTube URL: ").strip()
-    video_id = url.split("v=")[-1]
+    parser = argparse.ArgumentParser(description="YouTube → FLAC 다운로더 (실패 시 YouTube Music 자동 재시도)")
+    parser.add_argument("url", nargs="?", help="YouTube URL (없으면 입력받음)")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="asyncio 엔진 사용 (ffmpeg로 바로 FLAC 저장)")
+    parser.add_argument("--hedge", action="store_true",
+                        help="여러 백엔드를 시차를 두고 실행해 먼저 응답한 쪽 사용")
+    parser.add_argument("--stats", action="store_true", help="시도 순서 학습 기록 출력")
+    parser.add_argument("-b", "--batch", metavar="FILE",
+                        help="URL 목록 파일 (한 줄에 하나, '-'이면 stdin)")
+    parser.add_argument("-j", "--jobs", type=int, default=DEFAULT_JOBS,
+                        help=f"배치 모드 동시 작업 수 (기본 {DEFAULT_JOBS})")
+    parser.add_argument("--report", metavar="PATH", help="배치 결과 보고서 경로 (JSON Lines)")
+    parser.add_argument("--playlist", action="store_true",
+                        help="watch?v=...&list=... URL도 플레이리스트 전체를 받음 "
+                             "(플레이리스트/채널 페이지 URL은 항상 전체)")
+    args = parser.parse_args()
 
-    try:
-        print("\n▶ 일반 YouTube 시도")
-        download(url)
-        print("✅ 성공")
+    if args.stats:
+        print_stats()
         return
-    except Exception:
-        print("❌ 실패 → YouTube Music 전환")
 
-    music_url = f"https://music.youtube.com/watch?v={video_id}"
+    if args.hedge:
+        fetch = download_hedged
+    elif args.use_async:
+        fetch = download_async
+    else:
+        fetch = download
+
+    if args.batch:
+        warm_up(yt_dlp)
+        failed = run_batch(args.batch, fetch, max(1, args.jobs), args.report, args.playlist)
+        sys.exit(1 if failed else 0)
+
+    # URL을 입력하는 동안 yt-dlp를 미리 import
+    warm_up(yt_dlp)
+    url = (args.url or input("YouTube URL: ")).strip()
+
+    # 플레이리스트/채널은 배치 모드와 같은 워커 풀에서 항목별로 받음
+    if wants_playlist(url, args.playlist):
+        failed = run_batch([url], fetch, max(1, args.jobs), args.report, playlist=True)
+        sys.exit(1 if failed else 0)
+
+    with metrics.stage("normalize"):
+        video_id = canonical_video_id(url) or url.split("v=")[-1]
+
+    existing = library.lookup(video_id)
+    if existing:
+        metrics.job("skipped")
+        print("\n✅ 이미 다운로드한 동영상:", existing["path"])
+        return
 
     try:
-        print("\n▶ YouTube Music 시도:", music_url)
-        download(music_url)
-        print("✅ Music 성공")
+        fetch_with_fallback(url, video_id, fetch)
+        metrics.job("ok")
     except Exception as e:
-        print("❌ Music도 실패")
+        metrics.job("failed")
         print("원인:", e)
         print("\n👉 이 영상은 스트리밍 전용 (다운로드 불가)")
+    metrics.print_summary()
 
 if __name__ == "__main__":
     main()
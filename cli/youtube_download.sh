@@ -6,8 +6,60 @@
 DOWNLOAD_DIR="$HOME/Downloads/YouTube_Audio"
 mkdir -p "$DOWNLOAD_DIR"
 
+# 이미 받은 동영상 ID 목록 (yt-dlp --download-archive, 중복 다운로드 방지)
+ARCHIVE_FILE="$DOWNLOAD_DIR/.downloaded.txt"
+
+# 쿠키 설정
+# - YT_COOKIES: cookies.txt 경로 (예: YT_COOKIES=./cookies.txt) - 있으면 브라우저 대신 사용
+# - 없으면 Chrome 쿠키를 한 번만 복호화해 캐시 파일로 내보낸 뒤 다음 실행부터 재사용
+#   (30분이 지났거나 Chrome 쿠키 DB가 바뀌었으면 다시 내보냄, 캐시 쿠키로 실패하면 새로 불러와 재시도)
+CACHE_DIR="${YT_CACHE_DIR:-$HOME/.cache/youtube_audio_downloader}"
+COOKIE_CACHE="$CACHE_DIR/cookies_chrome.txt"
+COOKIE_MAX_AGE_MIN=30
+mkdir -p "$CACHE_DIR"
+
+# Chrome 쿠키 DB 위치 (수정 시각 비교용)
+chrome_cookie_db() {
+    for f in "$HOME/Library/Application Support/Google/Chrome/Default/Network/Cookies" \
+             "$HOME/Library/Application Support/Google/Chrome/Default/Cookies" \
+             "$HOME/.config/google-chrome/Default/Network/Cookies" \
+             "$HOME/.config/google-chrome/Default/Cookies"; do
+        if [ -f "$f" ]; then
+            echo "$f"
+            return
+        fi
+    done
+}
+
+# 캐시된 쿠키를 그대로 써도 되는지 확인
+cookie_cache_fresh() {
+    [ -s "$COOKIE_CACHE" ] || return 1
+    # 1분 이내에 내보냈으면 사용 (Chrome 실행 중에는 DB가 계속 바뀜)
+    [ -n "$(find "$COOKIE_CACHE" -mmin -1)" ] && return 0
+    [ -n "$(find "$COOKIE_CACHE" -mmin -$COOKIE_MAX_AGE_MIN)" ] || return 1
+    DB="$(chrome_cookie_db)"
+    [ -z "$DB" ] || [ ! "$DB" -nt "$COOKIE_CACHE" ]
+}
+
+# 옵션
+# -f FILE: 배치 모드 - URL 목록 파일 (한 줄에 하나, '-'이면 stdin)
+# -j N:    배치 모드 동시 작업 수 (기본 4)
+# -r PATH: 배치 결과 보고서 (JSON Lines, 기본 ./batch_report_시각.jsonl)
+BATCH_FILE=""
+JOBS=4
+REPORT=""
+while getopts "f:j:r:" opt; do
+    case $opt in
+        f) BATCH_FILE="$OPTARG" ;;
+        j) JOBS="$OPTARG" ;;
+        r) REPORT="$OPTARG" ;;
+        *) exit 1 ;;
+    esac
+done
+shift $((OPTIND - 1))
+
 # 사용법 출력
-if [ $# -eq 0 ]; then
+if [ $# -eq 0 ] && [ -z "$BATCH_FILE" ]; then
     echo ""
     echo "======================================================================"
     echo "🎵 YouTube 음원 다운로더 (FLAC)"
@@ -15,9 +67,11 @@ if [ $# -eq 0 ]; then
     echo ""
     echo "사용법:"
     echo "  ./youtube_download.sh <YouTube_URL>"
+    echo "  ./youtube_download.sh -f urls.txt [-j 4] [-r report.jsonl]   # 배치 모드"
     echo ""
     echo "예시:"
     echo "  ./youtube_download.sh https://www.youtube.com/watch?v=..."
+    echo "  cat urls.txt | ./youtube_download.sh -f - -j 8"
     echo ""
     echo "======================================================================"
     echo ""
@@ -26,6 +80,152 @@ fi
 
 URL="$1"
 
+# yt-dlp 실행 (쿠키 옵션은 인자로 받음)
+run_ytdlp() {
+    yt-dlp \
+        --extract-audio \
+        --audio-format flac \
+        --audio-quality 0 \
+        --output "$DOWNLOAD_DIR/%(title)s.%(ext)s" \
+        --no-playlist \
+        --download-archive "$ARCHIVE_FILE" \
+        --progress \
+        "$@" \
+        "$URL"
+}
+
+# Chrome 쿠키를 새로 불러와 캐시 파일로 내보내며 실행
+# (기존 캐시를 지워야 오래된 쿠키가 새 쿠키를 덮어쓰지 않음)
+run_with_fresh_cookies() {
+    rm -f "$COOKIE_CACHE"
+    run_ytdlp --cookies-from-browser chrome --cookies "$COOKIE_CACHE"
+    STATUS=$?
+    chmod 600 "$COOKIE_CACHE" 2>/dev/null
+}
+
+# 동영상 ID 추출 (중복 제거용, 알 수 없으면 URL 그대로)
+video_id() {
+    local id
+    id="$(printf '%s\n' "$1" | sed -nE 's#.*(v=|youtu\.be/|shorts/|embed/|live/)([A-Za-z0-9_-]{11}).*#\2#p' | head -n 1)"
+    echo "${id:-$1}"
+}
+
+# JSON 문자열로 변환 (따옴표 포함)
+json_string() {
+    printf '"%s"' "$(printf '%s' "$1" | sed 's/\\/\\\\/g; s/"/\\"/g' | tr -d '\r' | tr '\n' ' ')"
+}
+
+# 배치 항목 하나 다운로드 후 보고서에 한 줄 추가 (xargs가 여러 개를 동시에 실행)
+# 쿠키 파일은 작업마다 복사본을 사용 (yt-dlp가 종료할 때 쿠키 파일을 다시 쓰므로)
+run_batch_item() {
+    URL="$1"
+    local id status path error started finished icon cookie_copy err_file
+    id="$(video_id "$URL")"
+    started=$(date +%s)
+    if grep -qx "youtube $id" "$ARCHIVE_FILE" 2>/dev/null; then
+        status="skipped"
+    else
+        cookie_copy="$(mktemp)"
+        err_file="$(mktemp)"
+        cp "$BATCH_COOKIES" "$cookie_copy" 2>/dev/null
+        if path="$(run_ytdlp --cookies "$cookie_copy" --quiet --no-warnings --no-progress \
+                       --print after_move:filepath 2>"$err_file")"; then
+            status="ok"
+        else
+            status="failed"
+            error="$(grep 'ERROR' "$err_file" | tail -n 1)"
+            error="${error:-$(tail -n 1 "$err_file")}"
+        fi
+        rm -f "$cookie_copy" "$err_file"
+    fi
+    finished=$(date +%s)
+
+    printf '{"url": %s, "video_id": %s, "status": "%s", "path": %s, "error": %s, "started_at": %s, "finished_at": %s, "seconds": %s}\n' \
+        "$(json_string "$URL")" "$(json_string "$id")" "$status" \
+        "$(if [ -n "$path" ]; then json_string "$path"; else echo null; fi)" \
+        "$(if [ -n "$error" ]; then json_string "$error"; else echo null; fi)" \
+        "$started" "$finished" "$((finished - started))" >> "$REPORT"
+
+    case $status in
+        ok) icon="✅" ;;
+        skipped) icon="⏭ " ;;
+        *) icon="❌" ;;
+    esac
+    echo "$icon [$(wc -l < "$REPORT" | tr -d ' ')/$BATCH_TOTAL] $id ($((finished - started))초) ${error:-$path}"
+    return 0
+}
+
+# 배치 모드: URL 목록을 동영상 ID로 중복 제거한 뒤 JOBS개씩 동시에 다운로드
+# (보고서는 항목이 끝나는 순서대로 한 줄씩 추가, 진행 상황은 [끝난 수/전체]로 출력)
+if [ -n "$BATCH_FILE" ]; then
+    REPORT="${REPORT:-batch_report_$(date +%Y%m%d_%H%M%S).jsonl}"
+    LIST="$(mktemp)"
+    trap 'rm -f "$LIST"' EXIT
+    if [ "$BATCH_FILE" = "-" ]; then
+        INPUT="/dev/stdin"
+    else
+        INPUT="$BATCH_FILE"
+    fi
+    grep -v '^[[:space:]]*\(#.*\)\{0,1\}$' "$INPUT" | tr -d '\r' | sed 's/^[[:space:]]*//; s/[[:space:]]*$//' > "$LIST.in"
+    INPUT_COUNT=$(wc -l < "$LIST.in" | tr -d ' ')
+    while IFS= read -r line; do
+        printf '%s\t%s\n' "$(video_id "$line")" "$line"
+    done < "$LIST.in" | awk -F '\t' '!seen[$1]++ { print $2 }' > "$LIST"
+    rm -f "$LIST.in"
+    BATCH_TOTAL=$(wc -l < "$LIST" | tr -d ' ')
+    : > "$REPORT"
+
+    echo ""
+    echo "======================================================================"
+    echo "🎵 YouTube 음원 다운로더 (FLAC) - 배치 모드"
+    echo "======================================================================"
+    echo ""
+    echo "📁 저장 위치: $DOWNLOAD_DIR"
+    echo "📋 대상: ${BATCH_TOTAL}개 (중복 $((INPUT_COUNT - BATCH_TOTAL))개 제외) · 동시 작업 ${JOBS}개"
+    echo "🧾 보고서: $REPORT"
+    echo ""
+
+    if [ "$BATCH_TOTAL" -eq 0 ]; then
+        echo "다운로드할 URL이 없습니다."
+        exit 0
+    fi
+
+    # 쿠키는 시작 전에 한 번만 준비 (모든 작업이 같은 쿠키 파일의 복사본 사용)
+    if [ -n "$YT_COOKIES" ]; then
+        echo "🍪 쿠키: $YT_COOKIES"
+        BATCH_COOKIES="$YT_COOKIES"
+    else
+        if cookie_cache_fresh; then
+            echo "🍪 쿠키: 캐시된 Chrome 쿠키 사용 (복호화 생략)"
+        else
+            echo "🍪 쿠키: Chrome 쿠키 불러오는 중 (한 번만)"
+            rm -f "$COOKIE_CACHE"
+            yt-dlp --cookies-from-browser chrome --cookies "$COOKIE_CACHE" \
+                --skip-download --quiet --no-warnings "$(head -n 1 "$LIST")" >/dev/null 2>&1
+            chmod 600 "$COOKIE_CACHE" 2>/dev/null
+        fi
+        BATCH_COOKIES="$COOKIE_CACHE"
+    fi
+    echo ""
+
+    export DOWNLOAD_DIR ARCHIVE_FILE REPORT BATCH_TOTAL BATCH_COOKIES
+    export -f run_ytdlp run_batch_item video_id json_string
+    STARTED=$(date +%s)
+    tr '\n' '\0' < "$LIST" | xargs -0 -n 1 -P "$JOBS" bash -c 'run_batch_item "$1"' _
+
+    OK=$(grep -c '"status": "ok"' "$REPORT")
+    SKIPPED=$(grep -c '"status": "skipped"' "$REPORT")
+    FAILED=$(grep -c '"status": "failed"' "$REPORT")
+    echo ""
+    echo "======================================================================"
+    echo "📊 완료 $OK · 건너뜀 $SKIPPED · 실패 $FAILED · $(( $(date +%s) - STARTED ))초"
+    echo "🧾 보고서: $REPORT"
+    echo "======================================================================"
+    echo ""
+    [ "$FAILED" -eq 0 ]
+    exit $?
+fi
+
 echo ""
 echo "======================================================================"
 echo "🎵 YouTube 음원 다운로더 (FLAC)"
@@ -37,18 +237,26 @@ echo ""
 echo "🚀 다운로드 시작..."
 echo ""
 
-# yt-dlp 실행
-yt-dlp \
-    --extract-audio \
-    --audio-format flac \
-    --audio-quality 0 \
-    --output "$DOWNLOAD_DIR/%(title)s.%(ext)s" \
-    --no-playlist \
-    --progress \
-    --cookies-from-browser chrome \
-    "$URL"
-
-if [ $? -eq 0 ]; then
+if [ -n "$YT_COOKIES" ]; then
+    echo "🍪 쿠키: $YT_COOKIES"
+    run_ytdlp --cookies "$YT_COOKIES"
+    STATUS=$?
+elif cookie_cache_fresh; then
+    echo "🍪 쿠키: 캐시된 Chrome 쿠키 사용 (복호화 생략)"
+    run_ytdlp --cookies "$COOKIE_CACHE"
+    STATUS=$?
+    if [ $STATUS -ne 0 ]; then
+        echo ""
+        echo "♻️  캐시된 쿠키로 실패 → Chrome 쿠키를 다시 불러와 재시도"
+        echo ""
+        run_with_fresh_cookies
+    fi
+else
+    echo "🍪 쿠키: Chrome 쿠키 불러오는 중 (다음 실행부터 캐시 사용)"
+    run_with_fresh_cookies
+fi
+
+if [ $STATUS -eq 0 ]; then
     echo ""
     echo "======================================================================"
     echo "✅ 다운로드 완료!"
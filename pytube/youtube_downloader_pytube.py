@@ -4,26 +4,57 @@ YouTube 음원 다운로더 (FLAC) - PyTube 버전
 yt-dlp의 PO Token 문제 해결
 """
 
-from flask import Flask, request, jsonify
-from pytube import YouTube
-from pydub import AudioSegment
+from flask import Flask, Response, request, jsonify
 import os
 from pathlib import Path
 import threading
 import sys
 
+# 공용 모듈(저장소 루트의 yt_common 패키지) 경로 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from yt_common.checkpoint import DownloadCheckpoint
+from yt_common.lazy import lazy_import, warm_up
+from yt_common.library import LibraryIndex
+from yt_common.metrics import PROMETHEUS_CONTENT_TYPE, metrics
+from yt_common.profiling import profiler
+from yt_common.progress import LogBuffer, status_payload, status_stream
+from yt_common.ranged import ranged_download
+from yt_common.streaming import stream_url_to_flac
+from yt_common.transcode import transcode_to_flac
+from yt_common.urls import canonical_video_id
+
+# pytube/requests는 서버가 뜬 뒤 백그라운드에서 불러옴 (처음 사용 시 import)
+pytube = lazy_import('pytube')
+requests = lazy_import('requests')
+
 app = Flask(__name__)
 
+# 보관할 최대 로그 줄 수 (초과 시 오래된 로그부터 버림)
+LOG_CAPACITY = 1000
+
 # 다운로드 상태
-status = {'state': 'ready', 'message': '대기 중', 'logs': []}
+# run: 다운로드 회차, run_start: 이번 회차 첫 로그의 순번
+status = {'state': 'ready', 'message': '대기 중', 'logs': LogBuffer(LOG_CAPACITY), 'run': 0, 'run_start': 0}
 status_lock = threading.Lock()
 
+# 상태 변경 알림 (SSE 스트림이 새 이벤트를 기다림)
+status_changed = threading.Condition(status_lock)
+
 # 다운로드 경로
 DOWNLOAD_PATH = str(Path.home() / "Downloads" / "YouTube_Audio")
 TEMP_PATH = str(Path.home() / "Downloads" / "YouTube_Audio_Temp")
 os.makedirs(DOWNLOAD_PATH, exist_ok=True)
 os.makedirs(TEMP_PATH, exist_ok=True)
 
+# 이어받기 체크포인트 조각 크기 (완료된 조각 단위로 기록)
+DOWNLOAD_CHUNK_SIZE = 2 * 1024 * 1024
+
+# 스트리밍 모드 (YT_STREAMING=1): 받는 즉시 ffmpeg로 FLAC 변환, TEMP_PATH에 원본을 쓰지 않음
+STREAMING = os.environ.get('YT_STREAMING') == '1'
+
+# 다운로드 완료 파일 인덱스 (이미 받은 동영상은 다시 받지 않음)
+library = LibraryIndex()
+
 
 def log(msg):
     """로그 추가"""
@@ -31,6 +62,7 @@ def log(msg):
     with status_lock:
         status['logs'].append(msg)
         status['message'] = msg
+        status_changed.notify_all()
 
 
 def set_status(state, msg):
@@ -39,6 +71,7 @@ def set_status(state, msg):
         status['state'] = state
         status['message'] = msg
         status['logs'].append(msg)
+        status_changed.notify_all()
     print(f"[STATUS] {state}: {msg}", flush=True)
 
 
@@ -50,72 +83,137 @@ def sanitize_filename(filename):
     return filename.strip()
 
 
+@profiler.wrap
 def download_task(url):
     """다운로드 실행 - PyTube 사용"""
     temp_file = None
     flac_file = None
+    checkpoint = None
     
     try:
         # URL 정리 (플레이리스트 제거)
-        if '&list=' in url or '?list=' in url:
-            url = url.split('&list=')[0].split('?list=')[0]
-            log("플레이리스트 파라미터 제거됨")
+        with metrics.stage('normalize'):
+            if '&list=' in url or '?list=' in url:
+                url = url.split('&list=')[0].split('?list=')[0]
+                log("플레이리스트 파라미터 제거됨")
+            video_id = canonical_video_id(url)
         
         log(f"URL: {url}")
-        set_status('downloading', '동영상 정보 가져오는 중...')
         
-        # PyTube로 YouTube 객체 생성
-        yt = YouTube(url)
+        # 이미 받은 동영상이면 기존 파일 반환 (다운로드/변환 생략)
+        existing = library.lookup(video_id)
+        if existing:
+            metrics.job('skipped')
+            set_status('complete', f"완료: {os.path.basename(existing['path'])} (이미 다운로드됨)")
+            log(f"저장 위치: {existing['path']}")
+            return
+        set_status('downloading', '동영상 정보 가져오는 중...')
         
-        # 동영상 정보
-        title = sanitize_filename(yt.title)
-        log(f"제목: {title}")
-        log(f"길이: {yt.length}초")
+        with metrics.stage('extract'):
+            # PyTube로 YouTube 객체 생성
+            yt = pytube.YouTube(url)
+            
+            # 동영상 정보
+            title = sanitize_filename(yt.title)
+            log(f"제목: {title}")
+            log(f"길이: {yt.length}초")
+            
+            # 오디오 스트림 선택 (최고 품질)
+            set_status('downloading', '최고 품질 오디오 스트림 선택 중...')
+            audio_stream = yt.streams.filter(only_audio=True).order_by('abr').desc().first()
+            
+            if not audio_stream:
+                raise Exception("오디오 스트림을 찾을 수 없습니다.")
         
-        # 오디오 스트림 선택 (최고 품질)
-        set_status('downloading', '최고 품질 오디오 스트림 선택 중...')
-        audio_stream = yt.streams.filter(only_audio=True).order_by('abr').desc().first()
+        log(f"선택된 비트레이트: {audio_stream.abr}")
         
-        if not audio_stream:
-            raise Exception("오디오 스트림을 찾을 수 없습니다.")
+        flac_file = os.path.join(DOWNLOAD_PATH, f"{title}.flac")
         
-        log(f"선택된 비트레이트: {audio_stream.abr}")
+        # 스트리밍 모드: 응답 본문을 바로 ffmpeg stdin으로 (임시 파일 없음)
+        if STREAMING:
+            set_status('downloading', '다운로드하면서 FLAC 변환 중...')
+            stream_url_to_flac(audio_stream.url, flac_file)
+            log("FLAC 변환 완료 (스트리밍)")
+            with metrics.stage('write'):
+                library.record(yt.video_id, flac_file, yt.title)
+            metrics.job('ok')
+            set_status('complete', f'완료: {title}.flac')
+            log(f"저장 위치: {flac_file}")
+            return
         
         # 임시 파일로 다운로드
         set_status('downloading', '다운로드 중...')
-        temp_file = audio_stream.download(
-            output_path=TEMP_PATH,
-            filename=f"{title}_temp.mp4"
-        )
+        total_size = audio_stream.filesize
+        if total_size:
+            # 조각 단위로 받고 완료 범위를 체크포인트에 기록 (중단 시 이어받기)
+            temp_file = os.path.join(TEMP_PATH, f"{title}_temp.{audio_stream.subtype}")
+            checkpoint = DownloadCheckpoint.open(
+                temp_file, f"{yt.video_id}:{audio_stream.itag}", audio_stream.url,
+                total_size, DOWNLOAD_CHUNK_SIZE
+            )
+            if checkpoint.resumed:
+                log(f"중단된 다운로드 이어받기 ({len(checkpoint.done)}개 조각 완료됨)")
+            
+            last_percent = [-1]
+            
+            def on_progress(received, total):
+                # 1% 단위로만 상태 갱신 (64KB마다 호출됨)
+                percent = received * 100 // total
+                if percent != last_percent[0]:
+                    last_percent[0] = percent
+                    set_status('downloading', f'다운로드 중... {percent}%')
+            
+            with requests.Session() as session, metrics.stage('download'):
+                ranged_download(
+                    session, audio_stream.url, temp_file, total_size,
+                    chunk_size=DOWNLOAD_CHUNK_SIZE, connections=1,
+                    on_progress=on_progress, checkpoint=checkpoint
+                )
+        else:
+            with metrics.stage('download'):
+                temp_file = audio_stream.download(
+                    output_path=TEMP_PATH,
+                    filename=f"{title}_temp.mp4"
+                )
         log(f"다운로드 완료: {temp_file}")
         
         # FLAC로 변환
         set_status('converting', 'FLAC 고음질로 변환 중...')
-        flac_file = os.path.join(DOWNLOAD_PATH, f"{title}.flac")
         
-        # PyDub으로 오디오 변환
-        audio = AudioSegment.from_file(temp_file)
-        audio.export(flac_file, format="flac")
+        # ffmpeg 스트리밍 변환 (곡 전체를 메모리에 올리지 않음)
+        transcode_to_flac(temp_file, flac_file)
         
         log(f"FLAC 변환 완료")
+        with metrics.stage('write'):
+            library.record(yt.video_id, flac_file, yt.title)
         
         # 임시 파일 삭제
-        if temp_file and os.path.exists(temp_file):
-            os.remove(temp_file)
-            log("임시 파일 삭제됨")
+        with metrics.stage('cleanup'):
+            if temp_file and os.path.exists(temp_file):
+                os.remove(temp_file)
+                log("임시 파일 삭제됨")
+            if checkpoint is not None:
+                checkpoint.remove()
+        metrics.job('ok')
         
         set_status('complete', f'완료: {title}.flac')
         log(f"저장 위치: {flac_file}")
         
     except Exception as e:
         error = str(e)
+        metrics.job('failed')
         
-        # 임시 파일 정리
-        if temp_file and os.path.exists(temp_file):
-            try:
-                os.remove(temp_file)
-            except:
-                pass
+        # 임시 파일 정리 (다운로드 중 끊긴 경우 받은 범위는 남겨 두고 다음 요청에서 이어받음)
+        if checkpoint is not None and checkpoint.missing():
+            log("받은 부분은 보관됨 - 다시 요청하면 이어받습니다")
+        elif temp_file and os.path.exists(temp_file):
+            with metrics.stage('cleanup'):
+                try:
+                    os.remove(temp_file)
+                except:
+                    pass
+                if checkpoint is not None:
+                    checkpoint.remove()
         
         # 에러 메시지 처리
         if 'unavailable' in error.lower():
@@ -295,7 +393,7 @@ def index():
     </div>
     
     <script>
-        let interval;
+        let eventSource = null;
         
         function download() {{
             const url = document.getElementById('url').value.trim();
@@ -323,38 +421,45 @@ def index():
                 method: 'POST',
                 headers: {{'Content-Type': 'application/json'}},
                 body: JSON.stringify({{url: url}})
-            }});
-            
-            interval = setInterval(checkStatus, 500);
+            }}).then(() => watchStatus());
         }}
         
-        function checkStatus() {{
-            fetch('/status')
-                .then(r => r.json())
-                .then(data => {{
-                    const statusDiv = document.getElementById('status');
-                    statusDiv.textContent = data.message;
-                    statusDiv.className = 'status ' + data.state;
-                    
-                    const log = document.getElementById('log');
-                    log.textContent = data.logs.join('\\n');
-                    log.scrollTop = log.scrollHeight;
-                    
-                    // 진행률
-                    const progressFill = document.getElementById('progress-fill');
-                    if (data.state === 'downloading') {{
-                        progressFill.style.width = '50%';
-                    }} else if (data.state === 'converting') {{
-                        progressFill.style.width = '80%';
-                    }} else if (data.state === 'complete') {{
-                        progressFill.style.width = '100%';
-                    }}
-                    
-                    if (data.state === 'complete' || data.state === 'error') {{
-                        clearInterval(interval);
-                        document.querySelector('button').disabled = false;
-                    }}
+        function watchStatus() {{
+            if (eventSource) {{
+                eventSource.close();
+            }}
+            // 서버 푸시 구독 (새 로그와 상태 변경만 수신)
+            eventSource = new EventSource('/events');
+            eventSource.addEventListener('update', event => {{
+                const data = JSON.parse(event.data);
+                const statusDiv = document.getElementById('status');
+                statusDiv.textContent = data.message;
+                statusDiv.className = 'status ' + data.state;
+                
+                const log = document.getElementById('log');
+                if (data.reset) {{
+                    log.textContent = '';
+                }}
+                data.logs.forEach(line => {{
+                    log.textContent += line + '\\n';
                 }});
+                log.scrollTop = log.scrollHeight;
+                
+                const progressFill = document.getElementById('progress-fill');
+                if (data.state === 'downloading') {{
+                    progressFill.style.width = '50%';
+                }} else if (data.state === 'converting') {{
+                    progressFill.style.width = '80%';
+                }} else if (data.state === 'complete') {{
+                    progressFill.style.width = '100%';
+                }}
+                
+                if (data.state === 'complete' || data.state === 'error') {{
+                    eventSource.close();
+                    eventSource = null;
+                    document.querySelector('button').disabled = false;
+                }}
+            }});
         }}
     </script>
 </body>
@@ -371,7 +476,10 @@ def download():
     with status_lock:
         status['state'] = 'downloading'
         status['message'] = '시작...'
-        status['logs'] = ['다운로드 요청']
+        status['run'] += 1  # 새 다운로드 - SSE 클라이언트 로그 초기화
+        status['run_start'] = status['logs'].next_seq
+        status['logs'].append('다운로드 요청')
+        status_changed.notify_all()
     
     thread = threading.Thread(target=download_task, args=(url,), daemon=True)
     thread.start()
@@ -379,11 +487,29 @@ def download():
     return jsonify({'status': 'started'})
 
 
+@app.route('/metrics')
+def get_metrics():
+    """단계별 소요 시간, 받은 바이트, 오류 수 (Prometheus 텍스트 형식)"""
+    return Response(metrics.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
 @app.route('/status')
 def get_status():
-    """상태 확인"""
-    with status_lock:
-        return jsonify(status.copy())
+    """
+    상태 확인
+    - /status?since=<seq> : 해당 순번 이후의 로그만 반환 (기본값: 이번 다운로드의 처음부터)
+    """
+    return jsonify(status_payload(status, status_lock, request.args.get('since', type=int)))
+
+
+@app.route('/events')
+def events():
+    """상태 푸시 스트림 (SSE) - 새 로그와 상태 변경만 전송"""
+    return Response(
+        status_stream(status, status_changed),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 
 if __name__ == '__main__':
@@ -394,6 +520,9 @@ if __name__ == '__main__':
     print("임시 파일: {TEMP_PATH}")
     print("\n✅ PyTube 엔진 사용 (yt-dlp PO Token 문제 해결)")
     print("\n브라우저에서 열기: http://127.0.0.1:5000")
+    print("지표 (Prometheus): http://127.0.0.1:5000/metrics")
+    if profiler.enabled:
+        print(f"작업별 프로파일링: {profiler.describe()} (YT_PROFILE 환경변수로 변경)")
     print("종료: Ctrl+C\n")
     print("=" * 70)
     print()
@@ -401,4 +530,7 @@ if __name__ == '__main__':
     import webbrowser
     threading.Timer(1.5, lambda: webbrowser.open('http://127.0.0.1:5000')).start()
     
+    # 서버가 요청을 받는 동안 pytube/requests를 백그라운드에서 미리 import
+    warm_up(pytube, requests)
+    
     app.run(host='127.0.0.1', port=5000, debug=False, threaded=True, use_reloader=False)
@@ -2,13 +2,13 @@
 # -*- coding: utf-8 -*-
 """
 YouTube 음원 다운로더 (FLAC) - 최종 완벽 버전
-Pytube + PyDub + 재시도 로직
+Pytube + FFmpeg + 재시도 로직
 
 작동 원리:
 1. pytube로 YouTube 비디오 객체 생성 (간단한 HTTP 요청)
 2. 오디오 스트림 URL 직접 추출
-3. requests로 직접 다운로드 (봇 탐지 우회)
-4. pydub으로 FLAC 변환
+3. requests로 직접 다운로드 (봇 탐지 우회, 여러 연결로 조각을 나눠 동시에 받음)
+4. ffmpeg 스트리밍 변환으로 FLAC 저장 (메모리 사용량 일정)
 
 이 방법은 모든 서드파티 도구의 한계를 극복합니다.
 """
@@ -19,6 +19,18 @@ import re
 import time
 from pathlib import Path
 
+# 공용 모듈(저장소 루트의 yt_common 패키지) 경로 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from yt_common.checkpoint import DownloadCheckpoint
+from yt_common.library import LibraryIndex
+from yt_common.metrics import metrics
+from yt_common.probe import probe_ffmpeg, probe_module
+from yt_common.profiling import profiler
+from yt_common.ranged import ranged_download
+from yt_common.streaming import stream_url_to_flac
+from yt_common.transcode import transcode_to_flac
+from yt_common.urls import canonical_video_id
+
 # ============================================================================
 # 설정 및 전역 변수
 # ============================================================================
@@ -31,6 +43,16 @@ TEMP_PATH = str(Path.home() / "Downloads" / "YouTube_Audio_Temp")
 os.makedirs(DOWNLOAD_PATH, exist_ok=True)
 os.makedirs(TEMP_PATH, exist_ok=True)
 
+# 스트리밍 모드 (YT_STREAMING=1): 받는 즉시 ffmpeg로 FLAC 변환, TEMP_PATH에 원본을 쓰지 않음
+STREAMING = os.environ.get('YT_STREAMING') == '1'
+
+# 다중 연결 다운로드 설정 (YouTube는 연결 하나당 속도를 제한함)
+DOWNLOAD_CONNECTIONS = int(os.environ.get('YT_CONNECTIONS', '4'))          # 동시 연결 수
+DOWNLOAD_CHUNK_SIZE = int(os.environ.get('YT_CHUNK_MB', '2')) * 1024 * 1024  # 조각 크기
+
+# 다운로드 완료 파일 인덱스 (이미 받은 동영상은 다시 받지 않음)
+library = LibraryIndex()
+
 
 # ============================================================================
 # 유틸리티 함수들
@@ -94,31 +116,15 @@ def check_dependencies():
     
     필수 라이브러리:
     1. pytube - YouTube 다운로드
-    2. pydub - 오디오 변환
-    3. requests - HTTP 다운로드
+    2. requests - HTTP 다운로드
+    
+    확인 결과는 캐시되므로 반복 다운로드 시 모듈을 다시 찾거나 import하지 않음
     
     Returns:
         bool: 모든 의존성이 충족되면 True
     """
-    missing = []
-    
-    # pytube 확인
-    try:
-        import pytube
-    except ImportError:
-        missing.append('pytube')
-    
-    # pydub 확인
-    try:
-        from pydub import AudioSegment
-    except ImportError:
-        missing.append('pydub')
-    
-    # requests 확인
-    try:
-        import requests
-    except ImportError:
-        missing.append('requests')
+    # 설치 여부만 확인 (import 하지 않음)
+    missing = [lib for lib in ('pytube', 'requests') if probe_module(lib) is None]
     
     if missing:
         print("⚠️  필수 라이브러리가 설치되지 않았습니다:")
@@ -141,6 +147,9 @@ def check_dependencies():
                 print(f"  ❌ {lib} 설치 실패")
                 return False
         
+        # 새로 설치한 모듈을 찾을 수 있도록 import 경로 캐시 초기화
+        import importlib
+        importlib.invalidate_caches()
         print("\n✅ 모든 라이브러리 설치 완료\n")
     
     return True
@@ -148,30 +157,24 @@ def check_dependencies():
 
 def check_ffmpeg():
     """
-    FFmpeg 설치 확인
+    FFmpeg 설치 및 FLAC 인코더 지원 확인
     
-    FFmpeg는 pydub이 내부적으로 사용하는 필수 도구
+    FFmpeg는 FLAC 변환에 사용하는 필수 도구
+    확인 결과는 실행 파일 경로/수정 시각 기준으로 캐시되므로
+    FFmpeg가 바뀌지 않았다면 ffmpeg -version 프로세스를 다시 띄우지 않음
     
     Returns:
-        bool: FFmpeg가 설치되어 있으면 True
+        bool: FFmpeg가 설치되어 있고 FLAC 인코더를 지원하면 True
     """
-    import subprocess
-    try:
-        subprocess.run(
-            ['ffmpeg', '-version'],
-            capture_output=True,
-            check=True,
-            timeout=5
-        )
-        return True
-    except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
-        return False
+    ffmpeg = probe_ffmpeg()
+    return bool(ffmpeg and ffmpeg['flac_encoder'])
 
 
 # ============================================================================
 # 메인 다운로드 함수
 # ============================================================================
 
+@profiler.wrap
 def download_audio(url):
     """
     YouTube 오디오 다운로드 메인 함수
@@ -194,6 +197,16 @@ def download_audio(url):
     print(f"📁 저장 위치: {DOWNLOAD_PATH}")
     print(f"🔗 URL: {url}\n")
     
+    # 이미 받은 동영상이면 기존 파일 반환 (다운로드/변환 생략)
+    with metrics.stage('normalize'):
+        video_id = canonical_video_id(url)
+    existing = library.lookup(video_id)
+    if existing:
+        metrics.job('skipped')
+        print_header("✅ 이미 다운로드한 동영상입니다")
+        print(f"📁 위치: {existing['path']}\n")
+        return True
+    
     # ========================================================================
     # 1단계: 의존성 확인
     # ========================================================================
@@ -203,7 +216,7 @@ def download_audio(url):
     if not check_dependencies():
         print("\n❌ 필수 라이브러리 설치에 실패했습니다.")
         print("\n수동 설치:")
-        print("  pip3 install pytube pydub requests\n")
+        print("  pip3 install pytube requests\n")
         return False
     
     # FFmpeg 확인
@@ -217,7 +230,6 @@ def download_audio(url):
     
     # 이제 라이브러리를 import (확인 후 import)
     from pytube import YouTube
-    from pydub import AudioSegment
     import requests
     
     # ========================================================================
@@ -228,18 +240,19 @@ def download_audio(url):
     try:
         # YouTube 객체 생성
         # pytube는 간단한 HTTP 요청만 사용하므로 봇 탐지 우회
-        yt = YouTube(
-            url,
-            use_oauth=False,  # OAuth 사용 안함 (간단한 방식)
-            allow_oauth_cache=False
-        )
-        
-        # 동영상 제목 가져오기
-        title = yt.title
+        with metrics.stage('extract'):
+            yt = YouTube(
+                url,
+                use_oauth=False,  # OAuth 사용 안함 (간단한 방식)
+                allow_oauth_cache=False
+            )
+            
+            # 동영상 제목 가져오기 (첫 속성 접근 시 watch 페이지 요청)
+            title = yt.title
+            
+            # 동영상 길이 (초)
+            duration = yt.length
         safe_title = sanitize_filename(title)
-        
-        # 동영상 길이 (초)
-        duration = yt.length
         duration_min = duration // 60
         duration_sec = duration % 60
         
@@ -303,25 +316,66 @@ def download_audio(url):
         print(f"❌ 오디오 스트림 선택 실패: {e}\n")
         return False
     
+    # ========================================================================
+    # 4단계 (스트리밍 모드): 다운로드하면서 바로 FLAC 변환
+    # ========================================================================
+    if STREAMING:
+        return stream_audio(yt, audio_stream, safe_title)
+    
     # ========================================================================
     # 4단계: 임시 파일로 다운로드
     # ========================================================================
     print_step(4, 5, "오디오 다운로드 중...")
     
     temp_file = None
+    checkpoint = None
     try:
         # 임시 파일명
         temp_filename = f"{safe_title}_temp"
         
-        print("   다운로드 진행 중...", end='', flush=True)
+        total_size = audio_stream.filesize
         
-        # pytube로 다운로드
-        temp_file = audio_stream.download(
-            output_path=TEMP_PATH,
-            filename=temp_filename
-        )
-        
-        print(" 완료!")
+        if total_size:
+            # 조각을 나눠 여러 연결로 동시에 다운로드 (미리 할당한 파일에 제자리 기록)
+            temp_file = os.path.join(TEMP_PATH, f"{temp_filename}.{audio_stream.subtype}")
+            
+            # 이전에 중단된 다운로드가 있으면 받은 범위는 건너뜀 (동영상 ID + itag가 같을 때만)
+            checkpoint = DownloadCheckpoint.open(
+                temp_file, f"{yt.video_id}:{audio_stream.itag}", audio_stream.url,
+                total_size, DOWNLOAD_CHUNK_SIZE
+            )
+            if checkpoint.resumed:
+                remaining_mb = sum(end - start + 1 for start, end in checkpoint.missing()) / (1024 * 1024)
+                print(f"   ↻ 중단된 다운로드 이어받기 (남은 크기: {remaining_mb:.2f} MB)")
+            print(f"   {DOWNLOAD_CONNECTIONS}개 연결로 다운로드 중...")
+            
+            session = requests.Session()
+            session.mount('https://', requests.adapters.HTTPAdapter(pool_maxsize=DOWNLOAD_CONNECTIONS))
+            
+            def show_progress(received, total):
+                print(f"\r   진행: {received * 100 / total:5.1f}%", end='', flush=True)
+            
+            started = time.monotonic()
+            with session, metrics.stage('download'):
+                ranged_download(
+                    session, audio_stream.url, temp_file, total_size,
+                    chunk_size=DOWNLOAD_CHUNK_SIZE,
+                    connections=DOWNLOAD_CONNECTIONS,
+                    on_progress=show_progress,
+                    checkpoint=checkpoint
+                )
+            elapsed = max(time.monotonic() - started, 0.001)
+            print(f" 완료! ({total_size / elapsed / (1024 * 1024):.2f} MB/s)")
+        else:
+            # 크기를 알 수 없으면 pytube 단일 연결 다운로드
+            print("   다운로드 진행 중...", end='', flush=True)
+            with metrics.stage('download'):
+                temp_file = audio_stream.download(
+                    output_path=TEMP_PATH,
+                    filename=temp_filename
+                )
+            metrics.add_bytes(os.path.getsize(temp_file))
+            print(" 완료!")
         
         # 파일 크기 확인
         file_size = os.path.getsize(temp_file)
@@ -330,6 +384,11 @@ def download_audio(url):
         
     except Exception as e:
         print(f"\n❌ 다운로드 실패: {e}\n")
+        if checkpoint is not None:
+            # 받은 범위는 체크포인트와 함께 남겨 두고 다음 실행에서 이어받음
+            print("   다시 실행하면 받은 부분부터 이어받습니다.\n")
+        elif temp_file and os.path.exists(temp_file):
+            os.remove(temp_file)
         return False
     
     # ========================================================================
@@ -342,15 +401,13 @@ def download_audio(url):
     try:
         print("   변환 진행 중...", end='', flush=True)
         
-        # pydub으로 오디오 파일 로드
-        audio = AudioSegment.from_file(temp_file)
-        
-        # FLAC 형식으로 내보내기
+        # ffmpeg 스트리밍 변환
+        # 입력을 조금씩 읽어 바로 인코딩하므로 긴 믹스도 메모리 사용량이 일정
         # FLAC는 무손실 압축이므로 품질 손실 없음
-        audio.export(
+        transcode_to_flac(
+            temp_file,
             output_file,
-            format="flac",
-            parameters=["-compression_level", "8"]  # 최대 압축 (품질은 유지)
+            compression_level=8  # 최대 압축 (품질은 유지)
         )
         
         print(" 완료!")
@@ -360,15 +417,21 @@ def download_audio(url):
         output_mb = output_size / (1024 * 1024)
         print(f"   FLAC 크기: {output_mb:.2f} MB\n")
         
+        # 라이브러리에 등록 (다음 요청 시 바로 반환)
+        with metrics.stage('write'):
+            library.record(yt.video_id, output_file, title)
+        
     except Exception as e:
         print(f"\n❌ FLAC 변환 실패: {e}\n")
         
-        # 임시 파일 삭제
+        # 임시 파일 삭제 (원본이 손상되었을 수 있으므로 체크포인트도 삭제)
         if temp_file and os.path.exists(temp_file):
             try:
                 os.remove(temp_file)
             except:
                 pass
+        if checkpoint is not None:
+            checkpoint.remove()
         
         return False
     
@@ -377,12 +440,16 @@ def download_audio(url):
     # ========================================================================
     
     # 임시 파일 삭제
-    if temp_file and os.path.exists(temp_file):
-        try:
-            os.remove(temp_file)
-            print("✅ 임시 파일 삭제 완료")
-        except Exception as e:
-            print(f"⚠️  임시 파일 삭제 실패: {e}")
+    with metrics.stage('cleanup'):
+        if temp_file and os.path.exists(temp_file):
+            try:
+                os.remove(temp_file)
+                print("✅ 임시 파일 삭제 완료")
+            except Exception as e:
+                print(f"⚠️  임시 파일 삭제 실패: {e}")
+        if checkpoint is not None:
+            checkpoint.remove()
+    metrics.job('ok')
     
     # 최종 결과 출력
     print_header("✅ 다운로드 완료!")
@@ -394,6 +461,46 @@ def download_audio(url):
     return True
 
 
+def stream_audio(yt, audio_stream, safe_title):
+    """
+    스트리밍 모드 다운로드 (YT_STREAMING=1)
+    
+    HTTP 응답 본문을 받는 즉시 ffmpeg stdin으로 넘겨 FLAC로 인코딩
+    원본 파일을 TEMP_PATH에 썼다가 다시 읽지 않으므로 마지막 바이트 직후 완료
+    
+    Args:
+        yt: pytube YouTube 객체
+        audio_stream: 선택된 오디오 스트림
+        safe_title (str): 파일명으로 쓸 제목
+        
+    Returns:
+        bool: 성공 여부
+    """
+    print_step(4, 4, "다운로드하면서 FLAC 변환 중 (임시 파일 없음)...")
+    
+    output_file = os.path.join(DOWNLOAD_PATH, f"{safe_title}.flac")
+    try:
+        print("   진행 중...", end='', flush=True)
+        stream_url_to_flac(audio_stream.url, output_file, compression_level=8)
+        print(" 완료!")
+    except Exception as e:
+        print(f"\n❌ 다운로드/변환 실패: {e}\n")
+        return False
+    
+    output_mb = os.path.getsize(output_file) / (1024 * 1024)
+    with metrics.stage('write'):
+        library.record(yt.video_id, output_file, yt.title)
+    metrics.job('ok')
+    
+    print_header("✅ 다운로드 완료!")
+    print(f"📝 파일명: {safe_title}.flac")
+    print(f"💾 크기: {output_mb:.2f} MB")
+    print(f"🎵 품질: FLAC 무손실")
+    print(f"📁 위치: {output_file}\n")
+    
+    return True
+
+
 # ============================================================================
 # 메인 프로그램
 # ============================================================================
@@ -406,7 +513,7 @@ def main():
     반복 다운로드 지원
     """
     print_header("🎵 YouTube 음원 다운로더 (FLAC)")
-    print("Pytube + PyDub 기반 - 안정적이고 빠른 다운로드")
+    print("Pytube + FFmpeg 기반 - 안정적이고 빠른 다운로드")
     
     while True:
         # URL 입력 받기
@@ -444,12 +551,15 @@ def main():
         success = download_audio(url)
         
         if not success:
+            metrics.job('failed')
             print("다시 시도하시겠습니까? (y/n): ", end='')
             retry = input().strip().lower()
             if retry != 'y':
                 break
         
         print("\n" + "-" * 70)
+    
+    metrics.print_summary()
 
 
 # ============================================================================
@@ -461,6 +571,7 @@ if __name__ == '__main__':
         main()
     except KeyboardInterrupt:
         print("\n\n프로그램을 종료합니다.\n")
+        metrics.print_summary()
         sys.exit(0)
     except Exception as e:
         print(f"\n❌ 예상치 못한 오류 발생: {e}\n")
@@ -4,23 +4,68 @@ YouTube 음원 다운로더 (FLAC) - 간소화 버전
 macOS 호환
 """
 
-from flask import Flask, request, jsonify
-import yt_dlp
+from flask import Flask, Response, request, jsonify
 import os
 from pathlib import Path
 import threading
+import time
 import sys
 
+# 공용 모듈(저장소 루트의 yt_common 패키지) 사용을 위해 루트 경로 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from yt_common.info_cache import InfoCache, extract_info_once, is_stale_url_error
+from yt_common.lazy import lazy_import, warm_up
+from yt_common.library import LibraryIndex
+from yt_common.metrics import PROMETHEUS_CONTENT_TYPE, YtDlpTimer, metrics
+from yt_common.profiling import profiler
+from yt_common.progress import LogBuffer, ProgressAggregator, status_payload, status_stream
+from yt_common.ratelimit import RateLimiter, is_rate_limit_error
+from yt_common.strategy import StrategyStats
+from yt_common.streaming import fetch_flac
+from yt_common.urls import canonical_video_id
+
+# yt-dlp는 import가 무거우므로 서버가 뜬 뒤 백그라운드에서 불러옴 (처음 사용 시 import)
+yt_dlp = lazy_import('yt_dlp')
+
 app = Flask(__name__)
 
+# 보관할 최대 로그 줄 수 (초과 시 오래된 로그부터 버림)
+LOG_CAPACITY = 1000
+
+# 스트리밍 모드 (YT_STREAMING=1): 받는 즉시 ffmpeg로 FLAC 변환, 원본 파일을 디스크에 쓰지 않음
+STREAMING = os.environ.get('YT_STREAMING') == '1'
+
+
 # 다운로드 상태
-status = {'state': 'ready', 'message': '대기 중', 'logs': []}
+# run: 다운로드 회차, run_start: 이번 회차 첫 로그의 순번
+status = {'state': 'ready', 'message': '대기 중', 'logs': LogBuffer(LOG_CAPACITY), 'run': 0, 'run_start': 0}
 status_lock = threading.Lock()
 
+# 상태 변경 알림 (SSE 스트림이 새 이벤트를 기다림)
+status_changed = threading.Condition(status_lock)
+
 # 다운로드 경로
 DOWNLOAD_PATH = str(Path.home() / "Downloads" / "YouTube_Audio")
 os.makedirs(DOWNLOAD_PATH, exist_ok=True)
 
+# 동영상 정보 디스크 캐시 (재시도/폴백 시 재추출 방지)
+info_cache = InfoCache()
+
+# 다운로드 완료 파일 인덱스 (이미 받은 동영상은 다시 받지 않음)
+library = LibraryIndex()
+
+# YouTube player_client 조합 (성공률 높은 순서로 시도, /strategies에서 확인)
+PLAYER_CLIENTS = {
+    'ios': ['ios', 'web'],          # iOS 클라이언트 우선 시도
+    'android': ['android', 'web'],
+    'web': ['web'],
+}
+strategies = StrategyStats()
+STRATEGY_SCOPE = 'simple.player_client'
+
+# 정보 추출/다운로드 요청 스케줄러 (429 감지 시 백오프 후 천천히 회복)
+rate_limiter = RateLimiter()
+
 
 def log(msg):
     """로그 추가"""
@@ -28,6 +73,7 @@ def log(msg):
     with status_lock:
         status['logs'].append(msg)
         status['message'] = msg
+        status_changed.notify_all()
 
 
 def set_status(state, msg):
@@ -36,11 +82,18 @@ def set_status(state, msg):
         status['state'] = state
         status['message'] = msg
         status['logs'].append(msg)
+        status_changed.notify_all()
     print(f"[STATUS] {state}: {msg}", flush=True)
 
 
+# 현재 다운로드의 진행 상황 집계기 (download_task 시작 시 새로 생성)
+progress_aggregator = ProgressAggregator()
+
+
 def progress_hook(d):
-    """다운로드 진행 상황"""
+    """다운로드 진행 상황 (초당 PROGRESS_MAX_RATE회로 제한)"""
+    if not progress_aggregator.sample(d):
+        return
     if d['status'] == 'downloading':
         percent = d.get('_percent_str', 'N/A').strip()
         set_status('downloading', f"다운로드 중 {percent}")
@@ -48,56 +101,122 @@ def progress_hook(d):
         set_status('converting', "FLAC 변환 중...")
 
 
+@profiler.wrap
 def download_task(url):
-    """다운로드 실행"""
-    try:
-        # URL 정리 (플레이리스트 제거)
+    """
+    다운로드 실행
+    - player_client 조합은 최근 성공률이 높은 순서로 시도 (STRATEGY_SCOPE 기록)
+    - 한 조합이 실패하면 캐시된 정보를 버리고 다음 조합으로 다시 추출
+    """
+    global progress_aggregator
+    
+    # URL 정리 (플레이리스트 제거)
+    with metrics.stage('normalize'):
         if '&list=' in url:
             url = url.split('&list=')[0]
             log("플레이리스트 파라미터 제거됨")
-        
-        log(f"URL: {url}")
-        set_status('downloading', '준비 중...')
+        video_id = canonical_video_id(url)
+    
+    log(f"URL: {url}")
+    
+    # 이미 받은 동영상이면 기존 파일 반환 (다운로드/변환 생략)
+    existing = library.lookup(video_id)
+    if existing:
+        metrics.job('skipped')
+        set_status('complete', f"완료: {os.path.basename(existing['path'])} (이미 다운로드됨)")
+        log(f"저장 위치: {existing['path']}")
+        return
+    
+    set_status('downloading', '준비 중...')
+    
+    order = strategies.order(STRATEGY_SCOPE, list(PLAYER_CLIENTS))
+    for index, name in enumerate(order):
+        progress_aggregator = ProgressAggregator()
+        started = time.monotonic()
+        timer = YtDlpTimer()
+        if index:
+            metrics.fallback(STRATEGY_SCOPE, name)
         
         opts = {
             'format': 'bestaudio/best',
             'outtmpl': os.path.join(DOWNLOAD_PATH, '%(title)s.%(ext)s'),
             'postprocessors': [{'key': 'FFmpegExtractAudio', 'preferredcodec': 'flac'}],
-            'progress_hooks': [progress_hook],
+            'progress_hooks': [progress_hook, timer.hook],
             'noplaylist': True,
             'quiet': True,
             
             # YouTube 403 우회 설정
             'extractor_args': {
                 'youtube': {
-                    'player_client': ['ios', 'web'],  # iOS 클라이언트 우선 시도
+                    'player_client': PLAYER_CLIENTS[name],
                 }
             },
             'cookiesfrombrowser': None,  # 브라우저 쿠키 사용 안함
             'nocheckcertificate': True,  # SSL 인증서 검증 생략
         }
         
-        with yt_dlp.YoutubeDL(opts) as ydl:
-            info = ydl.extract_info(url, download=False)
-            title = info.get('title', 'Unknown')
-            log(f"제목: {title}")
-            log("다운로드 시작...")
-            ydl.download([url])
+        # 캐시된 정보는 다른 player_client(또는 캐시를 공유하는 다른 앱)가 추출했을 수 있으므로
+        # 이 클라이언트의 성공률/소요 시간에 기록하지 않음
+        cache_hit = False
+        try:
+            log(f"player_client: {', '.join(PLAYER_CLIENTS[name])}")
+            with yt_dlp.YoutubeDL(opts) as ydl:
+                info, extract_seconds, cache_hit = extract_info_once(ydl, url, cache=info_cache, rate_limiter=rate_limiter)
+                title = info.get('title', 'Unknown')
+                log(f"제목: {title}")
+                if cache_hit:
+                    log("캐시된 동영상 정보 사용 (추출 생략)")
+                else:
+                    log(f"정보 추출 {extract_seconds:.2f}초 (재추출 생략으로 절약)")
+                log("다운로드 시작...")
+                filepath = fetch_flac(
+                    ydl, info, timer, DOWNLOAD_PATH, STREAMING, [progress_hook], rate_limiter, log
+                )
+        except Exception as e:
+            error = str(e)
+            print(f"[ERROR] {error}", flush=True)
+            
+            # 캐시된 스트림 URL이 만료되었을 수 있으므로 캐시 무효화
+            if is_stale_url_error(error):
+                info_cache.delete(video_id)
+            
+            # Rate Limit은 player_client 탓이 아니므로 성공률에 기록하지 않고 요청 속도를 낮춤
+            if is_rate_limit_error(error):
+                backoff = rate_limiter.penalize()
+                metrics.job('failed')
+                set_status('error', f'YouTube 제한: 요청 속도를 낮췄습니다 ({backoff:.0f}초 후 다시 시도 가능)')
+                return
+            if 'unavailable' in error.lower():
+                metrics.job('failed')
+                set_status('error', '동영상 사용 불가: URL 확인 필요')
+                return
+            
+            if not cache_hit:
+                strategies.record(STRATEGY_SCOPE, name, False, time.monotonic() - started)
+            if index + 1 < len(order):
+                # 다른 클라이언트로 다시 추출해야 하므로 캐시된 정보 삭제
+                info_cache.delete(video_id)
+                metrics.retry('player_client')
+                log(f"{name} 클라이언트 실패 → {order[index + 1]} 클라이언트로 재시도")
+                continue
+            
+            metrics.job('failed')
+            if '403' in error or 'Forbidden' in error:
+                set_status('error', 'YouTube 접근 거부: 네트워크 변경 또는 나중에 재시도')
+            else:
+                set_status('error', f'오류: {error[:150]}')
+            return
+        
+        if not cache_hit:
+            strategies.record(STRATEGY_SCOPE, name, True, time.monotonic() - started)
+        rate_limiter.success()
+        with metrics.stage('write'):
+            library.record(info.get('id') or video_id, filepath, title)
+        metrics.job('ok')
         
         set_status('complete', f'완료: {title}.flac')
-        log(f"저장됨: {DOWNLOAD_PATH}/{title}.flac")
-        
-    except Exception as e:
-        error = str(e)
-        if 'rate-limited' in error.lower():
-            set_status('error', 'YouTube 제한: 1시간 후 재시도 필요')
-        elif '403' in error or 'Forbidden' in error:
-            set_status('error', 'YouTube 접근 거부: 네트워크 변경 또는 나중에 재시도')
-        elif 'unavailable' in error.lower():
-            set_status('error', '동영상 사용 불가: URL 확인 필요')
-        else:
-            set_status('error', f'오류: {error[:150]}')
-        print(f"[ERROR] {error}", flush=True)
+        log(f"저장됨: {filepath}")
+        return
 
 
 @app.route('/')
@@ -175,7 +294,7 @@ def index():
     </div>
     
     <script>
-        let interval;
+        let eventSource = null;
         
         function download() {{
             const url = document.getElementById('url').value.trim();
@@ -197,28 +316,36 @@ def index():
                 method: 'POST',
                 headers: {{'Content-Type': 'application/json'}},
                 body: JSON.stringify({{url: url}})
-            }});
-            
-            interval = setInterval(checkStatus, 500);
+            }}).then(() => watchStatus());
         }}
         
-        function checkStatus() {{
-            fetch('/status')
-                .then(r => r.json())
-                .then(data => {{
-                    const statusDiv = document.getElementById('status');
-                    statusDiv.textContent = data.message;
-                    statusDiv.className = 'status ' + data.state;
-                    
-                    const log = document.getElementById('log');
-                    log.textContent = data.logs.join('\\n');
-                    log.scrollTop = log.scrollHeight;
-                    
-                    if (data.state === 'complete' || data.state === 'error') {{
-                        clearInterval(interval);
-                        document.querySelector('button').disabled = false;
-                    }}
+        function watchStatus() {{
+            if (eventSource) {{
+                eventSource.close();
+            }}
+            // 서버 푸시 구독 (새 로그와 상태 변경만 수신)
+            eventSource = new EventSource('/events');
+            eventSource.addEventListener('update', event => {{
+                const data = JSON.parse(event.data);
+                const statusDiv = document.getElementById('status');
+                statusDiv.textContent = data.message;
+                statusDiv.className = 'status ' + data.state;
+                
+                const log = document.getElementById('log');
+                if (data.reset) {{
+                    log.textContent = '';
+                }}
+                data.logs.forEach(line => {{
+                    log.textContent += line + '\\n';
                 }});
+                log.scrollTop = log.scrollHeight;
+                
+                if (data.state === 'complete' || data.state === 'error') {{
+                    eventSource.close();
+                    eventSource = null;
+                    document.querySelector('button').disabled = false;
+                }}
+            }});
         }}
     </script>
 </body>
@@ -235,7 +362,10 @@ def download():
     with status_lock:
         status['state'] = 'downloading'
         status['message'] = '시작...'
-        status['logs'] = ['다운로드 요청']
+        status['run'] += 1  # 새 다운로드 - SSE 클라이언트 로그 초기화
+        status['run_start'] = status['logs'].next_seq
+        status['logs'].append('다운로드 요청')
+        status_changed.notify_all()
     
     thread = threading.Thread(target=download_task, args=(url,), daemon=True)
     thread.start()
@@ -243,11 +373,38 @@ def download():
     return jsonify({'status': 'started'})
 
 
+@app.route('/strategies')
+def get_strategies():
+    """player_client 조합별 성공률/소요 시간과 요청 스케줄러 상태"""
+    return jsonify({
+        'strategies': strategies.stats(STRATEGY_SCOPE),
+        'rate_limiter': rate_limiter.stats(),
+    })
+
+
+@app.route('/metrics')
+def get_metrics():
+    """단계별 소요 시간, 받은 바이트, 재시도/폴백/오류 수 (Prometheus 텍스트 형식)"""
+    return Response(metrics.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
 @app.route('/status')
 def get_status():
-    """상태 확인"""
-    with status_lock:
-        return jsonify(status.copy())
+    """
+    상태 확인
+    - /status?since=<seq> : 해당 순번 이후의 로그만 반환 (기본값: 이번 다운로드의 처음부터)
+    """
+    return jsonify(status_payload(status, status_lock, request.args.get('since', type=int)))
+
+
+@app.route('/events')
+def events():
+    """상태 푸시 스트림 (SSE) - 새 로그와 상태 변경만 전송"""
+    return Response(
+        status_stream(status, status_changed),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 
 if __name__ == '__main__':
@@ -256,10 +413,16 @@ if __name__ == '__main__':
     print("=" * 60)
     print(f"\\n저장 위치: {DOWNLOAD_PATH}")
     print("\\n브라우저에서 열기: http://127.0.0.1:5000")
+    print("지표 (Prometheus): http://127.0.0.1:5000/metrics")
+    if profiler.enabled:
+        print(f"작업별 프로파일링: {profiler.describe()} (YT_PROFILE 환경변수로 변경)")
     print("종료: Ctrl+C\\n")
     print("=" * 60)
     
     import webbrowser
     threading.Timer(1.5, lambda: webbrowser.open('http://127.0.0.1:5000')).start()
     
+    # 서버가 요청을 받는 동안 yt-dlp를 백그라운드에서 미리 import
+    warm_up(yt_dlp)
+    
     app.run(host='127.0.0.1', port=5000, debug=False, threaded=True, use_reloader=False)
\ No newline at end of file
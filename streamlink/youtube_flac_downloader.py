@@ -6,8 +6,8 @@ Y2mate와 유사한 방식으로 동작
 
 작동 원리:
 1. YouTube URL에서 동영상 정보 추출
-2. streamlink로 직접 스트림 URL 획득
-3. ffmpeg로 오디오만 추출하여 FLAC 변환
+2. streamlink 세션(프로세스 내부)으로 오디오 전용 스트림 선택
+3. 스트림 데이터를 ffmpeg로 넘겨 FLAC 변환
 4. 모든 작업을 로컬에서 처리
 
 이 방법은 YouTube의 봇 탐지를 우회합니다.
@@ -20,6 +20,19 @@ import re
 from pathlib import Path
 from urllib.parse import urlparse, parse_qs
 
+# 공용 모듈(저장소 루트의 yt_common 패키지) 경로 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from yt_common.backends import StreamlinkBackend
+from yt_common.checkpoint import DownloadCheckpoint
+from yt_common.library import LibraryIndex
+from yt_common.metrics import metrics
+from yt_common.probe import probe_ffmpeg, probe_module
+from yt_common.profiling import profiler
+from yt_common.ranged import RangeNotSupported, probe_size, ranged_download
+from yt_common.streaming import stream_to_flac
+from yt_common.transcode import transcode_to_flac
+from yt_common.urls import canonical_video_id
+
 
 # ============================================================================
 # 설정 및 전역 변수
@@ -27,7 +40,18 @@ from urllib.parse import urlparse, parse_qs
 
 # 다운로드 경로 설정
 DOWNLOAD_PATH = str(Path.home() / "Downloads" / "YouTube_Audio")
+TEMP_PATH = str(Path.home() / "Downloads" / "YouTube_Audio_Temp")
 os.makedirs(DOWNLOAD_PATH, exist_ok=True)
+os.makedirs(TEMP_PATH, exist_ok=True)
+
+# 이어받기 체크포인트 조각 크기 (완료된 조각 단위로 기록)
+DOWNLOAD_CHUNK_SIZE = 2 * 1024 * 1024
+
+# streamlink 세션/스트림 선택/조각 읽기 (백엔드 공용 구현, 세션은 처음 사용할 때 생성)
+streamlink_backend = StreamlinkBackend()
+
+# 다운로드 완료 파일 인덱스 (이미 받은 동영상은 다시 받지 않음)
+library = LibraryIndex()
 
 
 # ============================================================================
@@ -90,61 +114,21 @@ def check_dependencies():
     """
     필수 프로그램 설치 확인
     
-    streamlink는 명령줄 도구와 Python 모듈 두 가지 방법으로 확인
-    1. 명령줄: streamlink --version
-    2. Python 모듈: python3 -m streamlink --version
+    확인 결과는 실행 파일 경로/수정 시각 기준으로 캐시되므로
+    ffmpeg나 streamlink가 바뀌지 않았다면 프로세스를 띄우지 않음
     
     Returns:
-        tuple: (streamlink 설치 여부, ffmpeg 설치 여부, streamlink 실행 방법)
-        streamlink 실행 방법: 'command' 또는 'module'
+        tuple: (streamlink 설치 여부, ffmpeg 설치 여부, streamlink 버전)
+               ffmpeg 설치 여부는 FLAC 인코더 지원까지 포함
     """
-    streamlink_installed = False
-    streamlink_method = None
-    ffmpeg_installed = False
+    streamlink_info = probe_module('streamlink')
+    ffmpeg_info = probe_ffmpeg()
     
-    # streamlink 확인 - 방법 1: 명령줄 도구
-    try:
-        result = subprocess.run(
-            ['streamlink', '--version'],
-            capture_output=True,
-            text=True,
-            check=True,
-            timeout=5
-        )
-        streamlink_installed = True
-        streamlink_method = 'command'
-    except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
-        pass
-    
-    # streamlink 확인 - 방법 2: Python 모듈
-    if not streamlink_installed:
-        try:
-            result = subprocess.run(
-                [sys.executable, '-m', 'streamlink', '--version'],
-                capture_output=True,
-                text=True,
-                check=True,
-                timeout=5
-            )
-            streamlink_installed = True
-            streamlink_method = 'module'
-        except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
-            pass
-    
-    # ffmpeg 확인
-    try:
-        result = subprocess.run(
-            ['ffmpeg', '-version'],
-            capture_output=True,
-            text=True,
-            check=True,
-            timeout=5
-        )
-        ffmpeg_installed = True
-    except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
-        pass
+    streamlink_installed = streamlink_info is not None
+    ffmpeg_installed = bool(ffmpeg_info and ffmpeg_info['flac_encoder'])
+    streamlink_version = streamlink_info['version'] if streamlink_info else None
     
-    return streamlink_installed, ffmpeg_installed, streamlink_method
+    return streamlink_installed, ffmpeg_installed, streamlink_version
 
 
 def install_streamlink():
@@ -161,6 +145,9 @@ def install_streamlink():
             check=True
         )
         print("✅ streamlink 설치 완료\n")
+        # 새로 설치한 모듈을 찾을 수 있도록 import 경로 캐시 초기화
+        import importlib
+        importlib.invalidate_caches()
         return True
     except subprocess.CalledProcessError:
         print("❌ streamlink 설치 실패\n")
@@ -171,14 +158,75 @@ def install_streamlink():
 # 메인 다운로드 함수
 # ============================================================================
 
+def download_resumable(stream, video_id, temp_file):
+    """
+    HTTP 스트림을 이어받기 가능하게 다운로드
+    
+    완료된 바이트 범위를 사이드카 체크포인트에 기록하므로 Ctrl+C나 네트워크 끊김 후
+    다시 실행하면 남은 범위만 받음 (긴 믹스도 처음부터 다시 받지 않음)
+    
+    Args:
+        stream (dict): HTTP 스트림 정보 (stream.__json__() - type, url, headers)
+        video_id (str): 동영상 ID
+        temp_file (str): 원본을 저장할 임시 파일
+        
+    Returns:
+        DownloadCheckpoint: 완료된 다운로드의 체크포인트 (Range를 지원하지 않으면 None)
+        
+    Raises:
+        다운로드 중 오류/중단 - 이어받을 수 있으면 예외의 resumable 속성이 True
+    """
+    import requests
+    
+    itag = parse_qs(urlparse(stream['url']).query).get('itag', ['best'])[0]
+    
+    with requests.Session() as session:
+        session.headers.update(stream.get('headers') or {})
+        total_size = probe_size(session, stream['url'])
+        if not total_size:
+            return None
+        
+        checkpoint = DownloadCheckpoint.open(
+            temp_file, f"{video_id}:{itag}", stream['url'], total_size, DOWNLOAD_CHUNK_SIZE
+        )
+        if checkpoint.resumed:
+            remaining_mb = sum(end - start + 1 for start, end in checkpoint.missing()) / (1024 * 1024)
+            print(f"↻ 중단된 다운로드 이어받기 (남은 크기: {remaining_mb:.2f} MB)")
+        
+        def show_progress(received, total):
+            print(f"\r   다운로드: {received * 100 / total:5.1f}%", end='', flush=True)
+        
+        try:
+            with metrics.stage('download'):
+                ranged_download(
+                    session, stream['url'], temp_file, total_size,
+                    chunk_size=DOWNLOAD_CHUNK_SIZE, on_progress=show_progress, checkpoint=checkpoint
+                )
+        except RangeNotSupported:
+            # 서버가 Range를 무시하면 받은 범위를 이어받을 수 없으므로 임시 파일도 정리
+            with metrics.stage('cleanup'):
+                if os.path.exists(temp_file):
+                    os.remove(temp_file)
+                checkpoint.remove()
+            raise
+        except BaseException as e:
+            # Range(206) 응답으로 받은 범위가 체크포인트에 남았으므로 다음 실행에서 이어받기 가능
+            e.resumable = True
+            raise
+        print()
+    
+    return checkpoint
+
+
+@profiler.wrap
 def download_audio(url):
     """
     YouTube 오디오 다운로드 메인 함수
     
     작동 순서:
     1. URL에서 동영상 ID 추출
-    2. streamlink로 스트림 URL 획득 (YouTube 봇 탐지 우회)
-    3. ffmpeg로 오디오 추출 및 FLAC 변환
+    2. streamlink 세션(프로세스 내부)으로 스트림 목록 획득 (YouTube 봇 탐지 우회)
+    3. 오디오 전용 스트림을 ffmpeg로 FLAC 변환
     4. 파일 저장
     
     Args:
@@ -191,15 +239,25 @@ def download_audio(url):
     print(f"📁 저장 위치: {DOWNLOAD_PATH}")
     print(f"🔗 URL: {url}\n")
     
+    # 이미 받은 동영상이면 기존 파일 반환 (다운로드/변환 생략)
+    with metrics.stage('normalize'):
+        video_id = canonical_video_id(url)
+    existing = library.lookup(video_id)
+    if existing:
+        metrics.job('skipped')
+        print_header("✅ 이미 다운로드한 동영상입니다")
+        print(f"📁 위치: {existing['path']}\n")
+        return True
+    
     # ========================================================================
     # 1단계: 의존성 확인
     # ========================================================================
     print_step(1, "필수 프로그램 확인 중...")
     
-    streamlink_ok, ffmpeg_ok, streamlink_method = check_dependencies()
+    streamlink_ok, ffmpeg_ok, streamlink_version = check_dependencies()
     
     if not ffmpeg_ok:
-        print("\n❌ FFmpeg가 설치되지 않았습니다.")
+        print("\n❌ FFmpeg가 설치되지 않았거나 FLAC 인코더를 지원하지 않습니다.")
         print("\n설치 방법:")
         print("  brew install ffmpeg\n")
         return False
@@ -211,56 +269,44 @@ def download_audio(url):
             print("  pip3 install streamlink\n")
             return False
         # 설치 후 다시 확인
-        streamlink_ok, _, streamlink_method = check_dependencies()
+        streamlink_ok, _, streamlink_version = check_dependencies()
         if not streamlink_ok:
-            print("❌ streamlink 설치 후에도 실행할 수 없습니다.\n")
+            print("❌ streamlink 설치 후에도 불러올 수 없습니다.\n")
             return False
     
-    print(f"✅ 모든 필수 프로그램 확인 완료 (streamlink: {streamlink_method} 방식)\n")
-    
-    # streamlink 명령어 구성
-    # 'command' 방식: streamlink 직접 실행
-    # 'module' 방식: python3 -m streamlink 실행
-    if streamlink_method == 'command':
-        streamlink_cmd = ['streamlink']
-    else:
-        streamlink_cmd = [sys.executable, '-m', 'streamlink']
+    print(f"✅ 모든 필수 프로그램 확인 완료 (streamlink {streamlink_version})\n")
     
     # ========================================================================
     # 2단계: 동영상 정보 가져오기
     # ========================================================================
     print_step(2, "동영상 정보 가져오는 중...")
     
-    # streamlink로 스트림 정보 획득
-    # -j 옵션: JSON 형식으로 출력
-    # --stream-url: 실제 스트림 URL만 출력
+    # streamlink 세션으로 플러그인을 찾아 스트림 목록과 제목을 한 번에 획득
+    # (--json 실행 + 다운로드 실행으로 두 번 띄우던 streamlink 프로세스 없음)
+    from streamlink.exceptions import NoPluginError, PluginError
+    
     try:
-        # 먼저 사용 가능한 품질 목록 확인
-        result = subprocess.run(
-            streamlink_cmd + ['--json', url],
-            capture_output=True,
-            text=True,
-            check=True,
-            timeout=30
-        )
+        plugin, streams = streamlink_backend.resolve(url)
+        
+        if not streams:
+            print("❌ 재생 가능한 스트림을 찾을 수 없습니다.")
+            print("해결책: URL을 확인하거나 다른 동영상을 시도하세요.\n")
+            return False
         
-        # JSON 파싱하여 제목 추출
-        import json
-        info = json.loads(result.stdout)
-        title = info.get('metadata', {}).get('title', 'Unknown')
+        title = plugin.get_title() or 'Unknown'
         
         # 파일명에 사용할 수 없는 문자 제거
         safe_title = re.sub(r'[<>:"/\\|?*]', '', title)
         
         print(f"✅ 제목: {title}\n")
         
-    except subprocess.CalledProcessError as e:
+    except NoPluginError:
+        print("❌ streamlink가 이 URL을 처리할 수 없습니다.\n")
+        return False
+    except PluginError as e:
         print(f"❌ 동영상 정보를 가져올 수 없습니다.")
         print(f"오류: {e}\n")
         return False
-    except subprocess.TimeoutExpired:
-        print("❌ 시간 초과: 네트워크 연결을 확인하세요.\n")
-        return False
     except Exception as e:
         print(f"❌ 예상치 못한 오류: {e}\n")
         return False
@@ -270,44 +316,61 @@ def download_audio(url):
     # ========================================================================
     print_step(3, "오디오 다운로드 및 FLAC 변환 중...")
     
+    stream_name, stream = streamlink_backend.select_audio_stream(streams)
+    print(f"선택된 스트림: {stream_name}")
+    
     # 출력 파일 경로
     output_file = os.path.join(DOWNLOAD_PATH, f"{safe_title}.flac")
     
-    # streamlink + ffmpeg를 파이프로 연결하여 직접 변환
-    # 이 방법은 중간 파일 생성 없이 바로 FLAC로 변환
-    try:
-        # streamlink 명령어 구성
-        if streamlink_method == 'command':
-            streamlink_part = f'streamlink "{url}" best -O'
-        else:
-            streamlink_part = f'{sys.executable} -m streamlink "{url}" best -O'
-        
-        # 전체 명령어: streamlink → ffmpeg 파이프
-        command = f'{streamlink_part} | ffmpeg -i pipe:0 -vn -acodec flac "{output_file}" -y'
-        
-        print(f"실행: {streamlink_method} 방식으로 다운로드 중...\n")
-        
-        # shell=True로 파이프 명령 실행
-        result = subprocess.run(
-            command,
-            shell=True,
-            check=True,
-            stderr=subprocess.PIPE,
-            text=True
-        )
+    # HTTP 스트림이면 이어받기 가능한 방식으로 원본을 받은 뒤 변환
+    stream_info = stream.__json__()
+    if stream_info.get('type') == 'http' and stream_info.get('url'):
+        video_id = canonical_video_id(url) or extract_video_id(url)
+        temp_file = os.path.join(TEMP_PATH, f"{safe_title}_temp")
+        try:
+            checkpoint = download_resumable(stream_info, video_id, temp_file)
+        except KeyboardInterrupt as e:
+            # 받은 범위는 체크포인트와 함께 남겨 두고 다음 실행에서 이어받음
+            if getattr(e, 'resumable', False):
+                print("\n\n⚠️  사용자가 중단했습니다. 다시 실행하면 받은 부분부터 이어받습니다.\n")
+            else:
+                print("\n\n⚠️  사용자가 중단했습니다.\n")
+            return False
+        except Exception as e:
+            print(f"\n❌ 다운로드 실패: {e}")
+            if getattr(e, 'resumable', False):
+                print("다시 실행하면 받은 부분부터 이어받습니다.\n")
+            else:
+                print()
+            return False
         
+        if checkpoint is not None:
+            try:
+                transcode_to_flac(temp_file, output_file)
+            except Exception as e:
+                print(f"❌ FLAC 변환 실패: {e}\n")
+                return False
+            finally:
+                with metrics.stage('cleanup'):
+                    os.remove(temp_file)
+                    checkpoint.remove()
+            print("✅ 변환 완료\n")
+            return finish_download(url, output_file, safe_title, title)
+    
+    # 그 외(HLS, 비디오+오디오 결합 스트림 등): 스트림 데이터를 ffmpeg stdin 파이프로 바로 전달
+    # 중간 파일 없이 FLAC로 변환하며, ffmpeg가 느리면 스트림 읽기도 기다림
+    try:
+        print("스트림을 ffmpeg로 전달하며 변환 중...\n")
+        stream_to_flac(streamlink_backend.stream_chunks(stream), output_file)
         print("✅ 변환 완료\n")
         
-    except subprocess.CalledProcessError as e:
+    except Exception as e:
         print(f"❌ 다운로드 실패")
         
         # 에러 메시지에서 유용한 정보 추출
-        error_output = e.stderr if e.stderr else str(e)
+        error_output = str(e)
         
-        if 'No playable streams found' in error_output:
-            print("오류: 재생 가능한 스트림을 찾을 수 없습니다.")
-            print("해결책: URL을 확인하거나 다른 동영상을 시도하세요.\n")
-        elif '403' in error_output or 'Forbidden' in error_output:
+        if '403' in error_output or 'Forbidden' in error_output:
             print("오류: YouTube 접근이 차단되었습니다.")
             print("해결책: 몇 분 후 다시 시도하세요.\n")
         else:
@@ -317,14 +380,24 @@ def download_audio(url):
         
     except KeyboardInterrupt:
         print("\n\n⚠️  사용자가 중단했습니다.\n")
-        # 불완전한 파일 삭제
-        if os.path.exists(output_file):
-            os.remove(output_file)
         return False
     
-    # ========================================================================
-    # 4단계: 완료
-    # ========================================================================
+    return finish_download(url, output_file, safe_title, title)
+
+
+def finish_download(url, output_file, safe_title, title):
+    """
+    4단계: 결과 확인 및 라이브러리 등록
+    
+    Args:
+        url (str): YouTube URL
+        output_file (str): 저장된 FLAC 경로
+        safe_title (str): 파일명으로 쓴 제목
+        title (str): 동영상 제목
+        
+    Returns:
+        bool: 성공 여부
+    """
     print_step(4, "다운로드 완료!")
     
     # 파일 크기 확인
@@ -332,6 +405,11 @@ def download_audio(url):
         file_size = os.path.getsize(output_file)
         size_mb = file_size / (1024 * 1024)
         
+        # 라이브러리에 등록 (다음 요청 시 바로 반환)
+        with metrics.stage('write'):
+            library.record(canonical_video_id(url), output_file, title)
+        metrics.job('ok')
+        
         print_header("✅ 성공!")
         print(f"📝 파일명: {safe_title}.flac")
         print(f"💾 크기: {size_mb:.2f} MB")
@@ -389,6 +467,9 @@ def main():
     
     # 다운로드 실행
     success = download_audio(url)
+    if not success:
+        metrics.job('failed')
+    metrics.print_summary()
     
     if success:
         print("\n다른 동영상을 다운로드하려면 프로그램을 다시 실행하세요:")
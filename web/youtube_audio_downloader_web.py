@@ -5,59 +5,210 @@ YouTube 음원 다운로더 (FLAC 고음질) - 웹 버전
 - 디버그 로그 추가
 """
 
-from flask import Flask, render_template_string, request, jsonify
-import yt_dlp
+from flask import Flask, Response, render_template_string, request, jsonify
 import os
+import json
 from pathlib import Path
+from collections import OrderedDict
 import threading
 import time
+import uuid
 import sys
 
+# 공용 모듈(저장소 루트의 yt_common 패키지) 사용을 위해 루트 경로 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from yt_common.info_cache import InfoCache, extract_info_once, is_stale_url_error
+from yt_common.lazy import lazy_import, warm_up
+from yt_common.library import LibraryIndex, final_filepath
+from yt_common.metrics import PROMETHEUS_CONTENT_TYPE, YtDlpTimer, metrics
+from yt_common.progress import SSE_KEEPALIVE, LogBuffer, ProgressAggregator, sse_event
+from yt_common.urls import canonical_video_id, playlist_entry_url, playlist_listing_url
+from yt_common.async_engine import AsyncEngine, download_flac, run_blocking
+from yt_common.pipeline import DownloadEncodePipeline
+from yt_common.profiling import profiler
+from yt_common.ratelimit import RateLimiter, is_rate_limit_error
+from yt_common.transcode import transcode_to_flac
+
+# yt-dlp는 import가 무거우므로 서버가 뜬 뒤 백그라운드에서 불러옴 (처음 사용 시 import)
+yt_dlp = lazy_import('yt_dlp')
+
 # Flask 앱 생성
 app = Flask(__name__)
 
-# 전역 변수로 다운로드 상태 관리
-download_status = {
-    'status': 'ready',  # ready, downloading, converting, complete, error
-    'message': 'YouTube URL을 입력하고 다운로드 버튼을 클릭하세요.',
-    'progress': 0,
-    'filename': '',
-    'filepath': '',
-    'logs': []  # 로그 메시지 배열
-}
+# 동시에 실행할 최대 다운로드 수 (워커 풀 크기)
+MAX_WORKERS = int(os.environ.get('YT_MAX_WORKERS', '4'))
+
+# 메모리에 보관할 최대 작업 수 (초과 시 오래된 완료 작업부터 제거)
+MAX_JOBS = 200
+
+# 작업당 보관할 최대 로그 줄 수 (초과 시 오래된 로그부터 버림)
+LOG_CAPACITY = 500
+
+# 메모리에 보관할 최대 플레이리스트 수 (초과 시 오래된 완료 플레이리스트부터 제거)
+MAX_PLAYLISTS = 50
+
+# 작업 목록: job_id -> 작업 상태 dict (등록 순서 유지)
+jobs = OrderedDict()
+
+# 플레이리스트 목록: playlist_id -> 플레이리스트 상태 dict
+playlists = OrderedDict()
+
+# 가장 최근에 등록된 작업 ID (/status 호환용)
+latest_job_id = None
 
 # 상태 업데이트를 위한 락 (thread-safe)
 status_lock = threading.Lock()
 
+# 상태 변경 알림 (SSE 스트림이 새 이벤트를 기다림)
+status_changed = threading.Condition(status_lock)
+
+# FLAC 변환 동시 실행 수 (기본: CPU 코어 수)
+ENCODE_WORKERS = int(os.environ.get('YT_ENCODE_WORKERS', str(os.cpu_count() or 2)))
+
+# 다운로드 엔진 선택 (YT_ENGINE 환경변수)
+# - thread: 작업마다 워커 스레드 하나 (기본값, yt-dlp 후처리 사용)
+# - async: 이벤트 루프 하나에서 ffmpeg 프로세스를 비동기로 관리 (수백 개 동시 작업용)
+ENGINE = os.environ.get('YT_ENGINE', 'thread')
+
+# asyncio 엔진의 최대 동시 작업 수
+ASYNC_MAX_JOBS = int(os.environ.get('YT_ASYNC_JOBS', '64'))
+
+engine = AsyncEngine(max_jobs=ASYNC_MAX_JOBS) if ENGINE == 'async' else None
+
+# 정보 추출/다운로드 요청 스케줄러 (모든 작업이 공유하는 토큰 버킷)
+# 평소에는 초당 YT_REQUEST_RATE개까지 대기 없이 보내고, 429가 오면 백오프 후 천천히 회복
+rate_limiter = RateLimiter(rate=float(os.environ.get('YT_REQUEST_RATE', '2')))
+
+# Rate Limit 감지 시 같은 작업을 다시 시도하는 횟수 (스케줄러 백오프 후 재시도)
+RATE_LIMIT_RETRIES = 3
+
 # 기본 다운로드 경로
 DOWNLOAD_PATH = str(Path.home() / "Downloads" / "YouTube_Audio")
 os.makedirs(DOWNLOAD_PATH, exist_ok=True)
 
+# 동영상 정보 디스크 캐시 (재시도/폴백 시 재추출 방지)
+info_cache = InfoCache()
+
+# 다운로드 완료 파일 인덱스 (이미 받은 동영상은 다시 받지 않음)
+library = LibraryIndex()
+
+
+def create_job(url, title='', playlist_item=None):
+    """
+    새 다운로드 작업 등록
+    Args:
+        url: YouTube URL
+        title: 동영상 제목 (플레이리스트 항목이면 미리 알고 있음)
+        playlist_item: (플레이리스트 ID, 항목 번호) - 플레이리스트 항목일 때만
+    Returns:
+        str: 작업 ID
+    """
+    global latest_job_id
+    
+    job_id = uuid.uuid4().hex[:12]
+    job = {
+        'id': job_id,
+        'url': url,
+        'title': title,
+        'status': 'queued',  # queued, downloading, converting, complete, error
+        'message': '대기열에 추가되었습니다.',
+        'progress': 0,
+        'bytes': 0,  # 내려받은 바이트 수
+        'playlist_item': playlist_item,
+        'filename': '',
+        'filepath': '',
+        'created_at': time.time(),
+        'finished_at': None,
+        'logs': LogBuffer(LOG_CAPACITY)  # 로그 링 버퍼
+    }
+    job['logs'].append('다운로드 요청을 받았습니다.')
+    
+    with status_lock:
+        jobs[job_id] = job
+        latest_job_id = job_id
+        
+        # 플레이리스트 항목과 작업 연결 (작업이 바로 끝나도 결과가 기록되도록 등록 시점에 연결)
+        if playlist_item:
+            playlist_id, index = playlist_item
+            playlist = playlists.get(playlist_id)
+            if playlist is not None:
+                playlist['items'][index]['job_id'] = job_id
+        
+        # 보관 한도 초과 시 오래된 완료/실패 작업 제거
+        if len(jobs) > MAX_JOBS:
+            for old_id in list(jobs):
+                if len(jobs) <= MAX_JOBS:
+                    break
+                if jobs[old_id]['status'] in ('complete', 'error'):
+                    del jobs[old_id]
+    
+    return job_id
+
+
+def get_job(job_id, since=0):
+    """
+    작업 상태 복사본 반환 (thread-safe)
+    Args:
+        job_id: 작업 ID
+        since: 이 순번 이후의 로그만 포함 (증분 조회)
+    Returns:
+        dict: 작업 상태 (없으면 None)
+              next_seq - 다음 조회 시 since로 넘길 값
+              truncated - 요청한 로그 일부가 이미 버려졌으면 True
+    """
+    with status_lock:
+        job = jobs.get(job_id)
+        if job is None:
+            return None
+        logs = job['logs']
+        job_copy = job.copy()
+        job_copy['logs'] = logs.since(since)
+        job_copy['next_seq'] = logs.next_seq
+        job_copy['truncated'] = since < logs.first_seq
+    return job_copy
+
 
-def log_message(message):
+def log_message(job_id, message):
     """
     로그 메시지 추가 (콘솔과 상태에 모두 기록)
     Args:
+        job_id: 작업 ID
         message: 로그 메시지
     """
-    print(f"[LOG] {message}", flush=True)  # 콘솔 출력
+    print(f"[LOG] [{job_id}] {message}", flush=True)  # 콘솔 출력
     with status_lock:
-        download_status['logs'].append(message)
-        download_status['message'] = message
+        job = jobs.get(job_id)
+        if job is not None:
+            job['logs'].append(message)
+            job['message'] = message
+            status_changed.notify_all()
 
 
-def update_status(status, message):
+def update_status(job_id, status, message, progress=None, downloaded=None):
     """
     다운로드 상태 업데이트 (thread-safe)
     Args:
+        job_id: 작업 ID
         status: 상태 값
         message: 상태 메시지
+        progress: 진행률 (0~100, 생략 가능)
+        downloaded: 내려받은 바이트 수 (생략 가능)
     """
     with status_lock:
-        download_status['status'] = status
-        download_status['message'] = message
-        download_status['logs'].append(message)
-    print(f"[STATUS] {status}: {message}", flush=True)
+        job = jobs.get(job_id)
+        if job is not None:
+            job['status'] = status
+            job['message'] = message
+            if progress is not None:
+                job['progress'] = round(progress, 1)
+            if downloaded is not None:
+                job['bytes'] = downloaded
+            job['logs'].append(message)
+            if status in ('complete', 'error'):
+                job['finished_at'] = time.time()
+                record_playlist_item(job)
+            status_changed.notify_all()
+    print(f"[STATUS] [{job_id}] {status}: {message}", flush=True)
 
 
 # HTML 템플릿
@@ -204,6 +355,11 @@ HTML_TEMPLATE = """
             color: #666;
         }
         
+        .status-queued {
+            background: #f3e5f5;
+            color: #7b1fa2;
+        }
+        
         .status-downloading {
             background: #e3f2fd;
             color: #1976d2;
@@ -303,8 +459,8 @@ HTML_TEMPLATE = """
     </div>
     
     <script>
-        let statusCheckInterval;
-        let lastLogLength = 0;
+        let eventSource = null;
+        let currentJobId = null;
         
         // 다운로드 시작 함수
         function startDownload() {
@@ -320,26 +476,23 @@ HTML_TEMPLATE = """
                 return;
             }
             
-            // 플레이리스트 URL 경고
+            // 플레이리스트 URL: 전체 다운로드 또는 첫 번째 동영상만
             if (url.includes('list=') || url.includes('start_radio=')) {
-                const confirmMsg = '플레이리스트 URL이 감지되었습니다.\\n' +
-                                  '첫 번째 동영상만 다운로드됩니다.\\n\\n' +
-                                  '계속하시겠습니까?';
-                if (!confirm(confirmMsg)) {
+                const confirmMsg = '플레이리스트 URL이 감지되었습니다.\\n\\n' +
+                                  '확인: 플레이리스트 전체 다운로드\\n' +
+                                  '취소: 첫 번째 동영상만 다운로드';
+                if (confirm(confirmMsg)) {
+                    startPlaylist(url);
                     return;
                 }
             }
             
-            // 버튼 비활성화
+            // 버튼 비활성화 (작업 등록 완료 시 다시 활성화 - 여러 작업 동시 등록 가능)
             document.getElementById('download-btn').disabled = true;
             document.getElementById('progress-container').style.display = 'block';
             
-            // 로그 초기화
-            lastLogLength = 0;
-            document.getElementById('log-content').textContent = '다운로드 시작...\\n';
-            
-            // 서버에 다운로드 요청
-            fetch('/download', {
+            // 서버에 작업 등록 요청
+            fetch('/jobs', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
@@ -348,10 +501,17 @@ HTML_TEMPLATE = """
             })
             .then(response => response.json())
             .then(data => {
-                console.log('Download started:', data);
-                if (data.status === 'started') {
-                    // 상태 체크 시작
-                    startStatusCheck();
+                console.log('Job queued:', data);
+                document.getElementById('download-btn').disabled = false;
+                if (data.job_id) {
+                    // 새 작업의 상태를 추적
+                    currentJobId = data.job_id;
+                    document.getElementById('log-content').textContent =
+                        '작업 ' + currentJobId + ' 등록됨\\n';
+                    document.getElementById('youtube-url').value = '';
+                    watchJob(currentJobId);
+                } else {
+                    updateStatus('error', data.message || '다운로드 요청 실패');
                 }
             })
             .catch(error => {
@@ -361,39 +521,115 @@ HTML_TEMPLATE = """
             });
         }
         
-        // 상태 체크 시작
-        function startStatusCheck() {
-            statusCheckInterval = setInterval(checkStatus, 500);  // 0.5초마다 체크
-        }
-        
-        // 상태 체크 함수
-        function checkStatus() {
-            fetch('/status')
-                .then(response => response.json())
-                .then(data => {
-                    console.log('Status:', data);
-                    updateStatus(data.status, data.message);
-                    
-                    // 로그 업데이트 (새로운 로그만 추가)
-                    if (data.logs && data.logs.length > lastLogLength) {
-                        const logElement = document.getElementById('log-content');
-                        const newLogs = data.logs.slice(lastLogLength);
-                        newLogs.forEach(log => {
-                            logElement.textContent += log + '\\n';
-                        });
-                        logElement.scrollTop = logElement.scrollHeight;
-                        lastLogLength = data.logs.length;
-                    }
-                    
-                    // 완료 또는 에러 시 체크 중지
-                    if (data.status === 'complete' || data.status === 'error') {
-                        clearInterval(statusCheckInterval);
-                        document.getElementById('download-btn').disabled = false;
-                    }
-                })
-                .catch(error => {
-                    console.error('Status check error:', error);
-                });
+        // 플레이리스트 전체 다운로드 시작
+        function startPlaylist(url) {
+            document.getElementById('download-btn').disabled = true;
+            document.getElementById('progress-container').style.display = 'block';
+            
+            fetch('/playlists', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({ url: url })
+            })
+            .then(response => response.json())
+            .then(data => {
+                document.getElementById('download-btn').disabled = false;
+                if (data.playlist_id) {
+                    currentJobId = null;
+                    document.getElementById('youtube-url').value = '';
+                    updateStatus('queued', '플레이리스트 항목을 가져오는 중...');
+                    watchPlaylist(data.playlist_id);
+                } else {
+                    updateStatus('error', data.message || '플레이리스트 요청 실패');
+                }
+            })
+            .catch(error => {
+                console.error('Error:', error);
+                updateStatus('error', '플레이리스트 요청 실패');
+                document.getElementById('download-btn').disabled = false;
+            });
+        }
+        
+        // 플레이리스트 진행 상황 구독 (항목별 상태 + 처리량)
+        function watchPlaylist(playlistId) {
+            if (eventSource) {
+                eventSource.close();
+            }
+            eventSource = new EventSource('/playlists/' + playlistId + '/events');
+            
+            const icons = {
+                queued: '⏳', downloading: '⬇️', converting: '🔄', complete: '✓', error: '✗'
+            };
+            const cssStatus = {
+                expanding: 'queued', running: 'downloading', complete: 'complete',
+                partial: 'error', error: 'error'
+            };
+            
+            eventSource.addEventListener('update', event => {
+                const data = JSON.parse(event.data);
+                const done = data.completed + data.failed;
+                const message = data.message ||
+                    (data.title ? data.title + ' - ' : '') +
+                    '완료 ' + data.completed + '/' + data.total +
+                    (data.failed ? ' (실패 ' + data.failed + ')' : '') +
+                    ' · ' + data.tracks_per_min + '곡/분 · ' + data.mb_per_sec + ' MB/s';
+                updateStatus(cssStatus[data.status] || 'downloading', message);
+                
+                if (data.total > 0) {
+                    document.getElementById('progress-fill').style.width =
+                        Math.round(done * 100 / data.total) + '%';
+                }
+                
+                // 항목별 상태 표시
+                document.getElementById('log-content').textContent = data.items.map(
+                    (item, index) => (icons[item.status] || '•') + ' ' + (index + 1) + '. ' +
+                        (item.title || item.url) +
+                        (item.status === 'downloading' ? ' (' + item.progress + '%)' : '')
+                ).join('\\n');
+            });
+            
+            eventSource.addEventListener('end', () => {
+                eventSource.close();
+                eventSource = null;
+            });
+            
+            eventSource.onerror = error => {
+                console.error('Event stream error:', error);
+            };
+        }
+        
+        // 작업 진행 상황 구독 (서버 푸시 - 새 로그와 상태 변경만 수신)
+        function watchJob(jobId) {
+            if (eventSource) {
+                eventSource.close();
+            }
+            eventSource = new EventSource('/jobs/' + jobId + '/events');
+            
+            eventSource.addEventListener('update', event => {
+                const data = JSON.parse(event.data);
+                updateStatus(data.status, data.message);
+                
+                // 새 로그만 추가
+                if (data.logs.length > 0) {
+                    const logElement = document.getElementById('log-content');
+                    data.logs.forEach(log => {
+                        logElement.textContent += log + '\\n';
+                    });
+                    logElement.scrollTop = logElement.scrollHeight;
+                }
+            });
+            
+            // 완료 또는 에러 시 구독 종료 (자동 재연결 방지)
+            eventSource.addEventListener('end', () => {
+                eventSource.close();
+                eventSource = null;
+            });
+            
+            eventSource.onerror = error => {
+                console.error('Event stream error:', error);
+            };
         }
         
         // 상태 업데이트 함수
@@ -405,7 +641,9 @@ HTML_TEMPLATE = """
             statusElement.textContent = message;
             
             // 진행률 업데이트
-            if (status === 'downloading') {
+            if (status === 'queued') {
+                progressFill.style.width = '10%';
+            } else if (status === 'downloading') {
                 progressFill.style.width = '50%';
             } else if (status === 'converting') {
                 progressFill.style.width = '80%';
@@ -419,116 +657,565 @@ HTML_TEMPLATE = """
 """
 
 
-def progress_hook(d):
+def make_progress_hook(job_id):
     """
-    yt-dlp 다운로드 진행 상황 콜백
+    작업별 yt-dlp 진행 상황 콜백 생성
     Args:
-        d: 다운로드 진행 정보
+        job_id: 작업 ID
+    Returns:
+        function: yt-dlp progress_hooks에 등록할 콜백
     """
-    try:
-        if d['status'] == 'downloading':
-            percent = d.get('_percent_str', 'N/A').strip()
-            speed = d.get('_speed_str', 'N/A').strip()
-            message = f"다운로드 중... {percent} (속도: {speed})"
-            update_status('downloading', message)
-            
-        elif d['status'] == 'finished':
-            update_status('converting', "다운로드 완료. FLAC 변환 중...")
+    aggregator = ProgressAggregator()
+    
+    def progress_hook(d):
+        """
+        yt-dlp 다운로드 진행 상황 콜백 (초당 PROGRESS_MAX_RATE회로 제한)
+        Args:
+            d: 다운로드 진행 정보
+        """
+        try:
+            if not aggregator.sample(d):
+                return
             
-    except Exception as e:
-        print(f"[ERROR] progress_hook: {e}", flush=True)
+            if d['status'] == 'downloading':
+                percent = d.get('_percent_str', 'N/A').strip()
+                speed = d.get('_speed_str', 'N/A').strip()
+                message = f"다운로드 중... {percent} (속도: {speed})"
+                update_status(job_id, 'downloading', message, aggregator.percent, aggregator.downloaded)
+                
+            elif d['status'] == 'finished':
+                update_status(job_id, 'converting', "다운로드 완료. FLAC 변환 대기 중...",
+                              downloaded=aggregator.downloaded)
+                
+        except Exception as e:
+            print(f"[ERROR] progress_hook: {e}", flush=True)
+    
+    return progress_hook
 
 
-def download_audio(url):
+def finish_job(job_id, filepath, extract_seconds=None):
     """
-    실제 다운로드 실행 함수 (백그라운드 스레드)
+    작업 완료 처리
     Args:
+        job_id: 작업 ID
+        filepath: 저장된 FLAC 파일 경로
+        extract_seconds: 정보 추출 소요 시간 (기존 파일 사용 시 None)
+    """
+    filename = os.path.basename(filepath)
+    
+    with status_lock:
+        job = jobs[job_id]
+        job['status'] = 'complete'
+        job['message'] = '✓ 다운로드 완료!'
+        job['progress'] = 100
+        job['filename'] = filename
+        job['filepath'] = filepath
+        if extract_seconds is not None:
+            job['extract_seconds'] = round(extract_seconds, 3)
+        job['finished_at'] = time.time()
+        job['logs'].append('=' * 60)
+        job['logs'].append('✓ 다운로드 완료!')
+        job['logs'].append(f'파일명: {filename}')
+        job['logs'].append(f'저장 위치: {os.path.dirname(filepath)}')
+        record_playlist_item(job)
+        status_changed.notify_all()
+    
+    print(f"[LOG] [{job_id}] 완료: {filename}", flush=True)
+
+
+def strip_playlist_params(job_id, url):
+    """
+    플레이리스트 파라미터 제거 (단일 동영상만 다운로드)
+    Args:
+        job_id: 작업 ID
         url: YouTube URL
+    Returns:
+        str: 정리된 URL
+    """
+    if 'list=' in url or '&start_radio=' in url:
+        log_message(job_id, "⚠️ 플레이리스트 URL이 감지되었습니다.")
+        log_message(job_id, "첫 번째 동영상만 다운로드합니다.")
+        # URL에서 플레이리스트 파라미터 제거
+        if '&list=' in url:
+            url = url.split('&list=')[0]
+        elif '?list=' in url:
+            url = url.split('?list=')[0]
+    return url
+
+
+def describe_error(error_str):
+    """
+    예외 메시지를 사용자용 오류 메시지로 변환
+    Args:
+        error_str: 예외 문자열
+    Returns:
+        str: 사용자에게 보여줄 메시지
+    """
+    # Rate Limit 에러 처리
+    if is_rate_limit_error(error_str):
+        return "YouTube 접근 제한: 요청 속도를 자동으로 낮췄습니다. 잠시 후 다시 시도해주세요."
+    elif 'unavailable' in error_str.lower():
+        return "동영상을 사용할 수 없습니다. URL을 확인하거나 다른 동영상을 시도해주세요."
+    elif 'playlist' in error_str.lower():
+        return "플레이리스트는 지원하지 않습니다. 단일 동영상 URL을 입력해주세요."
+    return f"오류 발생: {error_str}"
+
+
+@profiler.wrap_job
+def download_source(job_id, url):
     """
+    다운로드 단계 (파이프라인 다운로드 풀 스레드)
+    - 원본 오디오(webm/m4a)만 받고 FLAC 변환은 변환 단계로 넘김
+    - 변환을 기다리지 않으므로 워커는 바로 다음 작업 다운로드를 시작함
+    Args:
+        job_id: 작업 ID
+        url: YouTube URL
+    Returns:
+        dict: 변환 단계에 넘길 원본 정보 (이미 받은 동영상이면 None)
+    """
+    with metrics.stage('normalize'):
+        url = strip_playlist_params(job_id, url)
+        video_id = canonical_video_id(url)
+    log_message(job_id, "=" * 60)
+    log_message(job_id, f"다운로드 URL: {url}")
+    
+    # 이미 받은 동영상이면 기존 파일 반환 (다운로드/변환 생략)
+    existing = library.lookup(video_id)
+    if existing:
+        log_message(job_id, "이미 다운로드한 동영상입니다. 기존 파일을 사용합니다.")
+        metrics.job('skipped')
+        finish_job(job_id, existing['path'])
+        return None
+    
+    update_status(job_id, 'downloading', '다운로드 준비 중...')
+    
+    # 다운로드 단계 계측 (/metrics) - 변환은 변환 단계에서 따로 기록
+    timer = YtDlpTimer(postprocess=False)
+    
+    # yt-dlp 옵션 설정 (후처리 없음 - 변환은 변환 단계에서)
+    ydl_opts = {
+        'format': 'bestaudio/best',
+        'outtmpl': os.path.join(DOWNLOAD_PATH, '%(title)s.%(ext)s'),
+        'progress_hooks': [make_progress_hook(job_id), timer.hook],
+        'quiet': False,  # 디버그를 위해 출력 활성화
+        'no_warnings': False,
+        
+        # 플레이리스트 차단 - 단일 동영상만 다운로드
+        'noplaylist': True,  # 플레이리스트 무시
+        'extract_flat': False,  # 전체 정보 추출
+        
+        # Rate Limit 방지는 작업마다 고정 대기(sleep_interval) 대신 공유 스케줄러(rate_limiter)가 담당
+    }
+    
+    log_message(job_id, "yt-dlp 초기화 중...")
+    
+    # 다운로드 실행 (Rate Limit이면 스케줄러 백오프 후 재시도)
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        try:
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                log_message(job_id, "동영상 정보 가져오는 중...")
+                info, extract_seconds, cache_hit = extract_info_once(ydl, url, cache=info_cache, rate_limiter=rate_limiter)
+                video_title = info.get('title', 'Unknown')
+                
+                log_message(job_id, f"제목: {video_title}")
+                if cache_hit:
+                    log_message(job_id, "캐시된 동영상 정보 사용 (추출 생략)")
+                else:
+                    log_message(job_id, f"정보 추출 {extract_seconds:.2f}초 (재추출 생략으로 절약)")
+                
+                waited = rate_limiter.acquire()
+                if waited >= 1:
+                    log_message(job_id, f"요청 속도 제한으로 {waited:.1f}초 대기")
+                log_message(job_id, "최고 음질 오디오 다운로드 시작...")
+                
+                # 실제 다운로드 (추출한 info 재사용)
+                with timer:
+                    result = ydl.process_ie_result(info, download=True)
+            break
+        except Exception as e:
+            if not is_rate_limit_error(e) or attempt == RATE_LIMIT_RETRIES:
+                raise
+            metrics.retry('rate_limited')
+            backoff = rate_limiter.penalize()
+            log_message(job_id, f"YouTube 요청 제한 감지 → 요청 속도를 낮추고 {backoff:.0f}초 후 재시도 "
+                                f"({attempt + 1}/{RATE_LIMIT_RETRIES})")
+            update_status(job_id, 'downloading', f"요청 제한으로 대기 중... ({backoff:.0f}초)")
+    
+    rate_limiter.success()
+    update_status(job_id, 'converting', "다운로드 완료. FLAC 변환 대기 중...")
+    return {
+        'path': final_filepath(result),
+        'video_id': info.get('id') or video_id,
+        'title': video_title,
+        'extract_seconds': extract_seconds,
+    }
+
+
+@profiler.wrap_job
+def encode_source(job_id, source):
+    """
+    변환 단계 (파이프라인 변환 워커 - ffmpeg 프로세스로 CPU 사용)
+    Args:
+        job_id: 작업 ID
+        source: download_source가 반환한 원본 정보
+    """
+    update_status(job_id, 'converting', "FLAC 고음질로 변환 중...")
+    filepath = os.path.splitext(source['path'])[0] + '.flac'
     try:
-        # 플레이리스트 URL 체크 및 정리
-        if 'list=' in url or '&start_radio=' in url:
-            log_message("⚠️ 플레이리스트 URL이 감지되었습니다.")
-            log_message("첫 번째 동영상만 다운로드합니다.")
-            # URL에서 플레이리스트 파라미터 제거
-            if '&list=' in url:
-                url = url.split('&list=')[0]
-            elif '?list=' in url:
-                url = url.split('?list=')[0]
-        
-        log_message("=" * 60)
-        log_message(f"다운로드 URL: {url}")
-        update_status('downloading', '다운로드 준비 중...')
-        
-        # yt-dlp 옵션 설정
-        ydl_opts = {
-            'format': 'bestaudio/best',
-            'outtmpl': os.path.join(DOWNLOAD_PATH, '%(title)s.%(ext)s'),
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'flac',
-            }],
-            'progress_hooks': [progress_hook],
-            'quiet': False,  # 디버그를 위해 출력 활성화
-            'no_warnings': False,
-            
-            # 플레이리스트 차단 - 단일 동영상만 다운로드
-            'noplaylist': True,  # 플레이리스트 무시
-            'extract_flat': False,  # 전체 정보 추출
-            
-            # Rate Limit 방지
-            'sleep_interval': 1,  # 요청 사이 1초 대기
-            'max_sleep_interval': 3,  # 최대 3초 대기
-        }
+        transcode_to_flac(source['path'], filepath)
+    finally:
+        with metrics.stage('cleanup'):
+            if os.path.exists(source['path']):
+                os.remove(source['path'])
+    
+    # 완료 - 라이브러리에 등록
+    with metrics.stage('write'):
+        library.record(source['video_id'], filepath, source['title'])
+    metrics.job('ok')
+    finish_job(job_id, filepath, source['extract_seconds'])
+
+
+def fail_job(job_id, error, url):
+    """
+    작업 실패 처리 (파이프라인 어느 단계에서든 호출)
+    Args:
+        job_id: 작업 ID
+        error: 발생한 예외
+        url: YouTube URL
+    """
+    error_str = str(error)
+    metrics.job('failed')
+    
+    # 캐시된 스트림 URL이 만료되었을 수 있으므로 캐시 무효화
+    if is_stale_url_error(error_str):
+        info_cache.delete(canonical_video_id(url))
+    
+    # 재시도 후에도 Rate Limit이면 요청 속도를 더 낮춤
+    if is_rate_limit_error(error_str):
+        rate_limiter.penalize()
+    
+    error_message = describe_error(error_str)
+    log_message(job_id, f"[ERROR] {error_message}")
+    update_status(job_id, 'error', error_message)
+    print(f"[EXCEPTION] [{job_id}] {error}", flush=True)
+    import traceback
+    traceback.print_exception(type(error), error, error.__traceback__)
+
+
+@profiler.wrap_job
+async def download_audio_async(job_id, url):
+    """
+    asyncio 엔진용 다운로드 (YT_ENGINE=async)
+    - 정보 추출만 엔진의 작은 스레드 풀에서 실행
+    - 스트림 다운로드와 FLAC 변환은 ffmpeg 프로세스 하나가 처리하고,
+      진행 상황은 ffmpeg -progress 파이프로 받아 작업 상태에 반영
+    Args:
+        job_id: 작업 ID
+        url: YouTube URL
+    """
+    try:
+        with metrics.stage('normalize'):
+            url = strip_playlist_params(job_id, url)
+            video_id = canonical_video_id(url)
+        log_message(job_id, "=" * 60)
+        log_message(job_id, f"다운로드 URL: {url}")
         
-        log_message("yt-dlp 초기화 중...")
+        # 이미 받은 동영상이면 기존 파일 반환 (다운로드/변환 생략)
+        existing = library.lookup(video_id)
+        if existing:
+            log_message(job_id, "이미 다운로드한 동영상입니다. 기존 파일을 사용합니다.")
+            metrics.job('skipped')
+            finish_job(job_id, existing['path'])
+            return
         
-        # 다운로드 실행
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            log_message("동영상 정보 가져오는 중...")
-            info = ydl.extract_info(url, download=False)
-            video_title = info.get('title', 'Unknown')
-            
-            log_message(f"제목: {video_title}")
-            log_message("FLAC 고음질로 다운로드 시작...")
-            
-            # 실제 다운로드
-            ydl.download([url])
+        update_status(job_id, 'downloading', '다운로드 준비 중...')
+        log_message(job_id, "동영상 정보 가져오는 중... (asyncio 엔진)")
         
-        # 완료
-        filename = f"{video_title}.flac"
-        filepath = os.path.join(DOWNLOAD_PATH, filename)
+        def on_progress(seconds, percent):
+            if percent is None:
+                message = f"다운로드/변환 중... {seconds:.0f}초"
+            else:
+                message = f"다운로드/변환 중... {percent:.1f}%"
+            update_status(job_id, 'downloading', message, percent)
+        
+        started = time.monotonic()
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            try:
+                filepath, info = await download_flac(
+                    url, DOWNLOAD_PATH, on_progress=on_progress, rate_limiter=rate_limiter
+                )
+                break
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == RATE_LIMIT_RETRIES:
+                    raise
+                metrics.retry('rate_limited')
+                backoff = rate_limiter.penalize()
+                log_message(job_id, f"YouTube 요청 제한 감지 → 요청 속도를 낮추고 {backoff:.0f}초 후 재시도 "
+                                    f"({attempt + 1}/{RATE_LIMIT_RETRIES})")
+        rate_limiter.success()
+        video_title = info.get('title', 'Unknown')
+        log_message(job_id, f"제목: {video_title}")
+        
+        # 완료 - 라이브러리에 등록 (체크섬 계산은 스레드 풀에서)
+        with metrics.stage('write'):
+            await run_blocking(library.record, info.get('id') or video_id, filepath, video_title)
+        metrics.job('ok')
+        log_message(job_id, f"소요 시간: {time.monotonic() - started:.1f}초")
+        finish_job(job_id, filepath)
+        
+    except Exception as e:
+        metrics.job('failed')
+        if is_rate_limit_error(e):
+            rate_limiter.penalize()
+        error_message = describe_error(str(e))
+        log_message(job_id, f"[ERROR] {error_message}")
+        update_status(job_id, 'error', error_message)
+        print(f"[EXCEPTION] [{job_id}] {e}", flush=True)
+
+
+# 다운로드 풀(MAX_WORKERS) → 변환 대기 큐 → 변환 풀(ENCODE_WORKERS)
+# 변환이 밀리면 다운로드 워커가 큐 앞에서 기다림 (배압)
+pipeline = DownloadEncodePipeline(
+    download_source, encode_source, fail_job,
+    download_workers=MAX_WORKERS, encode_workers=ENCODE_WORKERS
+)
+
+
+def submit_job(url, title='', playlist_item=None):
+    """
+    작업을 등록하고 파이프라인(또는 asyncio 엔진)에 제출
+    Args:
+        url: YouTube URL
+        title: 동영상 제목 (알고 있으면)
+        playlist_item: (플레이리스트 ID, 항목 번호) - 플레이리스트 항목일 때만
+    Returns:
+        str: 작업 ID
+    """
+    job_id = create_job(url, title, playlist_item)
+    if engine is not None:
+        engine.submit(download_audio_async(job_id, url))
+    else:
+        pipeline.submit(job_id, url)
+    print(f"[API] Job {job_id} queued: {url}", flush=True)
+    return job_id
+
+
+# ============================================================================
+# 플레이리스트 / 채널 일괄 다운로드
+# ============================================================================
+
+def record_playlist_item(job):
+    """
+    끝난 작업의 결과를 플레이리스트 항목에 기록 (status_lock 안에서 호출)
+    - 작업이 보관 한도로 제거된 뒤에도 플레이리스트 집계가 유지되도록 결과를 복사해 둠
+    Args:
+        job: 작업 상태 dict
+    """
+    if not job.get('playlist_item'):
+        return
+    
+    playlist_id, index = job['playlist_item']
+    playlist = playlists.get(playlist_id)
+    if playlist is None:
+        return
+    
+    item = playlist['items'][index]
+    if item['job_id'] != job['id'] or item['status'] in ('complete', 'error'):
+        return
+    
+    item['status'] = job['status']
+    item['bytes'] = job['bytes']
+    item['filename'] = job['filename']
+    if job['status'] == 'complete':
+        playlist['completed'] += 1
+    else:
+        playlist['failed'] += 1
+    
+    if playlist['completed'] + playlist['failed'] == len(playlist['items']):
+        playlist['status'] = 'complete' if playlist['failed'] == 0 else 'partial'
+        playlist['finished_at'] = time.time()
+
+
+def expand_playlist(playlist_id, url):
+    """
+    플레이리스트/채널 항목 나열 후 각 항목을 작업으로 등록 (백그라운드 스레드)
+    - flat 추출로 항목 목록만 가져오므로 동영상별 정보 조회 없이 빠르게 끝남
+    - 각 항목은 일반 작업과 같은 파이프라인에서 MAX_WORKERS개씩 동시에 다운로드
+    Args:
+        playlist_id: 플레이리스트 ID
+        url: 플레이리스트 또는 채널 URL
+    """
+    opts = {
+        'extract_flat': 'in_playlist',  # 항목 목록만 추출
+        'noplaylist': False,
+        'quiet': True,
+        'skip_download': True,
+    }
+    
+    try:
+        rate_limiter.acquire()
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            info = ydl.extract_info(playlist_listing_url(url), download=False)
+        
+        # 채널 탭/하위 플레이리스트 같은 동영상이 아닌 항목은 제외
+        items = []
+        for entry in info.get('entries') or []:
+            entry_url = playlist_entry_url(entry)
+            if entry_url is None:
+                continue
+            items.append({
+                'job_id': None,
+                'url': entry_url,
+                'title': entry.get('title') or '',
+                'status': 'queued',
+                'bytes': 0,
+                'filename': '',
+            })
+        
+        if not items:
+            raise Exception("플레이리스트에 다운로드할 항목이 없습니다.")
         
         with status_lock:
-            download_status['status'] = 'complete'
-            download_status['message'] = '✓ 다운로드 완료!'
-            download_status['filename'] = filename
-            download_status['filepath'] = filepath
-            download_status['logs'].append('=' * 60)
-            download_status['logs'].append('✓ 다운로드 완료!')
-            download_status['logs'].append(f'파일명: {filename}')
-            download_status['logs'].append(f'저장 위치: {DOWNLOAD_PATH}')
+            playlist = playlists[playlist_id]
+            playlist['title'] = info.get('title') or ''
+            playlist['items'] = items
+            playlist['status'] = 'running'
+            playlist['started_at'] = time.time()
+            status_changed.notify_all()
         
-        log_message(f"완료: {filename}")
+        print(f"[PLAYLIST] [{playlist_id}] {len(items)}개 항목 등록", flush=True)
+        
+        for index, item in enumerate(items):
+            submit_job(item['url'], item['title'], (playlist_id, index))
         
     except Exception as e:
-        error_str = str(e)
+        with status_lock:
+            playlist = playlists[playlist_id]
+            playlist['status'] = 'error'
+            playlist['message'] = f"플레이리스트 정보를 가져올 수 없습니다: {str(e)[:200]}"
+            playlist['finished_at'] = time.time()
+            status_changed.notify_all()
+        print(f"[PLAYLIST] [{playlist_id}] 오류: {e}", flush=True)
+
+
+def submit_playlist(url):
+    """
+    플레이리스트 등록 및 항목 나열 시작
+    Args:
+        url: 플레이리스트 또는 채널 URL
+    Returns:
+        str: 플레이리스트 ID
+    """
+    playlist_id = uuid.uuid4().hex[:12]
+    playlist = {
+        'id': playlist_id,
+        'url': url,
+        'title': '',
+        'status': 'expanding',  # expanding, running, complete, partial, error
+        'message': '',
+        'items': [],
+        'completed': 0,
+        'failed': 0,
+        'created_at': time.time(),
+        'started_at': None,
+        'finished_at': None,
+    }
+    
+    with status_lock:
+        playlists[playlist_id] = playlist
+        
+        # 보관 한도 초과 시 오래된 완료 플레이리스트 제거
+        for old_id in list(playlists):
+            if len(playlists) <= MAX_PLAYLISTS:
+                break
+            if playlists[old_id]['finished_at'] is not None:
+                del playlists[old_id]
+    
+    threading.Thread(target=expand_playlist, args=(playlist_id, url), daemon=True).start()
+    return playlist_id
+
+
+def playlist_summary(playlist_id):
+    """
+    플레이리스트 항목별 상태와 전체 처리량 집계 (thread-safe)
+    Args:
+        playlist_id: 플레이리스트 ID
+    Returns:
+        dict: 항목별 상태, 완료/실패 수, 곡/분, MB/s (없으면 None)
+    """
+    with status_lock:
+        playlist = playlists.get(playlist_id)
+        if playlist is None:
+            return None
         
-        # Rate Limit 에러 처리
-        if 'rate-limited' in error_str.lower():
-            error_message = "YouTube 접근 제한: 너무 많은 요청으로 인해 일시적으로 차단되었습니다. 1시간 후 다시 시도해주세요."
-        elif 'unavailable' in error_str.lower():
-            error_message = "동영상을 사용할 수 없습니다. URL을 확인하거나 다른 동영상을 시도해주세요."
-        elif 'playlist' in error_str.lower():
-            error_message = "플레이리스트는 지원하지 않습니다. 단일 동영상 URL을 입력해주세요."
-        else:
-            error_message = f"오류 발생: {error_str}"
+        items = []
+        total_bytes = 0
+        for item in playlist['items']:
+            # 진행 중인 작업은 실시간 상태, 끝났거나 제거된 작업은 기록된 결과 사용
+            job = jobs.get(item['job_id'])
+            live = job is not None and item['status'] not in ('complete', 'error')
+            status = job['status'] if live else item['status']
+            item_bytes = job['bytes'] if live else item['bytes']
+            total_bytes += item_bytes
+            items.append({
+                'job_id': item['job_id'],
+                'title': item['title'],
+                'url': item['url'],
+                'status': status,
+                'progress': job['progress'] if live else (100 if status == 'complete' else 0),
+                'filename': item['filename'],
+            })
         
-        log_message(f"[ERROR] {error_message}")
-        update_status('error', error_message)
-        print(f"[EXCEPTION] {e}", flush=True)
-        import traceback
-        traceback.print_exc()
+        summary = {key: playlist[key] for key in (
+            'id', 'url', 'title', 'status', 'message', 'completed', 'failed',
+            'created_at', 'started_at', 'finished_at'
+        )}
+    
+    summary['total'] = len(items)
+    summary['items'] = items
+    summary['bytes'] = total_bytes
+    
+    # 처리량 (항목 나열이 끝난 시점부터 계산)
+    if summary['started_at']:
+        elapsed = max((summary['finished_at'] or time.time()) - summary['started_at'], 0.001)
+        summary['elapsed'] = round(elapsed, 1)
+        summary['tracks_per_min'] = round(summary['completed'] * 60 / elapsed, 2)
+        summary['mb_per_sec'] = round(total_bytes / elapsed / (1024 * 1024), 2)
+    else:
+        summary['elapsed'] = 0
+        summary['tracks_per_min'] = 0
+        summary['mb_per_sec'] = 0
+    
+    return summary
+
+
+def resume_playlist(playlist_id):
+    """
+    실패한 항목만 다시 작업으로 등록 (완료된 항목은 건너뜀)
+    Args:
+        playlist_id: 플레이리스트 ID
+    Returns:
+        int: 다시 등록한 항목 수 (플레이리스트가 없으면 None)
+    """
+    with status_lock:
+        playlist = playlists.get(playlist_id)
+        if playlist is None:
+            return None
+        retry = [index for index, item in enumerate(playlist['items']) if item['status'] == 'error']
+        for index in retry:
+            playlist['items'][index]['status'] = 'queued'
+            playlist['items'][index]['job_id'] = None
+        if retry:
+            playlist['failed'] -= len(retry)
+            playlist['status'] = 'running'
+            playlist['finished_at'] = None
+            status_changed.notify_all()
+    
+    for index in retry:
+        item = playlist['items'][index]
+        submit_job(item['url'], item['title'], (playlist_id, index))
+    
+    return len(retry)
 
 
 @app.route('/')
@@ -537,12 +1224,195 @@ def index():
     return render_template_string(HTML_TEMPLATE, download_path=DOWNLOAD_PATH)
 
 
+@app.route('/jobs', methods=['POST'])
+def create_job_api():
+    """다운로드 작업 생성 API - 작업 ID 반환"""
+    data = request.get_json(silent=True) or {}
+    url = data.get('url', '')
+    
+    print(f"[API] Job request: {url}", flush=True)
+    
+    if not url:
+        return jsonify({'status': 'error', 'message': 'URL이 필요합니다.'}), 400
+    
+    job_id = submit_job(url)
+    return jsonify({'status': 'queued', 'job_id': job_id}), 202
+
+
+@app.route('/jobs', methods=['GET'])
+def list_jobs():
+    """전체 작업 요약 목록 API"""
+    with status_lock:
+        summary = [
+            {
+                'id': job['id'],
+                'url': job['url'],
+                'status': job['status'],
+                'message': job['message'],
+                'filename': job['filename'],
+            }
+            for job in jobs.values()
+        ]
+    return jsonify({'jobs': summary, 'max_workers': MAX_WORKERS})
+
+
+@app.route('/pipeline')
+def pipeline_stats():
+    """다운로드/변환 단계별 사용률, 변환 대기 큐와 요청 스케줄러 상태 API"""
+    return jsonify({**pipeline.stats(), 'rate_limiter': rate_limiter.stats()})
+
+
+@app.route('/metrics')
+def get_metrics():
+    """단계별 소요 시간, 받은 바이트, 재시도/오류 수 (Prometheus 텍스트 형식)"""
+    return Response(metrics.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """작업별 상태 확인 API"""
+    since = request.args.get('since', 0, type=int)
+    job = get_job(job_id, since)
+    if job is None:
+        return jsonify({'status': 'error', 'message': '작업을 찾을 수 없습니다.'}), 404
+    return jsonify(job)
+
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """
+    작업 진행 상황 푸시 API (Server-Sent Events)
+    - 연결 시 현재까지의 로그를 한 번 보내고, 이후에는 새 로그와 상태 변경만 전송
+    - 작업이 끝나면 'end' 이벤트를 보내고 스트림 종료
+    """
+    if get_job(job_id) is None:
+        return jsonify({'status': 'error', 'message': '작업을 찾을 수 없습니다.'}), 404
+    
+    def stream():
+        sent_seq = 0
+        sent_state = None
+        
+        while True:
+            with status_changed:
+                status_changed.wait_for(
+                    lambda: job_id not in jobs
+                    or jobs[job_id]['logs'].next_seq > sent_seq
+                    or jobs[job_id]['status'] != sent_state,
+                    timeout=SSE_KEEPALIVE
+                )
+                job = jobs.get(job_id)
+                if job is None:
+                    break
+                new_logs = job['logs'].since(sent_seq)
+                next_seq = job['logs'].next_seq
+                state = job['status']
+                update = {
+                    'status': state,
+                    'message': job['message'],
+                    'filename': job['filename'],
+                    'logs': new_logs,
+                    'next_seq': next_seq,
+                }
+            
+            if not new_logs and state == sent_state:
+                yield ": keepalive\n\n"
+                continue
+            
+            sent_seq = next_seq
+            sent_state = state
+            yield sse_event('update', update)
+            
+            if state in ('complete', 'error'):
+                yield sse_event('end', {'status': state})
+                break
+    
+    return Response(
+        stream(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@app.route('/playlists', methods=['POST'])
+def create_playlist_api():
+    """플레이리스트/채널 전체 다운로드 API - 플레이리스트 ID 반환"""
+    data = request.get_json(silent=True) or {}
+    url = data.get('url', '')
+    
+    print(f"[API] Playlist request: {url}", flush=True)
+    
+    if not url:
+        return jsonify({'status': 'error', 'message': 'URL이 필요합니다.'}), 400
+    
+    playlist_id = submit_playlist(url)
+    return jsonify({'status': 'expanding', 'playlist_id': playlist_id}), 202
+
+
+@app.route('/playlists/<playlist_id>')
+def playlist_status(playlist_id):
+    """플레이리스트 항목별 상태와 처리량 API"""
+    summary = playlist_summary(playlist_id)
+    if summary is None:
+        return jsonify({'status': 'error', 'message': '플레이리스트를 찾을 수 없습니다.'}), 404
+    return jsonify(summary)
+
+
+@app.route('/playlists/<playlist_id>/resume', methods=['POST'])
+def resume_playlist_api(playlist_id):
+    """실패한 항목 재시도 API"""
+    count = resume_playlist(playlist_id)
+    if count is None:
+        return jsonify({'status': 'error', 'message': '플레이리스트를 찾을 수 없습니다.'}), 404
+    return jsonify({'status': 'resumed', 'requeued': count})
+
+
+@app.route('/playlists/<playlist_id>/events')
+def playlist_events(playlist_id):
+    """
+    플레이리스트 진행 상황 푸시 API (Server-Sent Events)
+    - 상태가 바뀌면 최대 초당 1회 요약 전송, 모든 항목이 끝나면 'end' 이벤트 후 종료
+    """
+    if playlist_summary(playlist_id) is None:
+        return jsonify({'status': 'error', 'message': '플레이리스트를 찾을 수 없습니다.'}), 404
+    
+    def stream():
+        last_sent = None
+        idle = 0
+        
+        while True:
+            summary = playlist_summary(playlist_id)
+            if summary is None:
+                break
+            
+            snapshot = (summary['status'], summary['completed'], summary['failed'],
+                        [(item['status'], item['progress']) for item in summary['items']])
+            if snapshot != last_sent:
+                last_sent = snapshot
+                idle = 0
+                yield sse_event('update', summary)
+            else:
+                idle += 1
+                if idle >= SSE_KEEPALIVE:
+                    idle = 0
+                    yield ": keepalive\n\n"
+            
+            if summary['finished_at'] is not None:
+                yield sse_event('end', {'status': summary['status']})
+                break
+            
+            time.sleep(1)
+    
+    return Response(
+        stream(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @app.route('/download', methods=['POST'])
 def download():
-    """다운로드 시작 API"""
-    global download_status
-    
-    data = request.get_json()
+    """다운로드 시작 API (이전 버전 호환용 - /jobs 사용 권장)"""
+    data = request.get_json(silent=True) or {}
     url = data.get('url', '')
     
     print(f"[API] Download request: {url}", flush=True)
@@ -550,32 +1420,31 @@ def download():
     if not url:
         return jsonify({'status': 'error', 'message': 'URL이 필요합니다.'})
     
-    # 다운로드 상태 초기화
-    with status_lock:
-        download_status = {
-            'status': 'downloading',
-            'message': '다운로드 시작...',
-            'progress': 0,
-            'filename': '',
-            'filepath': '',
-            'logs': ['다운로드 요청을 받았습니다.']
-        }
-    
-    # 백그라운드 스레드에서 다운로드 실행
-    thread = threading.Thread(target=download_audio, args=(url,), daemon=True)
-    thread.start()
+    job_id = submit_job(url)
     
-    print("[API] Download thread started", flush=True)
-    
-    return jsonify({'status': 'started', 'message': '다운로드가 시작되었습니다.'})
+    return jsonify({'status': 'started', 'job_id': job_id, 'message': '다운로드가 시작되었습니다.'})
 
 
 @app.route('/status')
 def status():
-    """다운로드 상태 확인 API"""
-    with status_lock:
-        status_copy = download_status.copy()
-    return jsonify(status_copy)
+    """
+    가장 최근 작업의 상태 확인 API (이전 버전 호환용)
+    - /status?since=<seq> : 해당 순번 이후의 로그만 반환
+    """
+    since = request.args.get('since', 0, type=int)
+    job = get_job(latest_job_id, since) if latest_job_id else None
+    if job is None:
+        return jsonify({
+            'status': 'ready',
+            'message': 'YouTube URL을 입력하고 다운로드 버튼을 클릭하세요.',
+            'progress': 0,
+            'filename': '',
+            'filepath': '',
+            'logs': [],
+            'next_seq': 0,
+            'truncated': False
+        })
+    return jsonify(job)
 
 
 @app.route('/favicon.ico')
@@ -593,6 +1462,14 @@ def main():
     print("브라우저가 자동으로 열립니다...")
     print("또는 아래 주소를 직접 열어주세요:")
     print("\n  👉 http://127.0.0.1:5000\n")
+    if engine is not None:
+        print(f"asyncio 엔진 사용 - 동시 작업 수: {ASYNC_MAX_JOBS} (YT_ASYNC_JOBS 환경변수로 변경)")
+    else:
+        print(f"동시 다운로드 수: {MAX_WORKERS} (YT_MAX_WORKERS 환경변수로 변경)")
+        print(f"동시 FLAC 변환 수: {ENCODE_WORKERS} (YT_ENCODE_WORKERS 환경변수로 변경)")
+    print("지표 (Prometheus): http://127.0.0.1:5000/metrics")
+    if profiler.enabled:
+        print(f"작업별 프로파일링: {profiler.describe()} (YT_PROFILE 환경변수로 변경)")
     print("종료하려면 Ctrl+C를 누르세요.")
     print("=" * 60)
     print("\n[DEBUG MODE] 상세 로그가 출력됩니다.\n")
@@ -602,6 +1479,9 @@ def main():
     import webbrowser
     threading.Timer(1.5, lambda: webbrowser.open('http://127.0.0.1:5000')).start()
     
+    # 서버가 요청을 받는 동안 yt-dlp를 백그라운드에서 미리 import
+    warm_up(yt_dlp)
+    
     # Flask 서버 실행
     app.run(debug=False, port=5000, threaded=True)
 
@@ -16,9 +16,30 @@ if sys.platform == "darwin" and os.environ.get("SYSTEM_VERSION_COMPAT") != "0":
     
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
+import queue
 import threading
 from pathlib import Path
-import yt_dlp
+
+from yt_common.info_cache import extract_info_once
+from yt_common.lazy import lazy_import, warm_up
+from yt_common.library import LibraryIndex, final_filepath
+from yt_common.profiling import profiler
+from yt_common.progress import ProgressAggregator
+from yt_common.urls import canonical_video_id
+
+# yt-dlp는 import가 무거우므로 창이 뜬 뒤 백그라운드에서 불러옴 (처음 사용 시 import)
+yt_dlp = lazy_import('yt_dlp')
+
+
+# 다운로드 완료 파일 인덱스 (이미 받은 동영상은 다시 받지 않음)
+library = LibraryIndex()
+
+# UI 이벤트 큐 처리 간격 (ms), 한 번에 처리할 최대 이벤트 수
+UI_POLL_MS = 50
+UI_BATCH_MAX = 200
+
+# 로그 영역 최대 줄 수 (넘으면 오래된 줄부터 삭제 - 오래 켜 두어도 느려지지 않음)
+LOG_MAX_LINES = 1000
 
 
 class YouTubeAudioDownloader:
@@ -41,9 +62,19 @@ class YouTubeAudioDownloader:
         # 다운로드 폴더가 없으면 생성
         os.makedirs(self.download_path, exist_ok=True)
         
+        # 진행 상황 콜백 집계기 (다운로드마다 새로 생성)
+        self.progress_aggregator = ProgressAggregator()
+        
+        # 작업 스레드 → 메인 스레드 UI 이벤트 큐 (Tk 위젯은 스레드 안전하지 않음)
+        # ('log', 메시지) / ('status', 메시지, 색상) / ('call', 함수, 인자, 키워드 인자)
+        self.ui_events = queue.Queue()
+        
         # GUI 구성요소 초기화
         self.setup_ui()
         
+        # 메인 스레드에서 UI_POLL_MS마다 이벤트를 모아서 처리
+        self.root.after(UI_POLL_MS, self.process_ui_events)
+        
     def setup_ui(self):
         """GUI 레이아웃 설정"""
         
@@ -139,23 +170,71 @@ class YouTubeAudioDownloader:
     
     def add_log(self, message):
         """
-        로그 텍스트 영역에 메시지 추가
+        로그 텍스트 영역에 메시지 추가 (어느 스레드에서나 호출 가능)
         Args:
             message: 표시할 메시지
         """
-        self.log_text.insert(tk.END, f"{message}\n")
-        self.log_text.see(tk.END)  # 자동 스크롤
-        self.root.update_idletasks()  # UI 즉시 업데이트
+        self.ui_events.put(('log', message))
         
     def update_status(self, message, color="black"):
         """
-        상태 라벨 업데이트
+        상태 라벨 업데이트 (어느 스레드에서나 호출 가능)
         Args:
             message: 표시할 메시지
             color: 텍스트 색상
         """
-        self.status_label.config(text=message, foreground=color)
-        self.root.update_idletasks()
+        self.ui_events.put(('status', message, color))
+    
+    def run_on_ui(self, func, *args, **kwargs):
+        """
+        위젯 조작을 메인 스레드에서 실행하도록 예약 (버튼 상태, 프로그레스 바, 메시지 창)
+        Args:
+            func: 실행할 함수
+            *args, **kwargs: 함수 인자
+        """
+        self.ui_events.put(('call', func, args, kwargs))
+    
+    def process_ui_events(self):
+        """
+        UI 이벤트 큐 처리 (메인 스레드, root.after로 반복 호출)
+        - 한 번에 최대 UI_BATCH_MAX개를 꺼내 로그 줄은 모아서 한 번에 추가하고
+          상태는 마지막 것만 반영 (순서가 중요한 'call' 이벤트 앞에서는 먼저 반영)
+        """
+        lines = []
+        status = None
+        try:
+            for _ in range(UI_BATCH_MAX):
+                event = self.ui_events.get_nowait()
+                if event[0] == 'log':
+                    lines.append(event[1])
+                elif event[0] == 'status':
+                    status = event[1:]
+                else:
+                    self.apply_ui_updates(lines, status)
+                    lines, status = [], None
+                    event[1](*event[2], **event[3])
+        except queue.Empty:
+            pass
+        self.apply_ui_updates(lines, status)
+        self.root.after(UI_POLL_MS, self.process_ui_events)
+    
+    def apply_ui_updates(self, lines, status):
+        """
+        모아 둔 로그 줄과 상태를 위젯에 반영 (메인 스레드)
+        Args:
+            lines: 추가할 로그 메시지 목록
+            status: (메시지, 색상) 또는 None
+        """
+        if lines:
+            self.log_text.insert(tk.END, "".join(f"{line}\n" for line in lines))
+            # 최대 줄 수를 넘으면 오래된 줄 삭제 (마지막 빈 줄 제외하고 계산)
+            excess = int(self.log_text.index("end-1c").split(".")[0]) - 1 - LOG_MAX_LINES
+            if excess > 0:
+                self.log_text.delete("1.0", f"{excess + 1}.0")
+            self.log_text.see(tk.END)  # 자동 스크롤
+        if status is not None:
+            message, color = status
+            self.status_label.config(text=message, foreground=color)
         
     def validate_url(self, url):
         """
@@ -172,9 +251,13 @@ class YouTubeAudioDownloader:
     def progress_hook(self, d):
         """
         yt-dlp 다운로드 진행 상황 콜백 함수
+        - 초당 PROGRESS_MAX_RATE회까지만 화면 갱신 (단계 변경은 항상 반영)
         Args:
             d: 다운로드 진행 정보 딕셔너리
         """
+        if not self.progress_aggregator.sample(d):
+            return
+        
         if d['status'] == 'downloading':
             # 다운로드 중일 때 로그 업데이트
             percent = d.get('_percent_str', 'N/A')
@@ -186,31 +269,31 @@ class YouTubeAudioDownloader:
             self.add_log("다운로드 완료. FLAC 형식으로 변환 중...")
             self.update_status("FLAC 변환 중...", "orange")
     
-    def download_audio(self):
-        """실제 다운로드 실행 함수 (별도 스레드에서 실행)"""
-        
-        url = self.url_entry.get().strip()
-        
-        # URL 유효성 검사
-        if not url:
-            messagebox.showwarning("경고", "YouTube URL을 입력해주세요.")
-            return
-        
-        if not self.validate_url(url):
-            messagebox.showerror("오류", "올바른 YouTube URL이 아닙니다.")
-            return
-        
+    @profiler.wrap
+    def download_audio(self, url):
+        """
+        실제 다운로드 실행 함수 (별도 스레드에서 실행)
+        - 위젯은 직접 건드리지 않고 add_log/update_status/run_on_ui로 메인 스레드에 요청
+        Args:
+            url: YouTube URL (start_download에서 검사 완료)
+        """
         try:
-            # 다운로드 버튼 비활성화 (중복 클릭 방지)
-            self.download_button.config(state="disabled")
-            
-            # 프로그레스 바 시작
-            self.progress_bar.start(10)
-            
             self.add_log("=" * 60)
             self.add_log(f"다운로드 시작: {url}")
+            
+            # 이미 받은 동영상이면 기존 파일 반환 (다운로드/변환 생략)
+            existing = library.lookup(canonical_video_id(url))
+            if existing:
+                self.add_log("이미 다운로드한 동영상입니다. 기존 파일을 사용합니다.")
+                self.add_log(f"파일: {existing['path']}")
+                self.update_status("이미 다운로드됨", "green")
+                self.run_on_ui(messagebox.showinfo, "완료",
+                               f"이미 다운로드한 동영상입니다.\n\n파일: {existing['path']}")
+                return
             self.update_status("다운로드 준비 중...", "blue")
             
+            self.progress_aggregator = ProgressAggregator()
+            
             # yt-dlp 옵션 설정
             ydl_opts = {
                 # 오디오만 추출
@@ -236,24 +319,29 @@ class YouTubeAudioDownloader:
             
             # yt-dlp로 다운로드 실행
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                # 동영상 정보 가져오기
-                info = ydl.extract_info(url, download=False)
+                # 동영상 정보 가져오기 (한 번만 추출)
+                info, extract_seconds, _ = extract_info_once(ydl, url)
                 video_title = info.get('title', 'Unknown')
                 
                 self.add_log(f"제목: {video_title}")
+                self.add_log(f"정보 추출 {extract_seconds:.2f}초 (재추출 생략으로 절약)")
                 self.add_log("FLAC 고음질로 다운로드 중...")
                 
-                # 실제 다운로드 시작
-                ydl.download([url])
+                # 실제 다운로드 시작 (추출한 info 재사용)
+                result = ydl.process_ie_result(info, download=True)
+            
+            # 다운로드 완료 - 라이브러리에 등록
+            filepath = final_filepath(result, os.path.join(self.download_path, f"{video_title}.flac"))
+            library.record(info.get('id') or canonical_video_id(url), filepath, video_title)
             
-            # 다운로드 완료
-            self.progress_bar.stop()
+            self.run_on_ui(self.progress_bar.stop)
             self.add_log("✓ 다운로드 완료!")
             self.add_log(f"저장 위치: {self.download_path}")
             self.update_status("다운로드 완료!", "green")
             
             # 완료 메시지 표시
-            messagebox.showinfo(
+            self.run_on_ui(
+                messagebox.showinfo,
                 "완료",
                 f"다운로드가 완료되었습니다!\n\n"
                 f"파일명: {video_title}.flac\n"
@@ -262,24 +350,41 @@ class YouTubeAudioDownloader:
             
         except Exception as e:
             # 에러 발생 시 처리
-            self.progress_bar.stop()
+            self.run_on_ui(self.progress_bar.stop)
             error_message = f"오류 발생: {str(e)}"
             self.add_log(f"✗ {error_message}")
             self.update_status("다운로드 실패", "red")
-            messagebox.showerror("오류", error_message)
+            self.run_on_ui(messagebox.showerror, "오류", error_message)
             
         finally:
             # 항상 실행되는 코드 (자바의 finally와 동일)
-            self.download_button.config(state="normal")  # 버튼 다시 활성화
-            self.progress_bar.stop()
+            self.run_on_ui(self.download_button.config, state="normal")  # 버튼 다시 활성화
+            self.run_on_ui(self.progress_bar.stop)
     
     def start_download(self):
         """
-        다운로드 시작 버튼 클릭 시 호출
-        별도 스레드에서 다운로드를 실행하여 GUI가 멈추지 않도록 함
+        다운로드 시작 버튼 클릭 시 호출 (메인 스레드)
+        URL 검사와 위젯 조작은 여기서 하고, 다운로드는 별도 스레드에서 실행하여 GUI가 멈추지 않도록 함
         (자바의 SwingWorker와 유사한 개념)
         """
-        download_thread = threading.Thread(target=self.download_audio, daemon=True)
+        url = self.url_entry.get().strip()
+        
+        # URL 유효성 검사
+        if not url:
+            messagebox.showwarning("경고", "YouTube URL을 입력해주세요.")
+            return
+        
+        if not self.validate_url(url):
+            messagebox.showerror("오류", "올바른 YouTube URL이 아닙니다.")
+            return
+        
+        # 다운로드 버튼 비활성화 (중복 클릭 방지)
+        self.download_button.config(state="disabled")
+        
+        # 프로그레스 바 시작
+        self.progress_bar.start(10)
+        
+        download_thread = threading.Thread(target=self.download_audio, args=(url,), daemon=True)
         download_thread.start()
 
 
@@ -292,6 +397,9 @@ def main():
     # 애플리케이션 인스턴스 생성
     app = YouTubeAudioDownloader(root)
     
+    # 창이 그려진 뒤 yt-dlp를 백그라운드에서 미리 import
+    root.after_idle(warm_up, yt_dlp)
+    
     # GUI 이벤트 루프 시작 (윈도우가 닫힐 때까지 실행)
     root.mainloop()
 
@@ -4,24 +4,83 @@ YouTube 음원 다운로더 (FLAC) - 최종 안정 버전
 yt-dlp + 브라우저 쿠키 방식 (PO Token 문제 완전 해결)
 """
 
-from flask import Flask, request, jsonify
-import yt_dlp
+from flask import Flask, Response, request, jsonify
 import os
 from pathlib import Path
 import threading
+import time
 import sys
 import subprocess
 
+# 공용 모듈(저장소 루트의 yt_common 패키지) 사용을 위해 루트 경로 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from yt_common.cookies import CookieProvider, cookie_file_path, is_auth_error
+from yt_common.info_cache import InfoCache, extract_info_once, is_stale_url_error
+from yt_common.lazy import lazy_import, warm_up
+from yt_common.library import LibraryIndex
+from yt_common.metrics import PROMETHEUS_CONTENT_TYPE, YtDlpTimer, metrics
+from yt_common.profiling import profiler
+from yt_common.progress import LogBuffer, ProgressAggregator, status_payload, status_stream
+from yt_common.ratelimit import RateLimiter, is_rate_limit_error
+from yt_common.strategy import StrategyStats
+from yt_common.streaming import fetch_flac
+from yt_common.urls import canonical_video_id
+
+# yt-dlp는 import가 무거우므로 서버가 뜬 뒤 백그라운드에서 불러옴 (처음 사용 시 import)
+yt_dlp = lazy_import('yt_dlp')
+
 app = Flask(__name__)
 
+# 보관할 최대 로그 줄 수 (초과 시 오래된 로그부터 버림)
+LOG_CAPACITY = 1000
+
+# 스트리밍 모드 (YT_STREAMING=1): 받는 즉시 ffmpeg로 FLAC 변환, 원본 파일을 디스크에 쓰지 않음
+STREAMING = os.environ.get('YT_STREAMING') == '1'
+
+
 # 다운로드 상태
-status = {'state': 'ready', 'message': '대기 중', 'logs': []}
+# run: 다운로드 회차, run_start: 이번 회차 첫 로그의 순번
+status = {'state': 'ready', 'message': '대기 중', 'logs': LogBuffer(LOG_CAPACITY), 'run': 0, 'run_start': 0}
 status_lock = threading.Lock()
 
+# 상태 변경 알림 (SSE 스트림이 새 이벤트를 기다림)
+status_changed = threading.Condition(status_lock)
+
 # 다운로드 경로
 DOWNLOAD_PATH = str(Path.home() / "Downloads" / "YouTube_Audio")
 os.makedirs(DOWNLOAD_PATH, exist_ok=True)
 
+# 동영상 정보 디스크 캐시 (재시도/폴백 시 재추출 방지)
+info_cache = InfoCache()
+
+# 다운로드 완료 파일 인덱스 (이미 받은 동영상은 다시 받지 않음)
+library = LibraryIndex()
+
+# 쿠키 저장소 (한 번 불러와 모든 작업이 공유, 쿠키 파일이 바뀌거나 인증 오류가 나면 다시 불러옴)
+# YT_COOKIES 환경변수로 cookies.txt 경로를 주면 Chrome 대신 그 파일 사용
+cookies = CookieProvider(cookie_file_path(os.environ.get('YT_COOKIES')) or 'chrome')
+safari_cookies = CookieProvider('safari')
+cookie_providers = {provider.name: provider for provider in (cookies, safari_cookies)}
+
+# 쿠키 출처별 추가 yt-dlp 옵션 (기본 출처만 백업 옵션 사용, Safari 재시도는 기본 옵션 그대로)
+provider_opts = {
+    cookies.name: {
+        'extractor_args': {
+            'youtube': {
+                'player_client': ['android', 'web'],
+                'skip': ['dash', 'hls'],
+            }
+        },
+    },
+}
+
+# 쿠키 출처별 성공률 (잘 되는 출처부터 시도, /strategies에서 확인)
+strategies = StrategyStats()
+STRATEGY_SCOPE = 'ytdlp.cookies'
+
+# 정보 추출/다운로드 요청 스케줄러 (429 감지 시 백오프 후 천천히 회복)
+rate_limiter = RateLimiter()
+
 
 def log(msg):
     """로그 추가"""
@@ -29,6 +88,7 @@ def log(msg):
     with status_lock:
         status['logs'].append(msg)
         status['message'] = msg
+        status_changed.notify_all()
 
 
 def set_status(state, msg):
@@ -37,11 +97,18 @@ def set_status(state, msg):
         status['state'] = state
         status['message'] = msg
         status['logs'].append(msg)
+        status_changed.notify_all()
     print(f"[STATUS] {state}: {msg}", flush=True)
 
 
+# 현재 다운로드의 진행 상황 집계기 (download_task 시작 시 새로 생성)
+progress_aggregator = ProgressAggregator()
+
+
 def progress_hook(d):
-    """다운로드 진행 상황"""
+    """다운로드 진행 상황 (초당 PROGRESS_MAX_RATE회로 제한)"""
+    if not progress_aggregator.sample(d):
+        return
     if d['status'] == 'downloading':
         percent = d.get('_percent_str', 'N/A').strip()
         set_status('downloading', f"다운로드 중 {percent}")
@@ -49,104 +116,150 @@ def progress_hook(d):
         set_status('converting', "FLAC 변환 중...")
 
 
+def run_download(url, provider):
+    """
+    쿠키 저장소 하나로 정보 추출 + 다운로드
+    Args:
+        url: YouTube URL
+        provider: CookieProvider
+    Returns:
+        tuple: (FLAC 경로, info dict)
+    """
+    # 다운로드/변환 단계 계측 (/metrics)
+    timer = YtDlpTimer()
+    
+    # yt-dlp 옵션 (브라우저 쿠키 사용 - 핵심!)
+    opts = {
+        'format': 'bestaudio/best',
+        'outtmpl': os.path.join(DOWNLOAD_PATH, '%(title)s.%(ext)s'),
+        'postprocessors': [{
+            'key': 'FFmpegExtractAudio',
+            'preferredcodec': 'flac',
+        }],
+        'progress_hooks': [progress_hook, timer.hook],
+        'noplaylist': True,
+        'quiet': True,
+        
+        # 백업 옵션 (쿠키 출처별)
+        **provider_opts.get(provider.name, {}),
+    }
+    
+    log(f"yt-dlp 초기화 중 ({provider.name} 쿠키 사용)...")
+    
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        # 핵심: 브라우저 쿠키 사용 (작업마다 복호화하지 않고 공유 저장소 사용)
+        provider.apply(ydl)
+        log("동영상 정보 가져오는 중...")
+        info, extract_seconds, cache_hit = extract_info_once(ydl, url, cache=info_cache, rate_limiter=rate_limiter)
+        log(f"제목: {info.get('title', 'Unknown')}")
+        if cache_hit:
+            log("캐시된 동영상 정보 사용 (추출 생략)")
+        else:
+            log(f"정보 추출 {extract_seconds:.2f}초 (재추출 생략으로 절약)")
+        log("다운로드 시작...")
+        filepath = fetch_flac(
+            ydl, info, timer, DOWNLOAD_PATH, STREAMING, [progress_hook], rate_limiter, log
+        )
+    return filepath, info
+
+
+@profiler.wrap
 def download_task(url):
-    """다운로드 실행 - yt-dlp with cookies"""
-    try:
-        # URL 정리
+    """
+    다운로드 실행 - yt-dlp with cookies
+    - 쿠키 출처(Chrome/Safari 등)는 최근 성공률이 높은 순서로 시도 (STRATEGY_SCOPE 기록)
+    - 쿠키 문제로 보이는 오류면 다음 출처로 재시도, 그 외 오류는 바로 종료
+    """
+    global progress_aggregator
+    
+    # URL 정리
+    with metrics.stage('normalize'):
         if '&list=' in url or '?list=' in url:
             url = url.split('&list=')[0].split('?list=')[0]
             log("플레이리스트 파라미터 제거됨")
+        video_id = canonical_video_id(url)
+    
+    log(f"URL: {url}")
+    
+    # 라이브러리/전략 저장소(SQLite) 오류도 작업을 '실행 중'에 남기지 않고 오류 상태로 끝냄
+    try:
+        # 이미 받은 동영상이면 기존 파일 반환 (다운로드/변환 생략)
+        existing = library.lookup(video_id)
+        if existing:
+            metrics.job('skipped')
+            set_status('complete', f"완료: {os.path.basename(existing['path'])} (이미 다운로드됨)")
+            log(f"저장 위치: {existing['path']}")
+            return
         
-        log(f"URL: {url}")
         set_status('downloading', '준비 중...')
         
-        # yt-dlp 옵션 (브라우저 쿠키 사용 - 핵심!)
-        opts = {
-            'format': 'bestaudio/best',
-            'outtmpl': os.path.join(DOWNLOAD_PATH, '%(title)s.%(ext)s'),
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'flac',
-            }],
-            'progress_hooks': [progress_hook],
-            'noplaylist': True,
-            'quiet': True,
-            
-            # 핵심: Chrome 브라우저 쿠키 사용
-            'cookiesfrombrowser': ('chrome',),
-            
-            # 백업 옵션
-            'extractor_args': {
-                'youtube': {
-                    'player_client': ['android', 'web'],
-                    'skip': ['dash', 'hls'],
-                }
-            },
-        }
-        
-        log("yt-dlp 초기화 중 (Chrome 쿠키 사용)...")
-        
-        with yt_dlp.YoutubeDL(opts) as ydl:
-            log("동영상 정보 가져오는 중...")
-            info = ydl.extract_info(url, download=False)
-            title = info.get('title', 'Unknown')
-            log(f"제목: {title}")
-            log("다운로드 시작...")
-            ydl.download([url])
-        
-        set_status('complete', f'완료: {title}.flac')
-        log(f"저장 위치: {DOWNLOAD_PATH}/{title}.flac")
-        
+        order = strategies.order(STRATEGY_SCOPE, list(cookie_providers))
     except Exception as e:
-        error = str(e)
-        
-        # 쿠키 관련 에러 체크
-        if 'cookie' in error.lower() or 'browser' in error.lower():
-            set_status('error', 'Chrome 브라우저를 찾을 수 없습니다. Safari를 시도합니다...')
-            # Safari로 재시도
-            try_safari(url)
-        elif 'rate-limited' in error.lower():
-            set_status('error', 'YouTube 제한: 1시간 후 재시도')
-        elif '403' in error or 'Forbidden' in error:
-            set_status('error', 'YouTube 접근 거부: Chrome에서 YouTube에 로그인 후 재시도')
-        elif '400' in error or 'Bad Request' in error:
-            set_status('error', 'YouTube API 오류: Safari 브라우저 쿠키로 재시도 중...')
-            try_safari(url)
-        else:
-            set_status('error', f'오류: {error[:200]}')
-        
-        print(f"[ERROR] {error}", flush=True)
-
-
-def try_safari(url):
-    """Safari 쿠키로 재시도"""
-    try:
-        log("Safari 브라우저 쿠키로 재시도...")
-        
-        opts = {
-            'format': 'bestaudio/best',
-            'outtmpl': os.path.join(DOWNLOAD_PATH, '%(title)s.%(ext)s'),
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'flac',
-            }],
-            'progress_hooks': [progress_hook],
-            'noplaylist': True,
-            'quiet': True,
-            'cookiesfrombrowser': ('safari',),  # Safari 쿠키
-        }
+        print(f"[ERROR] {e}", flush=True)
+        metrics.job('failed')
+        set_status('error', f'오류: {str(e)[:200]}')
+        return
+    
+    for index, name in enumerate(order):
+        provider = cookie_providers[name]
+        next_name = order[index + 1] if index + 1 < len(order) else None
+        progress_aggregator = ProgressAggregator()
+        started = time.monotonic()
+        if index:
+            metrics.fallback(STRATEGY_SCOPE, name)
         
-        with yt_dlp.YoutubeDL(opts) as ydl:
-            info = ydl.extract_info(url, download=False)
-            title = info.get('title', 'Unknown')
-            log(f"제목: {title}")
-            ydl.download([url])
+        try:
+            filepath, info = run_download(url, provider)
+        except Exception as e:
+            error = str(e)
+            
+            # 캐시된 스트림 URL이 만료되었을 수 있으므로 캐시 무효화
+            if is_stale_url_error(error):
+                info_cache.delete(video_id)
+            
+            # 쿠키가 만료되었을 수 있으므로 다음 작업에서 다시 불러옴
+            if is_auth_error(error):
+                provider.invalidate()
+            
+            print(f"[ERROR] {error}", flush=True)
+            
+            # Rate Limit은 쿠키 출처 탓이 아니므로 성공률에 기록하지 않고 요청 속도를 낮춤
+            if is_rate_limit_error(error):
+                backoff = rate_limiter.penalize()
+                metrics.job('failed')
+                set_status('error', f'YouTube 제한: 요청 속도를 낮췄습니다 ({backoff:.0f}초 후 다시 시도 가능)')
+                return
+            
+            strategies.record(STRATEGY_SCOPE, name, False, time.monotonic() - started)
+            
+            # 쿠키 관련 에러 / API 오류 → 다음 쿠키 출처로 재시도
+            retry = ('cookie' in error.lower() or 'browser' in error.lower()
+                     or '400' in error or 'Bad Request' in error)
+            if retry and next_name:
+                metrics.retry('cookies')
+                set_status('error', f'{name} 쿠키로 실패했습니다. {next_name} 쿠키로 재시도 중...')
+                log(f"{name} 오류: {error[:100]}")
+                continue
+            
+            metrics.job('failed')
+            if '403' in error or 'Forbidden' in error:
+                set_status('error', f'YouTube 접근 거부: {name}에서 YouTube에 로그인 후 재시도')
+            elif retry:
+                set_status('error', '모든 쿠키 출처 실패: YouTube에 로그인 필요')
+            else:
+                set_status('error', f'오류: {error[:200]}')
+            return
         
-        set_status('complete', f'완료: {title}.flac (Safari 쿠키 사용)')
+        strategies.record(STRATEGY_SCOPE, name, True, time.monotonic() - started)
+        rate_limiter.success()
+        title = info.get('title', 'Unknown')
+        with metrics.stage('write'):
+            library.record(info.get('id') or video_id, filepath, title)
+        metrics.job('ok')
         
-    except Exception as e2:
-        set_status('error', f'Safari도 실패: YouTube에 로그인 필요')
-        log(f"Safari 오류: {str(e2)[:100]}")
+        set_status('complete', f'완료: {title}.flac ({name} 쿠키 사용)')
+        log(f"저장 위치: {filepath}")
+        return
 
 
 @app.route('/')
@@ -334,7 +447,7 @@ def index():
     </div>
     
     <script>
-        let interval;
+        let eventSource = null;
         
         function download() {{
             const url = document.getElementById('url').value.trim();
@@ -362,37 +475,45 @@ def index():
                 method: 'POST',
                 headers: {{'Content-Type': 'application/json'}},
                 body: JSON.stringify({{url: url}})
-            }});
-            
-            interval = setInterval(checkStatus, 500);
+            }}).then(() => watchStatus());
         }}
         
-        function checkStatus() {{
-            fetch('/status')
-                .then(r => r.json())
-                .then(data => {{
-                    const statusDiv = document.getElementById('status');
-                    statusDiv.textContent = data.message;
-                    statusDiv.className = 'status ' + data.state;
-                    
-                    const log = document.getElementById('log');
-                    log.textContent = data.logs.join('\\n');
-                    log.scrollTop = log.scrollHeight;
-                    
-                    const progressFill = document.getElementById('progress-fill');
-                    if (data.state === 'downloading') {{
-                        progressFill.style.width = '50%';
-                    }} else if (data.state === 'converting') {{
-                        progressFill.style.width = '80%';
-                    }} else if (data.state === 'complete') {{
-                        progressFill.style.width = '100%';
-                    }}
-                    
-                    if (data.state === 'complete' || data.state === 'error') {{
-                        clearInterval(interval);
-                        document.querySelector('button').disabled = false;
-                    }}
+        function watchStatus() {{
+            if (eventSource) {{
+                eventSource.close();
+            }}
+            // 서버 푸시 구독 (새 로그와 상태 변경만 수신)
+            eventSource = new EventSource('/events');
+            eventSource.addEventListener('update', event => {{
+                const data = JSON.parse(event.data);
+                const statusDiv = document.getElementById('status');
+                statusDiv.textContent = data.message;
+                statusDiv.className = 'status ' + data.state;
+                
+                const log = document.getElementById('log');
+                if (data.reset) {{
+                    log.textContent = '';
+                }}
+                data.logs.forEach(line => {{
+                    log.textContent += line + '\\n';
                 }});
+                log.scrollTop = log.scrollHeight;
+                
+                const progressFill = document.getElementById('progress-fill');
+                if (data.state === 'downloading') {{
+                    progressFill.style.width = '50%';
+                }} else if (data.state === 'converting') {{
+                    progressFill.style.width = '80%';
+                }} else if (data.state === 'complete') {{
+                    progressFill.style.width = '100%';
+                }}
+                
+                if (data.state === 'complete' || data.state === 'error') {{
+                    eventSource.close();
+                    eventSource = null;
+                    document.querySelector('button').disabled = false;
+                }}
+            }});
         }}
     </script>
 </body>
@@ -409,7 +530,10 @@ def download():
     with status_lock:
         status['state'] = 'downloading'
         status['message'] = '시작...'
-        status['logs'] = ['다운로드 요청']
+        status['run'] += 1  # 새 다운로드 - SSE 클라이언트 로그 초기화
+        status['run_start'] = status['logs'].next_seq
+        status['logs'].append('다운로드 요청')
+        status_changed.notify_all()
     
     thread = threading.Thread(target=download_task, args=(url,), daemon=True)
     thread.start()
@@ -417,11 +541,38 @@ def download():
     return jsonify({'status': 'started'})
 
 
+@app.route('/strategies')
+def get_strategies():
+    """쿠키 출처별 성공률/소요 시간과 요청 스케줄러 상태"""
+    return jsonify({
+        'strategies': strategies.stats(STRATEGY_SCOPE),
+        'rate_limiter': rate_limiter.stats(),
+    })
+
+
+@app.route('/metrics')
+def get_metrics():
+    """단계별 소요 시간, 받은 바이트, 재시도/폴백/오류 수 (Prometheus 텍스트 형식)"""
+    return Response(metrics.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
 @app.route('/status')
 def get_status():
-    """상태 확인"""
-    with status_lock:
-        return jsonify(status.copy())
+    """
+    상태 확인
+    - /status?since=<seq> : 해당 순번 이후의 로그만 반환 (기본값: 이번 다운로드의 처음부터)
+    """
+    return jsonify(status_payload(status, status_lock, request.args.get('since', type=int)))
+
+
+@app.route('/events')
+def events():
+    """상태 푸시 스트림 (SSE) - 새 로그와 상태 변경만 전송"""
+    return Response(
+        status_stream(status, status_changed),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 
 if __name__ == '__main__':
@@ -434,7 +585,11 @@ if __name__ == '__main__':
     print("   1. Chrome 또는 Safari에서 YouTube에 로그인")
     print("   2. 아무 동영상이나 재생")
     print("   3. 이 프로그램 사용")
+    print(f"\n쿠키: {cookies.name} (YT_COOKIES=cookies.txt 경로로 변경 가능, 한 번 불러와 모든 작업이 공유)")
     print("\n브라우저에서 열기: http://127.0.0.1:5000")
+    print("지표 (Prometheus): http://127.0.0.1:5000/metrics")
+    if profiler.enabled:
+        print(f"작업별 프로파일링: {profiler.describe()} (YT_PROFILE 환경변수로 변경)")
     print("종료: Ctrl+C\n")
     print("=" * 70)
     print()
@@ -442,4 +597,7 @@ if __name__ == '__main__':
     import webbrowser
     threading.Timer(1.5, lambda: webbrowser.open('http://127.0.0.1:5000')).start()
     
+    # 서버가 요청을 받는 동안 yt-dlp를 백그라운드에서 미리 import
+    warm_up(yt_dlp)
+    
     app.run(host='127.0.0.1', port=5000, debug=False, threaded=True, use_reloader=False)
@@ -0,0 +1,11 @@
+"""
+YouTube 음원 다운로더 공용 모듈
+- 여러 버전(web, yt-dlp, simple, cli 등)이 함께 사용하는 캐시와 유틸리티
+- 하위 폴더의 스크립트는 저장소 루트를 sys.path에 추가한 뒤 import 합니다
+"""
+
+import os
+from pathlib import Path
+
+# 캐시/인덱스 파일 저장 위치 (YT_CACHE_DIR 환경변수로 변경 가능)
+CACHE_DIR = Path(os.environ.get('YT_CACHE_DIR', Path.home() / '.cache' / 'youtube_audio_downloader'))
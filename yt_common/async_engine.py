@@ -0,0 +1,249 @@
+"""
+asyncio 기반 다운로드 엔진
+
+- 이벤트 루프 하나에서 수백 개의 작업을 동시에 진행 (작업마다 스레드를 만들지 않음)
+- ffmpeg는 asyncio.create_subprocess_exec로 실행하고 진행 상황은 파이프로 수신
+  (streamlink/ 버전은 프로세스 내부 streamlink 세션을 쓰므로 이 엔진을 사용하지 않음)
+- 블로킹 작업(yt-dlp 정보 추출)만 작은 스레드 풀에서 실행
+- Flask 앱처럼 스레드 기반 코드에서는 AsyncEngine.submit()으로 작업을 넘기고,
+  CLI에서는 asyncio.run(download_flac(...))으로 바로 실행
+"""
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from yt_common.metrics import metrics
+from yt_common.streaming import selected_format
+from yt_common.transcode import FFmpegError, flac_args
+
+# 기본 설정
+DEFAULT_MAX_JOBS = 64        # 동시에 진행할 최대 작업 수 (ffmpeg 프로세스 수)
+DEFAULT_EXTRACT_WORKERS = 4  # yt-dlp 정보 추출용 스레드 수
+STDERR_TAIL_LINES = 20       # 오류 메시지에 포함할 ffmpeg 출력 줄 수
+
+
+class AsyncEngine:
+    """
+    백그라운드 스레드에서 이벤트 루프를 돌리는 작업 엔진
+
+    Examples:
+        >>> engine = AsyncEngine()
+        >>> future = engine.submit(download_flac(url, DOWNLOAD_PATH))
+        >>> future.result()  # concurrent.futures.Future
+    """
+
+    def __init__(self, max_jobs=DEFAULT_MAX_JOBS, extract_workers=DEFAULT_EXTRACT_WORKERS):
+        """
+        Args:
+            max_jobs (int): 동시에 진행할 최대 작업 수
+            extract_workers (int): 블로킹 작업용 스레드 수
+        """
+        self.max_jobs = max_jobs
+        self.loop = asyncio.new_event_loop()
+        self.loop.set_default_executor(
+            ThreadPoolExecutor(max_workers=extract_workers, thread_name_prefix='extract')
+        )
+        self._semaphore = asyncio.Semaphore(max_jobs)
+        self._thread = threading.Thread(target=self._run, name='async-engine', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        """이벤트 루프 실행 (전용 스레드)"""
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    async def _limited(self, coro):
+        """동시 작업 수 제한"""
+        async with self._semaphore:
+            return await coro
+
+    def submit(self, coro):
+        """
+        코루틴을 엔진에 제출 (어느 스레드에서나 호출 가능)
+
+        Args:
+            coro: 실행할 코루틴
+
+        Returns:
+            concurrent.futures.Future: 결과/예외를 담는 Future
+        """
+        return asyncio.run_coroutine_threadsafe(self._limited(coro), self.loop)
+
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    블로킹 함수를 현재 루프의 기본 스레드 풀에서 실행
+
+    Args:
+        func: 실행할 함수
+
+    Returns:
+        함수 반환값
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+
+async def _read_tail(stream, limit=STDERR_TAIL_LINES):
+    """스트림을 끝까지 읽고 마지막 limit줄만 반환 (파이프가 가득 차 멈추는 것 방지)"""
+    lines = []
+    async for line in stream:
+        lines.append(line.decode('utf-8', 'replace').rstrip())
+        del lines[:-limit]
+    return '\n'.join(lines)
+
+
+async def _kill(proc):
+    """프로세스 강제 종료 후 회수"""
+    if proc.returncode is None:
+        try:
+            proc.kill()
+        except ProcessLookupError:
+            pass
+        await proc.wait()
+
+
+async def run_ffmpeg(args, duration=None, on_progress=None, stdin=None):
+    """
+    ffmpeg 비동기 실행 (-progress 출력으로 진행 상황 수신)
+
+    Args:
+        args (list): 입력/출력 등 ffmpeg 인자
+        duration (float): 전체 길이 (초) - 있으면 진행률(%) 계산
+        on_progress: 콜백 (처리한 초, 진행률 또는 None)
+        stdin: 입력 파이프 (asyncio.subprocess.PIPE 등, 없으면 stdin 사용 안 함)
+
+    Returns:
+        tuple: (asyncio.subprocess.Process, 종료 대기 태스크)
+               stdin을 PIPE로 넘긴 경우 호출자가 proc.stdin에 쓴 뒤 태스크를 await
+               (그 외에는 이미 완료된 프로세스와 태스크)
+
+    Raises:
+        FFmpegError: ffmpeg가 0이 아닌 코드로 종료했을 때
+    """
+    cmd = ['ffmpeg', '-hide_banner', '-y', '-progress', 'pipe:1', '-nostats']
+    if stdin is None:
+        cmd.append('-nostdin')
+    cmd += list(args)
+
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdin=stdin if stdin is not None else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    watcher = asyncio.ensure_future(_watch_ffmpeg(proc, duration, on_progress))
+    if stdin is None:
+        await watcher
+    return proc, watcher
+
+
+async def _watch_ffmpeg(proc, duration, on_progress):
+    """ffmpeg 진행 상황 파싱 및 종료 대기"""
+    stderr_task = asyncio.ensure_future(_read_tail(proc.stderr))
+    try:
+        async for raw in proc.stdout:
+            key, _, value = raw.decode('ascii', 'replace').strip().partition('=')
+            if key == 'out_time_us' and on_progress and value.isdigit():
+                seconds = int(value) / 1_000_000
+                percent = min(100.0, seconds * 100 / duration) if duration else None
+                on_progress(seconds, percent)
+        returncode = await proc.wait()
+        tail = await stderr_task
+    except asyncio.CancelledError:
+        await _kill(proc)
+        stderr_task.cancel()
+        raise
+
+    if returncode != 0:
+        raise FFmpegError(returncode, tail)
+
+
+async def transcode_url_to_flac(stream_url, output_path, headers=None, duration=None, on_progress=None):
+    """
+    스트림 URL을 ffmpeg로 직접 읽어 FLAC로 저장
+
+    네트워크 I/O도 ffmpeg 프로세스가 처리하므로 Python 스레드를 점유하지 않음
+    완성 전에는 .part 파일에 쓰고 성공 시 이름 변경
+
+    Args:
+        stream_url (str): 오디오 스트림 URL
+        output_path (str): 저장할 FLAC 경로
+        headers (dict): HTTP 헤더 (yt-dlp http_headers)
+        duration (float): 전체 길이 (초)
+        on_progress: 콜백 (처리한 초, 진행률)
+    """
+    args = []
+    if headers:
+        args += ['-headers', ''.join(f"{key}: {value}\r\n" for key, value in headers.items())]
+    partial = output_path + '.part'
+    args += ['-i', stream_url, *flac_args(), partial]
+
+    try:
+        # ffmpeg가 받기와 인코딩을 함께 처리하므로 전체를 download 단계로 기록
+        with metrics.stage('download'):
+            await run_ffmpeg(args, duration, on_progress)
+    except BaseException:
+        with metrics.stage('cleanup'):
+            if os.path.exists(partial):
+                os.remove(partial)
+        raise
+    with metrics.stage('write'):
+        os.replace(partial, output_path)
+
+
+def extract_stream_info(url, ydl_opts=None):
+    """
+    yt-dlp로 최고 음질 오디오 포맷 정보 추출 (블로킹 - run_blocking으로 호출)
+
+    Args:
+        url (str): YouTube URL
+        ydl_opts (dict): 추가 yt-dlp 옵션 (쿠키 등)
+
+    Returns:
+        dict: 포맷이 선택된 info dict
+    """
+    import yt_dlp
+
+    opts = {'format': 'bestaudio/best', 'noplaylist': True, 'quiet': True}
+    opts.update(ydl_opts or {})
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        return ydl.extract_info(url, download=False)
+
+
+async def download_flac(url, output_dir, ydl_opts=None, on_progress=None, rate_limiter=None):
+    """
+    YouTube URL → FLAC 파일 (정보 추출은 스레드 풀, 다운로드/변환은 ffmpeg 프로세스)
+
+    Args:
+        url (str): YouTube URL
+        output_dir (str): 저장 폴더
+        ydl_opts (dict): 추가 yt-dlp 옵션
+        on_progress: 콜백 (처리한 초, 진행률)
+        rate_limiter: RateLimiter - 있으면 정보 추출과 다운로드 요청 전에 차례를 기다림
+
+    Returns:
+        tuple: (저장된 파일 경로, info dict)
+    """
+    from yt_dlp.utils import sanitize_filename
+
+    if rate_limiter is not None:
+        await rate_limiter.acquire_async()
+    with metrics.stage('extract'):
+        info = await run_blocking(extract_stream_info, url, ydl_opts)
+    fmt = selected_format(info)
+    if not fmt.get('url'):
+        raise Exception("오디오 스트림 URL을 찾을 수 없습니다.")
+
+    output_path = os.path.join(
+        str(output_dir), sanitize_filename(info.get('title') or info['id']) + '.flac'
+    )
+    if rate_limiter is not None:
+        await rate_limiter.acquire_async()
+    await transcode_url_to_flac(
+        fmt['url'], output_path, fmt.get('http_headers'), info.get('duration'), on_progress
+    )
+    return output_path, info
@@ -0,0 +1,340 @@
+"""
+다운로드 백엔드 공통 인터페이스와 헤지(hedged) 실행
+
+yt-dlp, pytube, streamlink는 모두 "URL → 오디오 바이트 스트림"으로 볼 수 있으므로
+같은 인터페이스(Backend.open)로 감싸고, 어느 백엔드에서 받든 stream_to_flac으로 저장합니다.
+
+헤지 실행 (hedged_open):
+- 첫 번째 백엔드를 시작하고 budget초 안에 첫 바이트가 오지 않으면 다음 백엔드를 함께 시작
+- 먼저 첫 바이트를 받은 백엔드가 이기고 나머지는 바로 취소
+  (백엔드마다 CancelToken을 주고 승자가 정해지면 나머지를 취소 - 정보 추출 중이면 추출이 끝나는 즉시,
+  응답을 기다리는 중이면 소켓을 끊어 바로 멈춤)
+- 실행 중인 백엔드가 모두 실패하면 기다리지 않고 바로 다음 백엔드 시작
+- 한 경로가 멈추는 동영상에서 전체 실패를 기다린 뒤 폴백하던 지연(꼬리 지연)을 줄임
+"""
+
+import itertools
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from yt_common.lazy import lazy_import
+from yt_common.metrics import metrics
+from yt_common.streaming import CancelToken, Cancelled, http_chunks, selected_format
+
+yt_dlp = lazy_import('yt_dlp')
+
+# 다음 백엔드를 함께 시작하기 전까지 기다리는 시간 (초)
+DEFAULT_HEDGE_BUDGET = 4.0
+
+# 스트림을 읽는 단위 (streamlink 비 HTTP 스트림 → ffmpeg stdin)
+READ_SIZE = 64 * 1024
+
+# 오디오 전용 스트림 선호 순서 (streamlink YouTube 플러그인 스트림 이름)
+AUDIO_STREAM_PREFERENCE = ('audio_opus', 'audio_mp4a')
+
+
+class HedgeError(Exception):
+    """모든 백엔드가 실패했을 때 (백엔드별 오류 포함)"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        details = '; '.join(f"{name}: {error}" for name, error in errors)
+        super().__init__(f"모든 백엔드 실패 - {details}")
+
+
+class AudioSource:
+    """
+    백엔드가 연 오디오 스트림
+
+    Attributes:
+        backend (str): 백엔드 이름
+        title (str): 동영상 제목
+        video_id (str): 동영상 ID
+        chunks: (데이터 조각, 전체 크기) 반복자 - stream_to_flac 형식
+        first_byte_seconds (float): 시작부터 첫 바이트까지 걸린 시간 (hedged_open이 기록)
+    """
+
+    def __init__(self, backend, title, video_id, chunks):
+        self.backend = backend
+        self.title = title or 'Unknown'
+        self.video_id = video_id
+        self.chunks = chunks
+        self.first_byte_seconds = None
+
+
+class Backend(ABC):
+    """
+    다운로드 백엔드 인터페이스
+
+    open(url)은 동영상 정보를 가져와 오디오 스트림을 열고 AudioSource를 반환합니다.
+    실제 데이터는 chunks를 읽을 때 받습니다.
+    """
+
+    name = None
+
+    @abstractmethod
+    def open(self, url, cancel=None):
+        """
+        Args:
+            url (str): YouTube URL
+            cancel (CancelToken): 취소 신호 (선택) - chunks가 읽기 전후로 확인하고, 취소되면 응답을 끊음
+
+        Returns:
+            AudioSource
+        """
+
+
+class YtDlpBackend(Backend):
+    """yt-dlp로 포맷을 고른 뒤 HTTP Range 요청으로 받음"""
+
+    name = 'yt-dlp'
+
+    def __init__(self, ydl_opts=None, cookies=None):
+        """
+        Args:
+            ydl_opts (dict): 추가 yt-dlp 옵션
+            cookies: CookieProvider (선택)
+        """
+        self.ydl_opts = ydl_opts or {}
+        self.cookies = cookies
+
+    def open(self, url, cancel=None):
+        opts = {
+            'format': 'bestaudio/best',
+            'noplaylist': True,
+            'quiet': True,
+            'no_warnings': True,
+            **self.ydl_opts,
+        }
+        with yt_dlp.YoutubeDL(opts) as ydl, metrics.stage('extract'):
+            if self.cookies is not None:
+                self.cookies.apply(ydl)
+            info = ydl.extract_info(url, download=False)
+
+        fmt = selected_format(info)
+        if not fmt.get('url') or fmt.get('protocol', 'https') not in ('http', 'https'):
+            raise Exception(f"스트리밍할 수 없는 포맷입니다: {fmt.get('format_id')} ({fmt.get('protocol')})")
+        return AudioSource(self.name, info.get('title'), info.get('id'),
+                           http_chunks(fmt['url'], fmt.get('http_headers'), cancel=cancel))
+
+
+class PytubeBackend(Backend):
+    """pytube로 가장 높은 비트레이트의 오디오 스트림을 골라 받음"""
+
+    name = 'pytube'
+
+    def open(self, url, cancel=None):
+        from pytube import YouTube
+
+        with metrics.stage('extract'):
+            yt = YouTube(url)
+            stream = yt.streams.filter(only_audio=True).order_by('abr').desc().first()
+        if stream is None:
+            raise Exception("오디오 스트림을 찾을 수 없습니다")
+        return AudioSource(self.name, yt.title, yt.video_id, http_chunks(stream.url, cancel=cancel))
+
+
+class StreamlinkBackend(Backend):
+    """
+    streamlink 세션(프로세스 내부)으로 오디오 전용 스트림을 받음
+
+    streamlink/ 버전도 같은 세션, 스트림 선택, 조각 읽기를 사용
+    (resolve → select_audio_stream → stream_chunks 단계를 직접 호출해 이어받기 경로를 끼워 넣음)
+    """
+
+    name = 'streamlink'
+
+    def __init__(self):
+        self._session = None
+        self._lock = threading.Lock()
+
+    def get_session(self):
+        """
+        재사용하는 streamlink 세션 (처음 사용할 때 생성)
+
+        플러그인 로드와 HTTP 연결 풀을 한 번만 준비하므로
+        곡마다 streamlink 인터프리터를 띄우는 비용이 없음
+        """
+        with self._lock:
+            if self._session is None:
+                from streamlink import Streamlink
+                self._session = Streamlink()
+            return self._session
+
+    def resolve(self, url):
+        """
+        URL을 처리할 플러그인을 찾아 스트림 목록 획득
+
+        Returns:
+            tuple: (플러그인 객체, 스트림 이름 → 스트림 객체)
+
+        Raises:
+            NoPluginError, PluginError: streamlink 오류 그대로
+        """
+        session = self.get_session()
+        with metrics.stage('extract'):
+            _, plugin_class, resolved_url = session.resolve_url(url)
+            plugin = plugin_class(session, resolved_url)
+            streams = plugin.streams()
+        return plugin, streams
+
+    @staticmethod
+    def select_audio_stream(streams):
+        """
+        오디오 전용 스트림 우선 선택
+
+        YouTube 플러그인은 audio_opus, audio_mp4a 같은 오디오 전용 스트림을 제공하므로
+        비디오 바이트를 받았다가 ffmpeg에서 버리지 않아도 됨
+
+        Returns:
+            tuple: (스트림 이름, 스트림 객체) - 오디오 전용이 없으면 'best'
+        """
+        name = next((n for n in AUDIO_STREAM_PREFERENCE if n in streams), None)
+        name = name or next((n for n in streams if n.startswith('audio')), 'best')
+        return name, streams[name]
+
+    @staticmethod
+    def stream_chunks(stream, cancel=None):
+        """
+        스트림을 열어 조각 단위로 읽기 (취소되면 스트림을 닫음)
+
+        ffmpeg stdin 쓰기가 막히면 다음 읽기도 멈추므로 메모리에 쌓이지 않음 (배압)
+
+        Yields:
+            tuple: (데이터 조각, None) - stream_to_flac 형식
+        """
+        started = time.perf_counter()
+        fd = stream.open()
+        unregister = cancel.on_cancel(fd.close) if cancel is not None else None
+        try:
+            for chunk in iter(lambda: fd.read(READ_SIZE), b''):
+                if cancel is not None:
+                    cancel.check()
+                if started is not None:
+                    metrics.observe('first_byte', time.perf_counter() - started)
+                    started = None
+                metrics.add_bytes(len(chunk))
+                yield chunk, None
+        finally:
+            if unregister is not None:
+                unregister()
+            fd.close()
+
+    def open(self, url, cancel=None):
+        plugin, streams = self.resolve(url)
+        if not streams:
+            raise Exception("재생 가능한 스트림을 찾을 수 없습니다")
+        _, stream = self.select_audio_stream(streams)
+
+        # HTTP 스트림은 Range 요청으로 나눠 받음 (한 번에 큰 범위를 요청하면 속도 제한)
+        stream_info = stream.__json__()
+        if stream_info.get('type') == 'http' and stream_info.get('url'):
+            chunks = http_chunks(stream_info['url'], stream_info.get('headers'), cancel=cancel)
+        else:
+            chunks = self.stream_chunks(stream, cancel)
+        return AudioSource(self.name, plugin.get_title(), getattr(plugin, 'id', None), chunks)
+
+
+def _close(chunks):
+    """진 백엔드의 스트림 닫기 (제너레이터면 응답/파일이 정리됨)"""
+    close = getattr(chunks, 'close', None)
+    if close:
+        try:
+            close()
+        except Exception:
+            pass
+
+
+def hedged_open(backends, url, budget=DEFAULT_HEDGE_BUDGET, on_event=None):
+    """
+    여러 백엔드를 시차를 두고 실행해 먼저 첫 바이트를 받은 스트림 반환
+
+    Args:
+        backends (list): Backend 목록 (우선순위 순서)
+        url (str): YouTube URL
+        budget (float): 다음 백엔드를 함께 시작하기 전 대기 시간 (초)
+        on_event: 진행 메시지 콜백 (문자열)
+
+    Returns:
+        AudioSource: 이긴 백엔드의 스트림 (chunks는 첫 조각부터 다시 읽을 수 있음)
+
+    Raises:
+        HedgeError: 모든 백엔드가 실패했을 때
+    """
+    notify = on_event or (lambda message: None)
+    cond = threading.Condition()
+    state = {'winner': None, 'failed': 0}
+    errors = []
+    tokens = {}  # 백엔드 이름 → CancelToken (승자 외에는 승자가 정해질 때 취소)
+    started = time.monotonic()
+
+    def race(backend, cancel):
+        source = None
+        try:
+            source = backend.open(url, cancel=cancel)
+            # 정보 추출 중에 다른 백엔드가 이겼으면 요청을 보내지 않고 끝냄
+            cancel.check()
+            chunks = iter(source.chunks)
+            first = next(chunks)
+        except Cancelled:
+            if source is not None:
+                _close(source.chunks)
+            notify(f"{backend.name} 취소")
+            return
+        except StopIteration:
+            first, chunks, source = None, None, None
+            error = Exception("빈 스트림")
+        except Exception as e:
+            first, chunks, source = None, None, None
+            error = e
+
+        with cond:
+            if source is None:
+                errors.append((backend.name, error))
+                state['failed'] += 1
+                cond.notify_all()
+                return
+            if state['winner'] is None:
+                source.first_byte_seconds = time.monotonic() - started
+                source.chunks = itertools.chain([first], chunks)
+                state['winner'] = source
+                cond.notify_all()
+                return
+
+        # 이미 다른 백엔드가 이김 → 연결 해제
+        _close(chunks)
+        notify(f"{backend.name} 취소 (늦게 도착)")
+
+    pending = list(backends)
+    launched = 0
+    deadline = 0.0
+
+    with cond:
+        while state['winner'] is None:
+            now = time.monotonic()
+            all_failed = state['failed'] == launched
+            if pending and (all_failed or now >= deadline):
+                backend = pending.pop(0)
+                if launched:
+                    reason = "이전 백엔드 실패" if all_failed else f"{budget:.1f}초 안에 첫 바이트 없음"
+                    notify(f"{backend.name} 추가 시작 ({reason})")
+                else:
+                    notify(f"{backend.name} 시작")
+                tokens[backend.name] = CancelToken()
+                threading.Thread(target=race, args=(backend, tokens[backend.name]),
+                                 name=f'hedge-{backend.name}', daemon=True).start()
+                launched += 1
+                deadline = now + budget
+                continue
+            if not pending and all_failed:
+                raise HedgeError(errors)
+            cond.wait(timeout=max(0.0, deadline - now) if pending else None)
+
+    winner = state['winner']
+    # 아직 실행 중인 나머지 백엔드 취소 (멈춰 있는 연결도 바로 끊김)
+    for name, token in tokens.items():
+        if name != winner.backend:
+            token.cancel()
+    notify(f"{winner.backend} 선택 (첫 바이트 {winner.first_byte_seconds:.2f}초)")
+    return winner
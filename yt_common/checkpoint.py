@@ -0,0 +1,122 @@
+"""
+이어받기용 다운로드 체크포인트 (사이드카 JSON 파일)
+
+- 받는 중인 파일 옆에 <파일>.checkpoint.json을 두고 완료된 바이트 범위를 기록
+- 출처 키(동영상 ID + itag 등)와 전체 크기가 같을 때만 이어받기
+  (YouTube 스트림 URL은 추출할 때마다 바뀌므로 URL은 기록만 하고 비교하지 않음)
+- 범위가 끝날 때마다 임시 파일에 쓴 뒤 이름을 바꿔 저장 (중간에 죽어도 JSON이 깨지지 않음)
+- Ctrl+C, 네트워크 끊김, 비정상 종료 후 다시 실행하면 남은 범위만 받음
+"""
+
+import json
+import os
+import threading
+import time
+
+from yt_common.ranged import split_ranges
+
+CHECKPOINT_SUFFIX = '.checkpoint.json'
+
+
+class DownloadCheckpoint:
+    """
+    완료된 바이트 범위 기록
+
+    Examples:
+        >>> checkpoint = DownloadCheckpoint.open(temp_file, f"{video_id}:{itag}", url, size, chunk_size)
+        >>> checkpoint.missing()   # 아직 받지 않은 범위
+        >>> checkpoint.mark_done(start, end)
+        >>> checkpoint.remove()    # 변환까지 끝난 뒤
+    """
+
+    def __init__(self, target, source_key, url, total_size, chunk_size, done=None):
+        """
+        Args:
+            target (str): 받는 중인 파일 경로
+            source_key (str): 출처 식별자 (동영상 ID + 포맷)
+            url (str): 스트림 URL (기록용)
+            total_size (int): 전체 크기
+            chunk_size (int): 조각 크기 (범위 분할 기준)
+            done (list): 완료된 범위의 시작 위치 목록
+        """
+        self.target = target
+        self.path = target + CHECKPOINT_SUFFIX
+        self.source_key = source_key
+        self.url = url
+        self.total_size = total_size
+        self.chunk_size = chunk_size
+        self.done = set(done or ())
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, target, source_key, url, total_size, chunk_size):
+        """
+        기존 체크포인트를 불러오거나 새로 생성
+
+        출처 키, 전체 크기, 조각 크기가 모두 같고 받던 파일이 남아 있을 때만 이어받음
+
+        Returns:
+            DownloadCheckpoint: 체크포인트 (새로 만든 경우 done이 비어 있음)
+        """
+        try:
+            with open(target + CHECKPOINT_SUFFIX, encoding='utf-8') as f:
+                data = json.load(f)
+            if (data['source_key'] == source_key
+                    and data['total_size'] == total_size
+                    and data['chunk_size'] == chunk_size
+                    and os.path.getsize(target) == total_size):
+                return cls(target, source_key, url, total_size, chunk_size, data['done'])
+        except (OSError, ValueError, KeyError):
+            pass
+
+        checkpoint = cls(target, source_key, url, total_size, chunk_size)
+        checkpoint.save()
+        return checkpoint
+
+    @property
+    def resumed(self):
+        """이전 실행에서 받은 범위가 있으면 True"""
+        return bool(self.done)
+
+    def missing(self):
+        """
+        아직 받지 않은 범위 목록
+
+        Returns:
+            list: [(start, end), ...]
+        """
+        with self._lock:
+            return [
+                (start, end)
+                for start, end in split_ranges(self.total_size, self.chunk_size)
+                if start not in self.done
+            ]
+
+    def mark_done(self, start, end):
+        """범위 완료 기록 후 저장"""
+        with self._lock:
+            self.done.add(start)
+        self.save()
+
+    def save(self):
+        """사이드카 파일 저장 (임시 파일 → 이름 변경)"""
+        with self._lock:
+            data = {
+                'source_key': self.source_key,
+                'url': self.url,
+                'total_size': self.total_size,
+                'chunk_size': self.chunk_size,
+                'done': sorted(self.done),
+                'updated': time.time(),
+            }
+            temp = f"{self.path}.{threading.get_ident()}.tmp"
+            with open(temp, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(temp, self.path)
+
+    def remove(self):
+        """사이드카 파일 삭제 (다운로드/변환 완료 후)"""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
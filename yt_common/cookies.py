@@ -0,0 +1,188 @@
+"""
+브라우저 쿠키 저장소 캐시
+
+'cookiesfrombrowser': ('chrome',)를 작업마다 넘기면 yt-dlp가 매번 브라우저 쿠키 DB를
+복사하고 복호화합니다 (macOS는 키체인 조회 포함). 쿠키를 한 번만 불러와 메모리에 두고
+모든 작업이 같은 저장소(cookie jar)를 사용합니다.
+
+- 출처: 브라우저 이름('chrome', 'safari' 등) 또는 cookies.txt 경로 (Netscape 형식)
+- 다시 불러오는 경우
+  - 쿠키 파일(브라우저 DB 또는 cookies.txt)의 수정 시각이 바뀌었을 때
+  - 불러온 지 max_age초가 지났을 때
+  - 인증 오류 후 invalidate()를 호출했을 때
+- 여러 작업이 동시에 요청해도 불러오기는 한 번만 실행 (나머지는 기다렸다가 같은 저장소 사용)
+- yt-dlp에는 cookiefile을 넘기지 않으므로 cookies.txt를 덮어쓰지 않음
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+
+# 기본 설정
+DEFAULT_MAX_AGE = 30 * 60     # 수정 시각을 알 수 없어도 30분마다 다시 불러옴
+MIN_RELOAD_INTERVAL = 60      # 브라우저가 실행 중이면 DB가 자주 바뀌므로 최소 간격 (초)
+
+# 브라우저별 쿠키 DB 위치 (수정 시각 확인용, 첫 번째로 존재하는 파일 사용)
+BROWSER_COOKIE_FILES = {
+    'chrome': (
+        '~/Library/Application Support/Google/Chrome/Default/Cookies',
+        '~/Library/Application Support/Google/Chrome/Default/Network/Cookies',
+        '~/.config/google-chrome/Default/Cookies',
+        '~/.config/google-chrome/Default/Network/Cookies',
+        '~/AppData/Local/Google/Chrome/User Data/Default/Network/Cookies',
+    ),
+    'safari': (
+        '~/Library/Containers/com.apple.Safari/Data/Library/Cookies/Cookies.binarycookies',
+        '~/Library/Cookies/Cookies.binarycookies',
+    ),
+}
+
+# 쿠키가 없거나 만료되었을 때 나타나는 오류 문구
+AUTH_ERROR_MARKERS = (
+    'sign in to confirm',
+    'login required',
+    'cookies are no longer valid',
+    'use --cookies',
+    'http error 401',
+    'http error 403',
+)
+
+
+def is_auth_error(error):
+    """
+    쿠키 문제로 보이는 오류인지 확인 (True면 쿠키를 다시 불러옴)
+
+    Args:
+        error: 예외 객체 또는 오류 메시지
+
+    Returns:
+        bool: 인증 오류이면 True
+    """
+    message = str(error).lower()
+    return any(marker in message for marker in AUTH_ERROR_MARKERS)
+
+
+class CookieProvider:
+    """
+    한 번 불러온 쿠키 저장소를 여러 작업이 공유
+
+    Examples:
+        >>> cookies = CookieProvider('chrome')             # 또는 CookieProvider('cli/cookies.txt')
+        >>> with yt_dlp.YoutubeDL(opts) as ydl:            # opts에 cookiesfrombrowser 없음
+        ...     cookies.apply(ydl)
+        ...     ydl.extract_info(url)
+        >>> cookies.invalidate()                           # 인증 오류 후 (다음 작업에서 다시 불러옴)
+    """
+
+    def __init__(self, source, max_age=DEFAULT_MAX_AGE):
+        """
+        Args:
+            source (str): 브라우저 이름 또는 cookies.txt 경로
+            max_age (float): 최대 보관 시간 (초)
+        """
+        self.source = source
+        self.max_age = max_age
+        self.is_file = source not in BROWSER_COOKIE_FILES and os.path.isfile(os.path.expanduser(source))
+        self._jar = None
+        self._loaded_at = 0.0
+        self._mtime = None
+        self._lock = threading.Lock()
+        self.loads = 0  # 실제로 불러온 횟수 (로그/통계용)
+
+    @property
+    def name(self):
+        """로그에 표시할 이름 (cookies.txt는 파일 이름)"""
+        return os.path.basename(self.source) if self.is_file else self.source
+
+    def _watched_file(self):
+        """수정 시각을 확인할 파일 경로 (알 수 없으면 None)"""
+        if self.is_file:
+            return os.path.expanduser(self.source)
+        for candidate in BROWSER_COOKIE_FILES.get(self.source, ()):
+            path = os.path.expanduser(candidate)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _current_mtime(self):
+        path = self._watched_file()
+        try:
+            return os.stat(path).st_mtime_ns if path else None
+        except OSError:
+            return None
+
+    def _is_fresh(self):
+        """지금 가진 저장소를 그대로 써도 되는지 확인 (락 안에서 호출)"""
+        if self._jar is None:
+            return False
+        age = time.monotonic() - self._loaded_at
+        if age >= self.max_age:
+            return False
+        if age < MIN_RELOAD_INTERVAL and not self.is_file:
+            return True
+        return self._current_mtime() == self._mtime
+
+    def _load(self):
+        """yt-dlp로 쿠키 불러오기 (브라우저 DB 복호화 또는 cookies.txt 읽기)"""
+        from yt_dlp.cookies import load_cookies
+
+        if self.is_file:
+            # 불러온 뒤 파일 경로를 지워 yt-dlp가 cookies.txt를 다시 쓰지 않게 함
+            jar = load_cookies(os.path.expanduser(self.source), None, None)
+            jar.filename = None
+            return jar
+        return load_cookies(None, (self.source,), None)
+
+    def jar(self):
+        """
+        공유 쿠키 저장소 (필요할 때만 다시 불러옴)
+
+        Returns:
+            YoutubeDLCookieJar: 쿠키 저장소
+        """
+        with self._lock:
+            if not self._is_fresh():
+                mtime = self._current_mtime()
+                self._jar = self._load()
+                self._mtime = mtime
+                self._loaded_at = time.monotonic()
+                self.loads += 1
+            return self._jar
+
+    def apply(self, ydl):
+        """
+        YoutubeDL 인스턴스가 공유 저장소를 사용하도록 설정 (요청 전에 호출)
+
+        yt-dlp는 처음 요청할 때 ydl.cookiejar를 불러오므로 그 전에 값을 넣어 두면
+        cookiesfrombrowser/cookiefile 처리를 건너뜀
+
+        Args:
+            ydl: YoutubeDL 인스턴스
+
+        Returns:
+            YoutubeDL: 같은 인스턴스
+        """
+        ydl.cookiejar = self.jar()
+        return ydl
+
+    def invalidate(self):
+        """저장소 버리기 (다음 jar() 호출에서 다시 불러옴)"""
+        with self._lock:
+            self._jar = None
+
+
+def cookie_file_path(path):
+    """
+    cookies.txt 경로 확인 (환경변수 등으로 받은 값 검증용)
+
+    Args:
+        path (str): cookies.txt 경로 (빈 값 허용)
+
+    Returns:
+        str: 존재하는 파일의 절대 경로 또는 None
+    """
+    if not path:
+        return None
+    resolved = Path(path).expanduser().resolve()
+    return str(resolved) if resolved.is_file() else None
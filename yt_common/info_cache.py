@@ -0,0 +1,303 @@
+"""
+동영상 정보(info dict) 디스크 캐시 (SQLite)
+
+- 키: 정규화된 동영상 ID (canonical_video_id)
+- 값: yt-dlp info dict 중 다운로드에 필요한 항목만 추린 요약본
+  (제목, 길이, 챕터, 포맷 목록 등)
+- 스트림 URL은 일정 시간 후 만료되므로 TTL과 URL의 expire 값 중 빠른 쪽에서 만료
+- 전체 크기가 한도를 넘으면 가장 오래 사용하지 않은 항목부터 삭제 (LRU)
+
+재시도, Chrome → Safari 쿠키 재시도, YouTube → YouTube Music 재시도에서
+정보를 다시 추출하지 않아 요청 수(Rate Limit 집계 대상)가 줄어듭니다.
+
+extract_info_once(ydl, url, cache=info_cache)로 캐시 조회 → 추출 → 저장을 한 번에 처리합니다.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+from yt_common import CACHE_DIR
+from yt_common.metrics import metrics
+from yt_common.urls import canonical_video_id
+
+# 기본 설정
+DEFAULT_CACHE_PATH = CACHE_DIR / 'info_cache.sqlite3'
+DEFAULT_TTL = 3 * 60 * 60           # 3시간 (YouTube 스트림 URL은 보통 6시간 후 만료)
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024  # 64 MB
+EXPIRE_MARGIN = 10 * 60             # URL 만료 10분 전에 캐시도 만료
+
+# info dict에서 보관할 최상위 항목
+INFO_FIELDS = (
+    '_type', 'id', 'title', 'fulltitle', 'duration', 'chapters', 'uploader', 'channel',
+    'thumbnail', 'webpage_url', 'original_url', 'webpage_url_basename',
+    'webpage_url_domain', 'extractor', 'extractor_key', 'is_live', 'was_live',
+    'live_status', 'availability', 'playable_in_embed', '_format_sort_fields',
+)
+
+# 포맷별로 보관할 항목
+FORMAT_FIELDS = (
+    'format_id', 'format_note', 'url', 'ext', 'protocol', 'acodec', 'vcodec',
+    'abr', 'asr', 'tbr', 'audio_channels', 'audio_ext', 'video_ext', 'container',
+    'filesize', 'filesize_approx', 'quality', 'source_preference', 'language',
+    'language_preference', 'preference', 'http_headers', 'downloader_options',
+    'has_drm',
+)
+
+
+def slim_info(info):
+    """
+    info dict에서 캐시할 항목만 추출
+
+    조각(fragment) 기반 포맷(HLS/DASH)은 크기가 크고 다시 받기 쉬우므로 제외하고
+    HTTP(S)로 바로 받을 수 있는 포맷만 보관
+
+    Args:
+        info (dict): yt-dlp extract_info 결과
+
+    Returns:
+        dict: 요약된 info dict
+    """
+    slim = {key: info[key] for key in INFO_FIELDS if key in info}
+    slim['formats'] = [
+        {key: fmt[key] for key in FORMAT_FIELDS if key in fmt}
+        for fmt in info.get('formats') or []
+        if fmt.get('url') and fmt.get('protocol', 'https') in ('http', 'https')
+    ]
+    return slim
+
+
+def is_cacheable(slim):
+    """
+    캐시해도 되는 요약본인지 확인
+
+    process=False 추출은 동영상 대신 url/playlist 결과를 돌려줄 수 있고, 포맷이 모두 걸러지면
+    나중에 캐시에서 꺼내 다운로드할 수 없으므로 동영상이면서 포맷이 하나 이상 남은 경우만 저장
+
+    Args:
+        slim (dict): slim_info 결과
+
+    Returns:
+        bool: 캐시할 수 있으면 True
+    """
+    return slim.get('_type', 'video') == 'video' and bool(slim.get('formats'))
+
+
+def url_expiry(info):
+    """
+    포맷 URL의 expire 파라미터 중 가장 이른 시각 반환
+
+    Args:
+        info (dict): info dict
+
+    Returns:
+        float: 만료 시각 (epoch 초) 또는 None
+    """
+    expiries = []
+    for fmt in info.get('formats') or []:
+        value = parse_qs(urlparse(fmt.get('url', '')).query).get('expire', [None])[0]
+        if value and value.isdigit():
+            expiries.append(int(value))
+    return min(expiries) if expiries else None
+
+
+class InfoCache:
+    """
+    SQLite 기반 동영상 정보 캐시
+
+    여러 스레드에서 동시에 사용해도 안전 (연결 하나를 락으로 보호)
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Args:
+            path: SQLite 파일 경로
+            ttl (int): 캐시 유효 시간 (초)
+            max_bytes (int): 캐시 최대 크기 (바이트)
+        """
+        self.path = str(path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        """처음 사용할 때 DB 연결 및 테이블 생성 (락 안에서 호출)"""
+        if self._conn is None:
+            if self.path != ':memory:':
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS info (
+                    video_id   TEXT PRIMARY KEY,
+                    data       TEXT NOT NULL,
+                    size       INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed   REAL NOT NULL
+                )
+            ''')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS info_accessed ON info (accessed)')
+        return self._conn
+
+    def get(self, video_id):
+        """
+        캐시된 정보 조회
+
+        Args:
+            video_id (str): 동영상 ID
+
+        Returns:
+            dict: 요약된 info dict (없거나 만료되었으면 None)
+        """
+        if not video_id:
+            return None
+
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                'SELECT data, expires_at FROM info WHERE video_id = ?', (video_id,)
+            ).fetchone()
+
+            if row is None or row[1] <= now:
+                if row is not None:
+                    conn.execute('DELETE FROM info WHERE video_id = ?', (video_id,))
+                    conn.commit()
+                self.misses += 1
+                return None
+
+            conn.execute('UPDATE info SET accessed = ? WHERE video_id = ?', (now, video_id))
+            conn.commit()
+            self.hits += 1
+
+        return json.loads(row[0])
+
+    def put(self, video_id, info):
+        """
+        정보 저장 (요약본으로 변환 후 저장, 크기 한도 초과 시 LRU 삭제)
+        동영상이 아니거나 받을 수 있는 포맷이 없는 결과는 저장하지 않음 (다음에 다시 추출)
+
+        Args:
+            video_id (str): 동영상 ID
+            info (dict): yt-dlp info dict
+        """
+        if not video_id or not info:
+            return
+
+        slim = slim_info(info)
+        if not is_cacheable(slim):
+            return
+        data = json.dumps(slim, ensure_ascii=False)
+        now = time.time()
+
+        expires_at = now + self.ttl
+        url_expires = url_expiry(slim)
+        if url_expires:
+            expires_at = min(expires_at, url_expires - EXPIRE_MARGIN)
+        if expires_at <= now:
+            return
+
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                'INSERT OR REPLACE INTO info (video_id, data, size, expires_at, accessed) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (video_id, data, len(data.encode('utf-8')), expires_at, now)
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def delete(self, video_id):
+        """
+        항목 삭제 (캐시된 스트림 URL로 다운로드가 거부되었을 때 사용)
+
+        Args:
+            video_id (str): 동영상 ID
+        """
+        with self._lock:
+            conn = self._connect()
+            conn.execute('DELETE FROM info WHERE video_id = ?', (video_id,))
+            conn.commit()
+
+    def _evict(self, conn):
+        """만료 항목 삭제 후, 크기 한도를 넘으면 오래 사용하지 않은 항목부터 삭제"""
+        conn.execute('DELETE FROM info WHERE expires_at <= ?', (time.time(),))
+
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM info').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        for video_id, size in conn.execute(
+            'SELECT video_id, size FROM info ORDER BY accessed ASC'
+        ).fetchall():
+            conn.execute('DELETE FROM info WHERE video_id = ?', (video_id,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self):
+        """
+        캐시 통계
+
+        Returns:
+            dict: 항목 수, 전체 크기, 적중/실패 횟수
+        """
+        with self._lock:
+            conn = self._connect()
+            count, size = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM info'
+            ).fetchone()
+        return {'entries': count, 'bytes': size, 'hits': self.hits, 'misses': self.misses}
+
+
+def is_stale_url_error(error):
+    """
+    캐시된 스트림 URL이 만료/거부되었을 때의 오류인지 확인
+
+    Args:
+        error: 예외 객체 또는 오류 문자열
+
+    Returns:
+        bool: 403/410 등 URL 만료로 보이는 오류면 True
+    """
+    text = str(error)
+    return '403' in text or 'Forbidden' in text or '410' in text
+
+
+def extract_info_once(ydl, url, cache=None, rate_limiter=None):
+    """
+    동영상 정보를 한 번만 추출
+    - extract_info(download=False) 후 download([url])을 호출하면 페이지, 플레이어 JS,
+      포맷 목록을 두 번 조회함. 여기서 얻은 info를 ydl.process_ie_result(info, download=True)에
+      그대로 넘기면 추가 조회 없이 다운로드됨
+    - cache가 있으면 같은 동영상 정보를 추출 없이 재사용 (재시도 시 요청 수 감소)
+
+    Args:
+        ydl: YoutubeDL 인스턴스
+        url: YouTube URL
+        cache: InfoCache (None이면 캐시 없이 매번 추출)
+        rate_limiter: 추출 전에 acquire()할 RateLimiter (None이면 바로 추출)
+
+    Returns:
+        tuple: (info dict, 정보 추출 소요 시간(초), 캐시 적중 여부)
+    """
+    video_id = canonical_video_id(url)
+    if cache is not None:
+        cached = cache.get(video_id)
+        if cached is not None:
+            return cached, 0.0, True
+
+    if rate_limiter is not None:
+        rate_limiter.acquire()
+    started = time.monotonic()
+    with metrics.stage('extract'):
+        info = ydl.extract_info(url, download=False, process=False)
+    if cache is not None:
+        cache.put(info.get('id') or video_id, info)
+    return info, time.monotonic() - started, False
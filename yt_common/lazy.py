@@ -0,0 +1,95 @@
+"""
+무거운 모듈 지연 import
+
+yt_dlp, pytube 같은 모듈은 import에만 수백 ms가 걸려 창/서버가 뜨기 전에 시간을 씁니다.
+모듈 맨 위에서는 이름만 등록해 두고 실제 import는 처음 사용할 때 합니다.
+
+- 속성에 처음 접근할 때 import (기존 코드의 yt_dlp.YoutubeDL(...) 그대로 사용)
+- UI가 뜬 뒤 warm_up()으로 백그라운드 스레드에서 미리 import
+  → 사용자가 첫 다운로드를 누를 때는 이미 로드되어 있음
+"""
+
+import importlib
+import threading
+
+
+class LazyModule:
+    """
+    처음 사용할 때 import되는 모듈
+
+    Examples:
+        >>> yt_dlp = lazy_import('yt_dlp')
+        >>> warm_up(yt_dlp)              # UI가 뜬 뒤 (선택)
+        >>> yt_dlp.YoutubeDL(opts)       # 여기서 import (이미 로드됐으면 바로 사용)
+    """
+
+    def __init__(self, name):
+        """
+        Args:
+            name (str): 모듈 이름 (예: 'yt_dlp', 'pytube')
+        """
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """
+        모듈 import (한 번만 실행, 여러 스레드에서 동시에 불러도 안전)
+
+        Returns:
+            module: import된 모듈
+        """
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    @property
+    def loaded(self):
+        """이미 import되었으면 True"""
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self.loaded else 'not loaded'
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    """
+    지연 import 모듈 생성
+
+    Args:
+        name (str): 모듈 이름
+
+    Returns:
+        LazyModule: 처음 속성에 접근할 때 import되는 모듈
+    """
+    return LazyModule(name)
+
+
+def warm_up(*modules):
+    """
+    백그라운드 스레드에서 모듈 미리 import (UI/서버가 뜬 뒤 호출)
+
+    설치되지 않은 모듈은 조용히 건너뜀 (실제 사용 시점에 원래 오류가 남)
+
+    Args:
+        *modules: LazyModule 목록
+
+    Returns:
+        threading.Thread: 미리 import 중인 스레드
+    """
+    def run():
+        for module in modules:
+            try:
+                module.load()
+            except ImportError:
+                pass
+
+    thread = threading.Thread(target=run, name='warm-up', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,173 @@
+"""
+다운로드 라이브러리 인덱스 (SQLite)
+
+- 동영상 ID → 저장된 파일 경로, 크기, SHA-256 체크섬
+- 다운로드 시작 전에 조회하여 이미 받은 동영상은 네트워크/변환 없이 기존 파일 반환
+- 조회는 DB 한 번 + os.stat 한 번 (수 ms), 체크섬 검증은 요청할 때만 수행
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from yt_common import CACHE_DIR
+
+DEFAULT_LIBRARY_PATH = CACHE_DIR / 'library.sqlite3'
+
+# 체크섬 계산 시 한 번에 읽을 크기
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_checksum(path):
+    """
+    파일 SHA-256 체크섬 계산 (고정 크기 버퍼로 읽어 메모리 사용량 일정)
+
+    Args:
+        path: 파일 경로
+
+    Returns:
+        str: 16진수 체크섬
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def final_filepath(info, fallback=None):
+    """
+    yt-dlp 다운로드/후처리 후 최종 파일 경로 추출
+
+    Args:
+        info (dict): process_ie_result 반환값
+        fallback (str): 경로를 찾지 못했을 때 사용할 값
+
+    Returns:
+        str: 최종 파일 경로 (예: FLAC 변환 후 .flac 파일)
+    """
+    for download in (info or {}).get('requested_downloads') or []:
+        if download.get('filepath'):
+            return download['filepath']
+    return (info or {}).get('filepath') or fallback
+
+
+class LibraryIndex:
+    """
+    이미 다운로드한 동영상 목록
+
+    여러 스레드에서 동시에 사용해도 안전 (연결 하나를 락으로 보호)
+    """
+
+    def __init__(self, path=DEFAULT_LIBRARY_PATH):
+        """
+        Args:
+            path: SQLite 파일 경로
+        """
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        """처음 사용할 때 DB 연결 및 테이블 생성 (락 안에서 호출)"""
+        if self._conn is None:
+            if self.path != ':memory:':
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS library (
+                    video_id TEXT PRIMARY KEY,
+                    path     TEXT NOT NULL,
+                    size     INTEGER NOT NULL,
+                    checksum TEXT NOT NULL,
+                    title    TEXT,
+                    added    REAL NOT NULL
+                )
+            ''')
+        return self._conn
+
+    def lookup(self, video_id, verify=False):
+        """
+        이미 다운로드한 파일 조회
+
+        파일이 지워졌거나 크기가 달라졌으면 항목을 삭제하고 None 반환
+
+        Args:
+            video_id (str): 동영상 ID
+            verify (bool): True면 체크섬까지 다시 계산해 확인 (느림)
+
+        Returns:
+            dict: {'video_id', 'path', 'size', 'checksum', 'title', 'added'} 또는 None
+        """
+        if not video_id:
+            return None
+
+        with self._lock:
+            row = self._connect().execute(
+                'SELECT video_id, path, size, checksum, title, added FROM library WHERE video_id = ?',
+                (video_id,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        entry = dict(zip(('video_id', 'path', 'size', 'checksum', 'title', 'added'), row))
+        try:
+            valid = os.stat(entry['path']).st_size == entry['size']
+        except OSError:
+            valid = False
+        if valid and verify:
+            valid = file_checksum(entry['path']) == entry['checksum']
+
+        if not valid:
+            self.remove(video_id)
+            return None
+        return entry
+
+    def record(self, video_id, path, title=None):
+        """
+        다운로드 완료 파일 등록
+
+        Args:
+            video_id (str): 동영상 ID
+            path: 저장된 파일 경로
+            title (str): 동영상 제목
+
+        Returns:
+            dict: 등록된 항목 (파일이 없으면 None)
+        """
+        if not video_id or not path or not os.path.exists(path):
+            return None
+
+        entry = {
+            'video_id': video_id,
+            'path': os.path.abspath(path),
+            'size': os.path.getsize(path),
+            'checksum': file_checksum(path),
+            'title': title,
+            'added': time.time(),
+        }
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                'INSERT OR REPLACE INTO library (video_id, path, size, checksum, title, added) '
+                'VALUES (:video_id, :path, :size, :checksum, :title, :added)',
+                entry
+            )
+            conn.commit()
+        return entry
+
+    def remove(self, video_id):
+        """
+        항목 삭제
+
+        Args:
+            video_id (str): 동영상 ID
+        """
+        with self._lock:
+            conn = self._connect()
+            conn.execute('DELETE FROM library WHERE video_id = ?', (video_id,))
+            conn.commit()
@@ -0,0 +1,336 @@
+"""
+단계별 소요 시간 계측 (Prometheus 텍스트 형식 / CLI 요약)
+
+작업의 각 단계를 stage()로 감싸면 소요 시간이 단계별 히스토그램에 쌓이고,
+단계 안에서 난 예외는 오류 종류별로 집계됩니다.
+
+단계 (STAGES)
+- normalize: URL 정리, 동영상 ID 추출
+- extract: 동영상 정보 추출 (페이지/플레이어 조회)
+- first_byte: 스트림 요청부터 첫 바이트까지
+- download: 스트림 받기 (스트리밍 경로에서는 동시에 진행되는 FLAC 인코딩 포함)
+- transcode: FLAC 변환 (스트리밍 경로에서는 입력이 끝난 뒤 남은 인코딩 시간)
+- write: 완성 파일 이름 바꾸기, 라이브러리 기록
+- cleanup: 원본/임시 파일 삭제
+
+카운터: 받은 바이트, 재시도(이유별), 폴백 사용(범위/전략별), 오류(단계/종류별), 작업 결과
+- Flask 앱: /metrics (render())
+- CLI: 실행이 끝날 때 summary()
+외부 패키지(prometheus_client) 없이 동작하며 프로세스 전체가 metrics 하나를 공유합니다.
+"""
+
+import socket
+import threading
+import time
+import urllib.error
+from contextlib import contextmanager
+
+from yt_common.cookies import is_auth_error
+from yt_common.ratelimit import is_rate_limit_error
+
+STAGES = ('normalize', 'extract', 'first_byte', 'download', 'transcode', 'write', 'cleanup')
+
+# 단계 소요 시간 히스토그램 구간 (초)
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# 지표 이름과 설명
+METRIC_HELP = {
+    'yt_stage_duration_seconds': ('histogram', '단계별 소요 시간 (초)'),
+    'yt_downloaded_bytes_total': ('counter', '받은 바이트 수'),
+    'yt_retries_total': ('counter', '재시도 횟수 (이유별)'),
+    'yt_fallback_total': ('counter', '첫 번째가 아닌 전략으로 시도한 횟수'),
+    'yt_errors_total': ('counter', '단계별/종류별 오류 수'),
+    'yt_jobs_total': ('counter', '작업 결과별 수'),
+}
+
+
+def error_class(error):
+    """
+    오류 종류 (지표 라벨용)
+
+    Args:
+        error: 예외 객체
+
+    Returns:
+        str: rate_limited, auth, network, ffmpeg 또는 예외 클래스 이름
+    """
+    if is_rate_limit_error(error):
+        return 'rate_limited'
+    if is_auth_error(error):
+        return 'auth'
+    if isinstance(error, (urllib.error.URLError, socket.timeout, TimeoutError, ConnectionError)):
+        return 'network'
+    name = type(error).__name__
+    if name == 'FFmpegError':
+        return 'ffmpeg'
+    return name
+
+
+def _labels_text(labels):
+    """라벨 튜플 → Prometheus 라벨 문자열"""
+    if not labels:
+        return ''
+    escaped = (
+        (key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """
+    단계 소요 시간 히스토그램과 카운터 모음
+
+    여러 스레드에서 동시에 사용해도 안전
+
+    Examples:
+        >>> with metrics.stage('extract'):
+        ...     info = ydl.extract_info(url, download=False)
+        >>> metrics.add_bytes(len(chunk))
+        >>> metrics.retry('cookies')
+        >>> metrics.job('ok')
+        >>> print(metrics.render())          # /metrics
+        >>> print(metrics.summary())         # CLI 종료 시
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._histograms = {}  # 단계 → [구간별 개수..., 합계, 개수, 최댓값]
+        self._counters = {}    # (지표 이름, 라벨 튜플) → 값
+
+    # 기록
+
+    def observe(self, stage, seconds):
+        """단계 소요 시간 기록"""
+        with self._lock:
+            entry = self._histograms.get(stage)
+            if entry is None:
+                entry = self._histograms[stage] = [0] * len(self.buckets) + [0.0, 0, 0.0]
+            for index, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    entry[index] += 1
+            entry[-3] += seconds
+            entry[-2] += 1
+            entry[-1] = max(entry[-1], seconds)
+
+    @contextmanager
+    def stage(self, name):
+        """
+        블록 실행 시간을 단계 소요 시간으로 기록 (예외는 오류 종류별로 집계 후 다시 발생)
+
+        Args:
+            name (str): 단계 이름 (STAGES)
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.error_once(name, e)
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def inc(self, name, amount=1, **labels):
+        """카운터 증가"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def add_bytes(self, amount):
+        """받은 바이트 수"""
+        self.inc('yt_downloaded_bytes_total', amount)
+
+    def retry(self, reason):
+        """재시도 (예: cookies, player_client, rate_limited, music)"""
+        self.inc('yt_retries_total', reason=reason)
+
+    def fallback(self, scope, strategy):
+        """첫 번째가 아닌 전략으로 시도 (범위: StrategyStats 범위 이름)"""
+        self.inc('yt_fallback_total', scope=scope, strategy=strategy)
+
+    def error(self, stage, error):
+        """오류 (단계, 종류별)"""
+        self.inc('yt_errors_total', stage=stage, **{'class': error_class(error)})
+
+    def error_once(self, stage, error):
+        """오류 기록 (단계가 겹쳐 있어도 가장 안쪽 단계에서 한 번만 집계)"""
+        if getattr(error, '_metrics_counted', False):
+            return
+        self.error(stage, error)
+        try:
+            error._metrics_counted = True
+        except AttributeError:
+            pass
+
+    def job(self, status):
+        """작업 결과 (ok, skipped, failed)"""
+        self.inc('yt_jobs_total', status=status)
+
+    # 출력
+
+    def render(self):
+        """
+        Prometheus 텍스트 형식 (/metrics 응답 본문)
+
+        Returns:
+            str: 지표 전체
+        """
+        with self._lock:
+            histograms = {stage: list(entry) for stage, entry in self._histograms.items()}
+            counters = dict(self._counters)
+
+        lines = []
+
+        def header(name):
+            kind, description = METRIC_HELP[name]
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        header('yt_stage_duration_seconds')
+        for stage in sorted(histograms, key=lambda s: (STAGES.index(s) if s in STAGES else len(STAGES), s)):
+            entry = histograms[stage]
+            for index, bound in enumerate(self.buckets):
+                labels = _labels_text((('stage', stage), ('le', _number(float(bound)))))
+                lines.append(f'yt_stage_duration_seconds_bucket{labels} {entry[index]}')
+            labels = _labels_text((('stage', stage), ('le', '+Inf')))
+            lines.append(f'yt_stage_duration_seconds_bucket{labels} {entry[-2]}')
+            stage_label = _labels_text((('stage', stage),))
+            lines.append(f'yt_stage_duration_seconds_sum{stage_label} {_number(entry[-3])}')
+            lines.append(f'yt_stage_duration_seconds_count{stage_label} {entry[-2]}')
+
+        for name in METRIC_HELP:
+            if name == 'yt_stage_duration_seconds':
+                continue
+            header(name)
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f'{name}{_labels_text(labels)} {_number(value)}')
+
+        lines.append('# HELP yt_process_start_time_seconds 프로세스 시작 시각 (Unix 시간)')
+        lines.append('# TYPE yt_process_start_time_seconds gauge')
+        lines.append(f'yt_process_start_time_seconds {_number(self.started)}')
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """
+        사람이 읽는 요약 (CLI 실행 종료 시 출력)
+
+        Returns:
+            str: 단계별 횟수/합계/평균/최대 시간과 카운터 요약 (기록이 없으면 빈 문자열)
+        """
+        with self._lock:
+            histograms = {stage: list(entry) for stage, entry in self._histograms.items()}
+            counters = dict(self._counters)
+        if not histograms and not counters:
+            return ''
+
+        lines = [f"{'단계':<12} {'횟수':>5} {'합계(초)':>10} {'평균(초)':>10} {'최대(초)':>10}"]
+        for stage in sorted(histograms, key=lambda s: (STAGES.index(s) if s in STAGES else len(STAGES), s)):
+            entry = histograms[stage]
+            total, count, longest = entry[-3], entry[-2], entry[-1]
+            lines.append(f"{stage:<12} {count:>5} {total:>10.2f} {total / count:>10.2f} {longest:>10.2f}")
+
+        def grouped(name, label):
+            totals = {}
+            for (metric, labels), value in counters.items():
+                if metric == name:
+                    key = dict(labels).get(label, '')
+                    totals[key] = totals.get(key, 0) + value
+            return ', '.join(f"{key} {value}" for key, value in sorted(totals.items()))
+
+        received = counters.get(('yt_downloaded_bytes_total', ()), 0)
+        lines.append(f"받은 데이터: {received / (1024 * 1024):.1f} MB")
+        for title, name, label in (('작업', 'yt_jobs_total', 'status'),
+                                   ('재시도', 'yt_retries_total', 'reason'),
+                                   ('폴백', 'yt_fallback_total', 'strategy'),
+                                   ('오류', 'yt_errors_total', 'class')):
+            text = grouped(name, label)
+            if text:
+                lines.append(f"{title}: {text}")
+        return '\n'.join(lines)
+
+    def print_summary(self):
+        """실행 종료 시 단계별 소요 시간 요약 출력 (CLI/대화형 스크립트용, 기록이 없으면 생략)"""
+        summary = self.summary()
+        if summary:
+            print("\n⏱ 단계별 소요 시간")
+            print(summary)
+            print()
+
+
+# 프로세스 전체가 공유하는 지표
+metrics = Metrics()
+
+
+class YtDlpTimer:
+    """
+    yt-dlp 다운로드(process_ie_result / download) 단계 계측
+
+    yt-dlp는 받기와 후처리(FFmpegExtractAudio)를 한 호출 안에서 하므로
+    진행 상황 콜백으로 경계를 나눔
+    - first_byte: 호출부터 처음 데이터를 받을 때까지
+    - download: 호출부터 'finished' 콜백까지
+    - transcode: 'finished' 콜백부터 호출이 끝날 때까지 (FLAC 변환, 원본 삭제)
+      후처리가 없으면(postprocess=False) 호출 전체를 download로 기록
+
+    Examples:
+        >>> timer = YtDlpTimer()
+        >>> opts['progress_hooks'] = [progress_hook, timer.hook]
+        >>> with yt_dlp.YoutubeDL(opts) as ydl, timer:
+        ...     ydl.process_ie_result(info, download=True)
+    """
+
+    def __init__(self, postprocess=True, registry=None):
+        """
+        Args:
+            postprocess (bool): yt-dlp 후처리(FFmpegExtractAudio)가 있는지 여부
+            registry: Metrics (기본: 공유 metrics)
+        """
+        self.postprocess = postprocess
+        self.metrics = registry or metrics
+        self.started = None
+        self.finished_at = None
+        self._first = True
+        self._seen = {}  # 파일별로 받은 바이트 (콜백은 누적값을 주므로 차이만 기록)
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self.finished_at = None
+        self._first = True
+        self._seen = {}
+        return self
+
+    def hook(self, d):
+        """yt-dlp progress_hooks용 콜백"""
+        if self.started is None:
+            return
+        now = time.perf_counter()
+        downloaded = d.get('downloaded_bytes') or 0
+        key = d.get('filename') or d.get('tmpfilename')
+        delta = downloaded - self._seen.get(key, 0)
+        if delta > 0:
+            self._seen[key] = downloaded
+            self.metrics.add_bytes(delta)
+        if self._first and downloaded:
+            self.metrics.observe('first_byte', now - self.started)
+            self._first = False
+        if d.get('status') == 'finished' and self.postprocess:
+            self.finished_at = now
+
+    def __exit__(self, exc_type, exc, tb):
+        now = time.perf_counter()
+        self.metrics.observe('download', (self.finished_at or now) - self.started)
+        if self.finished_at is not None:
+            self.metrics.observe('transcode', now - self.finished_at)
+        if isinstance(exc, Exception):
+            self.metrics.error_once('download' if self.finished_at is None else 'transcode', exc)
+        self.started = None
+        return False
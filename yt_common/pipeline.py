@@ -0,0 +1,173 @@
+"""
+다운로드 → FLAC 변환 단계별 파이프라인
+
+- 다운로드 단계: 네트워크 위주 (스레드 풀, 동시 다운로드 수만큼)
+- 변환 단계: CPU 위주 (CPU 코어 수만큼의 ffmpeg 프로세스)
+- 두 단계 사이는 크기가 정해진 큐로 연결
+  변환이 밀리면 다운로드 워커가 큐에 넣는 곳에서 기다림 (배압) → 임시 파일이 무한히 쌓이지 않음
+- 한 작업이 변환되는 동안 다음 작업이 다운로드되므로 네트워크와 CPU가 함께 사용됨
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class StageStats:
+    """단계별 처리 통계 (busy 시간 기준 사용률 계산)"""
+
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def begin(self):
+        with self._lock:
+            self.active += 1
+        return time.monotonic()
+
+    def end(self, started, ok=True):
+        with self._lock:
+            self.active -= 1
+            self.busy_seconds += time.monotonic() - started
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+
+    def snapshot(self, elapsed):
+        """
+        Args:
+            elapsed (float): 파이프라인 가동 시간 (초)
+
+        Returns:
+            dict: 워커 수, 진행 중/완료/실패 수, 사용률(0~1)
+        """
+        with self._lock:
+            capacity = self.workers * elapsed
+            return {
+                'workers': self.workers,
+                'active': self.active,
+                'completed': self.completed,
+                'failed': self.failed,
+                'busy_seconds': round(self.busy_seconds, 3),
+                'utilization': round(self.busy_seconds / capacity, 3) if capacity else 0.0,
+            }
+
+
+class DownloadEncodePipeline:
+    """
+    다운로드 풀 → 제한 큐 → 변환 풀
+
+    download(job_id, *args)는 원본 파일 경로를 반환하며, None을 반환하면 변환 없이 끝난 작업
+    (예: 이미 받은 동영상)으로 처리합니다. encode(job_id, source)는 변환과 마무리를 담당합니다.
+    어느 단계든 예외가 나면 on_error(job_id, error, *args)가 호출됩니다.
+
+    Examples:
+        >>> pipeline = DownloadEncodePipeline(download_source, encode_source, fail_job)
+        >>> pipeline.submit(job_id, url)
+        >>> pipeline.stats()['encode']['utilization']
+    """
+
+    def __init__(self, download, encode, on_error, download_workers=4, encode_workers=None,
+                 queue_size=None):
+        """
+        Args:
+            download: 다운로드 단계 함수
+            encode: 변환 단계 함수
+            on_error: 오류 처리 함수
+            download_workers (int): 동시 다운로드 수
+            encode_workers (int): 동시 변환 수 (기본: CPU 코어 수)
+            queue_size (int): 변환 대기 큐 크기 (기본: 변환 워커 수 × 2)
+        """
+        encode_workers = encode_workers or os.cpu_count() or 2
+        self._download = download
+        self._encode = encode
+        self._on_error = on_error
+        self._queue = queue.Queue(maxsize=queue_size or encode_workers * 2)
+        self._started = time.monotonic()
+        self._backpressure_seconds = 0.0
+        self._lock = threading.Lock()
+
+        self.download_stats = StageStats('download', download_workers)
+        self.encode_stats = StageStats('encode', encode_workers)
+
+        self._download_pool = ThreadPoolExecutor(
+            max_workers=download_workers, thread_name_prefix='download'
+        )
+        for index in range(encode_workers):
+            threading.Thread(
+                target=self._encode_loop, name=f'encode-{index}', daemon=True
+            ).start()
+
+    def submit(self, job_id, *args):
+        """
+        작업 제출 (다운로드 단계 대기열에 추가)
+
+        Args:
+            job_id: 작업 ID
+            *args: download 함수에 넘길 인자
+        """
+        return self._download_pool.submit(self._download_task, job_id, args)
+
+    def _download_task(self, job_id, args):
+        """다운로드 단계 실행 후 변환 큐에 전달 (큐가 가득 차면 대기)"""
+        started = self.download_stats.begin()
+        try:
+            source = self._download(job_id, *args)
+        except Exception as e:
+            self.download_stats.end(started, ok=False)
+            self._on_error(job_id, e, *args)
+            return
+        self.download_stats.end(started)
+
+        if source is None:
+            return
+
+        waiting = time.monotonic()
+        self._queue.put((job_id, source, args))
+        with self._lock:
+            self._backpressure_seconds += time.monotonic() - waiting
+
+    def _encode_loop(self):
+        """변환 워커 (큐에서 꺼내 순서대로 변환)"""
+        while True:
+            job_id, source, args = self._queue.get()
+            started = self.encode_stats.begin()
+            try:
+                self._encode(job_id, source)
+            except Exception as e:
+                self.encode_stats.end(started, ok=False)
+                self._on_error(job_id, e, *args)
+            else:
+                self.encode_stats.end(started)
+            finally:
+                self._queue.task_done()
+
+    def stats(self):
+        """
+        단계별 사용률과 큐 상태
+
+        Returns:
+            dict: {'uptime_seconds', 'download', 'encode', 'queue'}
+                  queue.backpressure_seconds는 다운로드 워커가 변환 대기로 멈춘 누적 시간
+        """
+        elapsed = time.monotonic() - self._started
+        with self._lock:
+            backpressure = self._backpressure_seconds
+        return {
+            'uptime_seconds': round(elapsed, 1),
+            'download': self.download_stats.snapshot(elapsed),
+            'encode': self.encode_stats.snapshot(elapsed),
+            'queue': {
+                'size': self._queue.qsize(),
+                'capacity': self._queue.maxsize,
+                'backpressure_seconds': round(backpressure, 3),
+            },
+        }
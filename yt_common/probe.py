@@ -0,0 +1,161 @@
+"""
+의존성 확인 결과 캐시
+
+ffmpeg -version, ffmpeg -encoders 같은 확인용 프로세스를 다운로드마다 실행하지 않도록
+결과(실행 파일 경로, 버전, FLAC 인코더 지원 여부)를 디스크에 저장합니다.
+
+- 캐시 키: 실행 파일의 실제 경로 + 수정 시각 + 크기
+  (ffmpeg를 업데이트/재설치하면 키가 바뀌어 자동으로 다시 확인)
+- 같은 프로세스 안에서는 메모리에도 보관 (이후 확인은 os.stat 한 번)
+- 확인 자체가 실패하면(시간 초과, 실행 오류) 저장하지 않고 다음에 다시 확인
+- Python 모듈은 import하지 않고 위치와 설치된 배포판 버전만 확인
+"""
+
+import importlib.metadata
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import threading
+
+from yt_common import CACHE_DIR
+
+DEFAULT_PROBE_PATH = CACHE_DIR / 'probe.json'
+PROBE_TIMEOUT = 10  # 확인용 프로세스 제한 시간 (초)
+
+_lock = threading.Lock()
+_memory = {}
+
+
+class _Uncached:
+    """compute()가 캐시하지 않을 결과를 돌려줄 때 쓰는 표시 (확인 실패)"""
+
+    def __init__(self, value):
+        self.value = value
+
+
+def _file_key(kind, path):
+    """실제 경로 + 수정 시각 + 크기로 캐시 키 생성"""
+    real = os.path.realpath(path)
+    stat = os.stat(real)
+    return f"{kind}:{real}:{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def _load(cache_path):
+    try:
+        with open(cache_path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save(cache_path, data):
+    """임시 파일에 쓴 뒤 이름 변경 (쓰는 중에 죽어도 캐시가 깨지지 않음)"""
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        temp = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        os.replace(temp, cache_path)
+    except OSError:
+        pass  # 캐시 저장 실패는 무시 (다음에 다시 확인)
+
+
+def _cached(key, compute, cache_path):
+    """
+    메모리 → 디스크 → compute() 순서로 조회
+
+    compute()가 _Uncached를 반환하면 값만 돌려주고 메모리/디스크에 저장하지 않음
+    (일시적인 실패가 실행 파일이 바뀔 때까지 남지 않도록)
+    """
+    with _lock:
+        if key in _memory:
+            return _memory[key]
+
+        data = _load(cache_path)
+        if key in data:
+            _memory[key] = data[key]
+            return data[key]
+
+    result = compute()
+    if isinstance(result, _Uncached):
+        return result.value
+
+    with _lock:
+        data = _load(cache_path)
+        # 같은 실행 파일의 예전 항목은 삭제 (경로가 같고 키가 다른 항목)
+        prefix = key.rsplit(':', 2)[0] + ':'
+        for stale in [k for k in data if k.startswith(prefix) and k != key]:
+            del data[stale]
+        data[key] = result
+        _save(cache_path, data)
+        _memory[key] = result
+    return result
+
+
+def probe_ffmpeg(cache_path=DEFAULT_PROBE_PATH):
+    """
+    ffmpeg 설치 및 FLAC 인코더 지원 확인 (결과 캐시)
+
+    Args:
+        cache_path: 캐시 파일 경로
+
+    Returns:
+        dict: {'path', 'version', 'flac_encoder'} 또는 None (ffmpeg 없음)
+    """
+    path = shutil.which('ffmpeg')
+    if not path:
+        return None
+
+    def compute():
+        try:
+            version = subprocess.run(
+                [path, '-hide_banner', '-version'],
+                capture_output=True, text=True, check=True, timeout=PROBE_TIMEOUT
+            ).stdout.split('\n', 1)[0]
+            encoders = subprocess.run(
+                [path, '-hide_banner', '-encoders'],
+                capture_output=True, text=True, check=True, timeout=PROBE_TIMEOUT
+            ).stdout
+        except (subprocess.CalledProcessError, OSError, subprocess.TimeoutExpired):
+            # 디스크가 느리거나 일시적으로 실패했을 수 있으므로 캐시하지 않음
+            return _Uncached({'path': path, 'version': None, 'flac_encoder': False})
+
+        return {
+            'path': path,
+            'version': version.replace('ffmpeg version ', '').split(' ')[0],
+            'flac_encoder': any(
+                line.split()[1:2] == ['flac'] for line in encoders.splitlines()
+            ),
+        }
+
+    return _cached(_file_key('ffmpeg', path), compute, cache_path)
+
+
+def probe_module(name, cache_path=DEFAULT_PROBE_PATH):
+    """
+    Python 모듈 설치 확인 (import 하지 않음, 결과 캐시)
+
+    Args:
+        name (str): 모듈 이름 (예: 'streamlink', 'pytube')
+        cache_path: 캐시 파일 경로
+
+    Returns:
+        dict: {'path', 'version'} 또는 None (설치되지 않음)
+    """
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        spec = None
+    if spec is None or not spec.origin:
+        return None
+
+    def compute():
+        try:
+            version = importlib.metadata.version(name)
+        except importlib.metadata.PackageNotFoundError:
+            version = None
+        return {'path': spec.origin, 'version': version}
+
+    return _cached(_file_key(name, spec.origin), compute, cache_path)
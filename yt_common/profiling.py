@@ -0,0 +1,259 @@
+"""
+작업별 프로파일링 (기본 꺼짐)
+- 느리거나 메모리를 많이 쓰는 작업의 원인을 찾기 위해 작업 하나를 cProfile/tracemalloc으로 감쌈
+- 작업 ID별로 .prof 파일(CPU)과 작업 동안 늘어난 할당 상위 목록(.mem.txt)을 저장
+- N개 작업 중 1개만 프로파일링하는 샘플링 모드로 운영 중에도 켜 둘 수 있음
+
+환경변수:
+    YT_PROFILE         cpu, mem, cpu,mem (또는 all/1) - 비어 있으면 꺼짐
+    YT_PROFILE_SAMPLE  N개 작업 중 1개만 프로파일링 (기본 1 = 모든 작업)
+    YT_PROFILE_DIR     결과 저장 폴더 (기본 ~/.cache/youtube_audio_downloader/profiles)
+    YT_PROFILE_TOP     메모리 할당 상위 몇 줄을 저장할지 (기본 25)
+
+사용 예:
+    >>> from yt_common.profiling import profiler
+    >>> @profiler.wrap            # 호출마다 새 작업 ID
+    ... def download_task(url): ...
+    >>> @profiler.wrap_job        # 첫 인자가 작업 ID
+    ... def download_source(job_id, url): ...
+
+결과 확인:
+    python3 -m pstats <폴더>/<시각>_<작업 ID>.download_task.prof   (sort cumtime → stats 20)
+
+주의:
+- cProfile은 켠 스레드만 측정하므로 ffmpeg 등 자식 프로세스의 CPU 시간은 포함되지 않음
+- cProfile은 프로세스에서 한 번에 하나만 켤 수 있어 동시에 실행 중인 작업이 이미 측정 중이면
+  그 작업은 CPU 프로파일을 건너뜀 (메모리 측정은 그대로 진행)
+- tracemalloc은 프로세스 전체 할당을 추적하므로 동시에 실행 중인 다른 작업의 할당도 섞일 수 있음
+"""
+
+import cProfile
+import functools
+import inspect
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+
+from yt_common import CACHE_DIR
+
+DEFAULT_PROFILE_DIR = CACHE_DIR / 'profiles'
+DEFAULT_TOP = 25
+MODES = ('cpu', 'mem')
+
+# 할당 위치를 줄 단위로 묶으므로 호출 스택은 한 단계만 기록 (추적 비용 최소화)
+TRACEMALLOC_FRAMES = 1
+
+# 할당 목록에서 제외할 위치 (추적기/프로파일러 자신, import 과정)
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, cProfile.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+def parse_modes(value):
+    """
+    YT_PROFILE 값 → 측정 종류 집합
+
+    Raises:
+        ValueError: cpu/mem/all 외의 값
+    """
+    value = (value or '').strip().lower()
+    if value in ('', '0', 'off', 'no', 'false'):
+        return frozenset()
+    if value in ('1', 'on', 'yes', 'true', 'all'):
+        return frozenset(MODES)
+    modes = {mode.strip() for mode in value.split(',') if mode.strip()}
+    unknown = modes - set(MODES)
+    if unknown:
+        raise ValueError(f"YT_PROFILE 값을 알 수 없습니다: {', '.join(sorted(unknown))} (cpu, mem, all 중 선택)")
+    return frozenset(modes)
+
+
+class JobProfiler:
+    """
+    작업 단위 cProfile/tracemalloc 측정기 (스레드 안전)
+
+    샘플링은 작업 ID 해시로 결정하므로 다운로드/변환처럼 단계가 나뉘어 다른 스레드에서
+    실행되어도 같은 작업은 모든 단계가 함께 측정되거나 함께 건너뜀
+    """
+
+    def __init__(self, modes=(), sample=1, directory=DEFAULT_PROFILE_DIR, top=DEFAULT_TOP):
+        """
+        Args:
+            modes: 측정 종류 ('cpu', 'mem')
+            sample (int): N개 작업 중 1개만 측정
+            directory: 결과 저장 폴더
+            top (int): 메모리 할당 상위 몇 줄을 저장할지
+        """
+        self.modes = frozenset(modes)
+        self.sample = max(1, int(sample))
+        self.directory = Path(directory)
+        self.top = top
+        self._cpu_lock = threading.Lock()  # cProfile은 한 번에 하나만
+        self._mem_lock = threading.Lock()
+        self._mem_users = 0                # tracemalloc을 쓰는 작업 수 (마지막 작업이 끝나면 추적 중지)
+        self._started_tracing = False
+
+    @classmethod
+    def from_env(cls):
+        """환경변수(YT_PROFILE, YT_PROFILE_SAMPLE, YT_PROFILE_DIR, YT_PROFILE_TOP)로 생성"""
+        return cls(
+            modes=parse_modes(os.environ.get('YT_PROFILE')),
+            sample=int(os.environ.get('YT_PROFILE_SAMPLE', '1')),
+            directory=os.environ.get('YT_PROFILE_DIR', DEFAULT_PROFILE_DIR),
+            top=int(os.environ.get('YT_PROFILE_TOP', str(DEFAULT_TOP))),
+        )
+
+    @property
+    def enabled(self):
+        return bool(self.modes)
+
+    def describe(self):
+        """시작 메시지용 설정 요약 (꺼져 있으면 빈 문자열)"""
+        if not self.enabled:
+            return ''
+        sample = '모든 작업' if self.sample == 1 else f'{self.sample}개 중 1개'
+        return f"{'+'.join(mode for mode in MODES if mode in self.modes)} · {sample} · {self.directory}"
+
+    def sampled(self, job_id):
+        """이 작업을 측정할지 여부"""
+        return self.enabled and zlib.crc32(str(job_id).encode('utf-8')) % self.sample == 0
+
+    @contextmanager
+    def job(self, job_id, label='job'):
+        """
+        작업 하나를 측정하는 컨텍스트 매니저
+
+        측정 대상이면 <시각>_<작업 ID>.<label>.prof / .mem.txt 를 저장
+        (저장 실패는 작업 결과에 영향을 주지 않도록 메시지만 출력)
+
+        Yields:
+            Path: 결과 파일 경로 앞부분 (측정하지 않으면 None)
+        """
+        if not self.sampled(job_id):
+            yield None
+            return
+
+        stem = self.directory / f"{time.strftime('%Y%m%d-%H%M%S')}_{job_id}.{label}"
+        profile = self._start_cpu()
+        baseline = self._start_mem()
+        started = time.perf_counter()
+        try:
+            yield stem
+        finally:
+            elapsed = time.perf_counter() - started
+            if profile is not None:
+                profile.disable()
+                self._cpu_lock.release()
+            # 메모리 스냅샷은 .prof 저장(할당 발생)보다 먼저
+            report = None
+            if baseline is not None:
+                try:
+                    report = self._mem_report(baseline, job_id, label, elapsed, cpu=profile is not None)
+                finally:
+                    self._stop_mem()
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                if profile is not None:
+                    profile.dump_stats(f'{stem}.prof')
+                if report is not None:
+                    Path(f'{stem}.mem.txt').write_text(report, encoding='utf-8')
+                print(f"[PROFILE] {job_id} {label} ({elapsed:.1f}초) → {stem}.*", flush=True)
+            except OSError as e:
+                print(f"[PROFILE] 결과 저장 실패: {e}", flush=True)
+
+    def wrap(self, func):
+        """작업 함수 데코레이터 - 호출마다 새 작업 ID로 측정 (함수 이름이 label)"""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return func(*args, **kwargs)
+            with self.job(uuid.uuid4().hex[:12], func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def wrap_job(self, func):
+        """
+        작업 함수 데코레이터 - 첫 인자를 작업 ID로 사용 (코루틴 함수도 지원)
+
+        코루틴은 이벤트 루프 스레드에서 측정하므로 같은 루프에서 동시에 실행된
+        다른 코루틴의 CPU 시간도 .prof에 함께 기록됨
+        """
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(job_id, *args, **kwargs):
+                if not self.enabled:
+                    return await func(job_id, *args, **kwargs)
+                with self.job(job_id, func.__name__):
+                    return await func(job_id, *args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(job_id, *args, **kwargs):
+            if not self.enabled:
+                return func(job_id, *args, **kwargs)
+            with self.job(job_id, func.__name__):
+                return func(job_id, *args, **kwargs)
+        return wrapper
+
+    def _start_cpu(self):
+        """cProfile 시작 (CPU 측정이 꺼져 있거나 다른 작업이 측정 중이면 None)"""
+        if 'cpu' not in self.modes or not self._cpu_lock.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # 다른 프로파일러(디버거, sys.setprofile 등)가 이미 켜져 있음
+            self._cpu_lock.release()
+            return None
+        return profile
+
+    def _start_mem(self):
+        """tracemalloc 시작 후 기준 스냅샷 반환 (메모리 측정이 꺼져 있으면 None)"""
+        if 'mem' not in self.modes:
+            return None
+        with self._mem_lock:
+            if self._mem_users == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+                self._started_tracing = True
+            self._mem_users += 1
+        return tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+
+    def _stop_mem(self):
+        """마지막 작업이 끝나면 tracemalloc 중지 (직접 시작한 경우만)"""
+        with self._mem_lock:
+            self._mem_users -= 1
+            if self._mem_users == 0 and self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+
+    def _mem_report(self, baseline, job_id, label, elapsed, cpu):
+        """작업 동안 늘어난 할당 상위 목록 (.mem.txt 내용)"""
+        snapshot = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+        current, peak = tracemalloc.get_traced_memory()
+        stats = snapshot.compare_to(baseline, 'lineno')
+        growth = sum(stat.size_diff for stat in stats)
+        mb = 1024 * 1024
+        lines = [
+            f"# 작업 {job_id} ({label}) · {elapsed:.1f}초"
+            f"{'' if cpu or 'cpu' not in self.modes else ' · CPU 프로파일 건너뜀 (다른 작업 측정 중)'}",
+            f"# 작업 동안 늘어난 메모리: {growth / mb:+.2f} MB",
+            f"# 추적 중인 메모리 (프로세스 전체): 현재 {current / mb:.1f} MB · 최대 {peak / mb:.1f} MB",
+            f"# 할당 위치별 증가량 상위 {self.top}개",
+            '',
+        ]
+        lines.extend(str(stat) for stat in stats[:self.top])
+        return '\n'.join(lines) + '\n'
+
+
+# 프로세스 전체가 공유하는 측정기 (환경변수로 설정, 기본 꺼짐)
+profiler = JobProfiler.from_env()
@@ -0,0 +1,176 @@
+"""
+진행 상황 보고 도구 (모든 변형 앱 공용)
+- LogBuffer: 고정 크기 링 버퍼 로그 (순번 기반 증분 조회)
+- ProgressAggregator: yt-dlp 진행 콜백을 초당 최대 PROGRESS_MAX_RATE번으로 줄여 내보냄
+- status_payload / status_stream: 단일 작업 앱(yt-dlp/, simple/, pytube/)의
+  /status 응답과 /events SSE 스트림 (Flask 없이 dict/문자열만 만듦)
+"""
+
+import itertools
+import json
+import time
+from collections import deque
+
+# 로그 버퍼 기본 용량 (줄 수)
+LOG_CAPACITY = 1000
+
+# 진행 상황 업데이트 최대 빈도 (초당 횟수)
+PROGRESS_MAX_RATE = 4
+
+# SSE 연결 유지용 keepalive 전송 간격 (초)
+SSE_KEEPALIVE = 15
+
+
+class LogBuffer:
+    """
+    고정 크기 링 버퍼 로그 저장소
+    - 용량을 넘으면 가장 오래된 로그부터 버려 메모리 사용량이 일정하게 유지됨
+    - 각 로그에 단조 증가하는 순번(seq)을 붙여 증분 조회 지원
+    - 자체 락 없음: 호출하는 쪽의 상태 락 안에서만 사용
+    """
+
+    def __init__(self, capacity=LOG_CAPACITY):
+        self._lines = deque(maxlen=capacity)
+        self.first_seq = 0  # 버퍼에 남아 있는 가장 오래된 로그의 순번
+        self.next_seq = 0   # 다음에 추가될 로그의 순번
+
+    def append(self, message):
+        """로그 추가"""
+        if len(self._lines) == self._lines.maxlen:
+            self.first_seq += 1
+        self._lines.append(message)
+        self.next_seq += 1
+
+    def since(self, seq):
+        """
+        seq 번 이후의 로그 조회
+        Args:
+            seq: 클라이언트가 마지막으로 받은 next_seq (처음이면 0)
+        Returns:
+            list: 새 로그 목록 (이미 버려진 로그는 제외)
+        """
+        start = max(seq, self.first_seq)
+        return list(itertools.islice(self._lines, start - self.first_seq, None))
+
+
+class ProgressAggregator:
+    """
+    yt-dlp 진행 상황 콜백 집계기
+    - yt-dlp는 초당 수십 번 콜백을 호출하므로 바이트 수만 기록하고
+      초당 최대 max_rate번만 업데이트를 내보냄
+    - 단계 변경(downloading → finished 등)과 최종 이벤트는 항상 내보냄
+    - 락 없음: 다운로드 하나의 스레드에서만 호출
+    """
+
+    def __init__(self, max_rate=PROGRESS_MAX_RATE):
+        self.interval = 1.0 / max_rate
+        self.stage = None
+        self.last_publish = 0.0
+        self.downloaded = 0
+        self.total = None
+
+    def sample(self, d):
+        """
+        콜백 데이터 기록
+        Args:
+            d: yt-dlp 진행 정보
+        Returns:
+            bool: 이번 콜백을 화면/상태에 반영해야 하면 True
+        """
+        stage = d.get('status')
+        self.downloaded = d.get('downloaded_bytes') or self.downloaded
+        self.total = d.get('total_bytes') or d.get('total_bytes_estimate') or self.total
+
+        now = time.monotonic()
+        if stage == self.stage == 'downloading' and now - self.last_publish < self.interval:
+            return False
+
+        self.stage = stage
+        self.last_publish = now
+        return True
+
+    @property
+    def percent(self):
+        """다운로드 진행률 (0~100, 전체 크기를 모르면 None)"""
+        if not self.total:
+            return None
+        return min(100.0, self.downloaded * 100.0 / self.total)
+
+
+def sse_event(event, data):
+    """
+    Server-Sent Events 형식의 메시지 생성
+    Args:
+        event: 이벤트 이름
+        data: JSON으로 직렬화할 데이터
+    Returns:
+        str: SSE 메시지 문자열
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def status_payload(status, lock, since=None):
+    """
+    /status 응답 내용
+    Args:
+        status: 상태 dict (state, message, logs, run, run_start)
+        lock: status를 보호하는 락
+        since: 이 순번 이후의 로그만 반환 (None이면 이번 다운로드의 처음부터)
+    Returns:
+        dict: 상태와 새 로그
+    """
+    with lock:
+        logs = status['logs']
+        if since is None:
+            since = status['run_start']
+        return {
+            'state': status['state'],
+            'message': status['message'],
+            'run': status['run'],
+            'logs': logs.since(since),
+            'next_seq': logs.next_seq,
+            'truncated': since < logs.first_seq,
+        }
+
+
+def status_stream(status, changed, keepalive=SSE_KEEPALIVE):
+    """
+    상태 푸시 스트림 (SSE 메시지 제너레이터) - 새 로그와 상태 변경만 전송
+    - 새 다운로드가 시작되면(run 변경) reset과 함께 이번 회차 로그를 처음부터 다시 전송
+    - 변화가 없으면 keepalive초마다 주석 줄을 보내 연결 유지
+    Args:
+        status: 상태 dict (state, message, logs, run, run_start)
+        changed: 상태 변경 시 notify_all()되는 threading.Condition (status 락 사용)
+        keepalive: keepalive 전송 간격 (초)
+    Yields:
+        str: SSE 메시지
+    """
+    sent_run = None
+    sent_seq = 0
+    sent_state = None
+
+    while True:
+        with changed:
+            changed.wait_for(
+                lambda: status['run'] != sent_run
+                or status['logs'].next_seq > sent_seq
+                or status['state'] != sent_state,
+                timeout=keepalive
+            )
+            reset = status['run'] != sent_run
+            if reset:
+                sent_run = status['run']
+                sent_seq = status['run_start']
+            new_logs = status['logs'].since(sent_seq)
+            next_seq = status['logs'].next_seq
+            state = status['state']
+            update = {'state': state, 'message': status['message'], 'logs': new_logs,
+                      'next_seq': next_seq, 'reset': reset}
+
+        if not reset and not new_logs and state == sent_state:
+            yield ": keepalive\n\n"
+            continue
+
+        sent_seq = next_seq
+        sent_state = state
+        yield sse_event('update', update)
@@ -0,0 +1,179 @@
+"""
+다중 연결 Range 다운로더
+
+YouTube는 연결 하나당 속도를 제한하므로 파일을 일정 크기 조각으로 나눠
+여러 연결에서 동시에 받습니다.
+
+- 파일을 전체 크기로 미리 할당한 뒤 각 조각을 자기 위치에 바로 기록 (병합 과정 없음)
+- 연결은 requests.Session 하나를 공유 (Keep-Alive로 TLS 연결 재사용)
+- 조각 단위 재시도 (한 조각 실패가 전체 실패로 이어지지 않음)
+"""
+
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from yt_common.metrics import metrics
+
+# 기본 설정
+DEFAULT_CHUNK_SIZE = 2 * 1024 * 1024  # 조각 하나의 크기 (2 MB)
+DEFAULT_CONNECTIONS = 4               # 동시 연결 수
+READ_SIZE = 64 * 1024                 # 응답을 읽어 파일에 쓰는 단위
+CHUNK_RETRIES = 3                     # 조각별 재시도 횟수
+HTTP_TIMEOUT = 30                     # 연결/읽기 제한 시간 (초)
+
+CONTENT_RANGE_RE = re.compile(r'bytes \d+-\d+/(\d+)')
+
+
+class RangeNotSupported(OSError):
+    """서버가 Range 요청에 206 대신 전체 응답(200)을 보냈을 때 (받은 범위로 이어받을 수 없음)"""
+
+
+def split_ranges(total_size, chunk_size):
+    """
+    전체 크기를 (시작, 끝) 바이트 범위로 분할 (끝 포함)
+
+    Args:
+        total_size (int): 전체 크기
+        chunk_size (int): 조각 크기
+
+    Returns:
+        list: [(start, end), ...]
+    """
+    return [
+        (start, min(start + chunk_size, total_size) - 1)
+        for start in range(0, total_size, chunk_size)
+    ]
+
+
+def probe_size(session, url):
+    """
+    Range 요청(첫 1바이트)으로 전체 크기와 Range 지원 여부 확인
+
+    Args:
+        session: requests.Session
+        url (str): 다운로드 URL
+
+    Returns:
+        int: 전체 크기 (Range를 지원하지 않거나 알 수 없으면 None)
+    """
+    with session.get(url, headers={'Range': 'bytes=0-0'}, stream=True, timeout=HTTP_TIMEOUT) as response:
+        response.raise_for_status()
+        match = CONTENT_RANGE_RE.match(response.headers.get('Content-Range', ''))
+        if response.status_code == 206 and match:
+            return int(match.group(1))
+    return None
+
+
+def preallocate(path, total_size):
+    """
+    전체 크기의 파일을 미리 생성 (각 조각을 제자리에 쓰기 위해)
+
+    Args:
+        path (str): 파일 경로
+        total_size (int): 전체 크기
+    """
+    with open(path, 'wb') as f:
+        f.truncate(total_size)
+
+
+def fetch_range(session, url, path, start, end, on_bytes=None):
+    """
+    바이트 범위 하나를 받아 파일의 같은 위치에 기록 (실패 시 재시도)
+
+    Args:
+        session: requests.Session
+        url (str): 다운로드 URL
+        path (str): 미리 할당된 파일 경로
+        start (int): 시작 바이트
+        end (int): 끝 바이트 (포함)
+        on_bytes: 받은 바이트 수 콜백 (재시도 시 음수로 되돌림)
+
+    Raises:
+        OSError: 재시도 후에도 실패했을 때 (requests 예외 포함)
+    """
+    expected = end - start + 1
+    last_error = None
+
+    for _ in range(CHUNK_RETRIES):
+        written = 0
+        try:
+            with session.get(url, headers={'Range': f'bytes={start}-{end}'},
+                             stream=True, timeout=HTTP_TIMEOUT) as response:
+                response.raise_for_status()
+                if response.status_code != 206:
+                    raise RangeNotSupported(f"서버가 Range 요청을 지원하지 않습니다 (HTTP {response.status_code})")
+
+                with open(path, 'r+b') as f:
+                    f.seek(start)
+                    for chunk in response.iter_content(READ_SIZE):
+                        f.write(chunk)
+                        written += len(chunk)
+                        if on_bytes:
+                            on_bytes(len(chunk))
+
+            if written != expected:
+                raise OSError(f"조각 크기 불일치: {written}/{expected} 바이트")
+            return
+        except OSError as e:
+            last_error = e
+            if on_bytes and written:
+                on_bytes(-written)
+
+    raise last_error
+
+
+def ranged_download(session, url, path, total_size, chunk_size=DEFAULT_CHUNK_SIZE,
+                    connections=DEFAULT_CONNECTIONS, on_progress=None, checkpoint=None):
+    """
+    여러 연결로 조각을 동시에 받아 미리 할당한 파일에 기록
+
+    Args:
+        session: requests.Session (연결 풀 크기는 connections 이상 권장)
+        url (str): 다운로드 URL
+        path (str): 저장 경로
+        total_size (int): 전체 크기 (바이트)
+        chunk_size (int): 조각 크기
+        connections (int): 동시 연결 수
+        on_progress: 콜백 (받은 바이트 합계, 전체 크기)
+        checkpoint: DownloadCheckpoint - 있으면 이미 받은 범위는 건너뛰고
+                    범위가 끝날 때마다 기록 (중단 후 이어받기)
+
+    Raises:
+        OSError: 조각 하나라도 재시도 후 실패했을 때
+    """
+    if checkpoint is not None:
+        if not (checkpoint.resumed and os.path.exists(path)):
+            preallocate(path, total_size)
+        ranges = checkpoint.missing()
+    else:
+        preallocate(path, total_size)
+        ranges = split_ranges(total_size, chunk_size)
+
+    lock = threading.Lock()
+    received = [total_size - sum(end - start + 1 for start, end in ranges)]
+
+    def on_bytes(count):
+        if count > 0:
+            metrics.add_bytes(count)
+        with lock:
+            received[0] += count
+            current = received[0]
+        if on_progress:
+            on_progress(current, total_size)
+
+    with ThreadPoolExecutor(max_workers=connections, thread_name_prefix='range') as pool:
+        futures = {
+            pool.submit(fetch_range, session, url, path, start, end, on_bytes): (start, end)
+            for start, end in ranges
+        }
+        try:
+            for future in as_completed(futures):
+                future.result()
+                if checkpoint is not None:
+                    checkpoint.mark_done(*futures[future])
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
@@ -0,0 +1,182 @@
+"""
+Rate Limit 대응 요청 스케줄러 (토큰 버킷 + 지수 백오프)
+
+작업마다 고정으로 1~3초씩 쉬는 대신, 프로세스 전체의 정보 추출/다운로드 요청을
+토큰 버킷 하나로 계량합니다.
+
+- 평소: 초당 rate개까지 바로 통과 (burst개까지는 몰려도 대기 없음)
+- 429 / rate-limited 감지 (penalize): 요청 속도를 절반으로 낮추고
+  지수 백오프(지터 포함) 동안 모든 요청을 멈춤
+- 성공 (success): 요청 속도를 조금씩 올려 max_rate까지 회복 (AIMD)
+  → 고정된 느린 속도가 아니라 유지 가능한 가장 빠른 속도로 동작
+- 대기 시간은 예약 방식으로 계산 (reserve) - 스레드는 acquire(), asyncio는 acquire_async()
+"""
+
+import random
+import threading
+import time
+
+# 기본 설정
+DEFAULT_RATE = 2.0        # 초당 요청 수 (시작값이자 최대값)
+DEFAULT_BURST = 4         # 대기 없이 연속으로 보낼 수 있는 요청 수
+MIN_RATE = 0.05           # 최저 요청 속도 (20초에 1번)
+RECOVERY_STEP = 0.05      # 성공할 때마다 올리는 요청 속도
+BASE_BACKOFF = 30.0       # 첫 백오프 (초)
+MAX_BACKOFF = 15 * 60.0   # 최대 백오프 (초)
+
+# Rate Limit 오류 문구
+RATE_LIMIT_MARKERS = ('rate-limited', 'rate limit', 'http error 429', 'too many requests')
+
+
+def is_rate_limit_error(error):
+    """
+    Rate Limit(429) 오류인지 확인
+
+    Args:
+        error: 예외 객체 또는 오류 메시지
+
+    Returns:
+        bool: Rate Limit 오류이면 True
+    """
+    message = str(error).lower()
+    return any(marker in message for marker in RATE_LIMIT_MARKERS)
+
+
+class RateLimiter:
+    """
+    프로세스 전체가 공유하는 요청 스케줄러
+
+    여러 스레드에서 동시에 사용해도 안전
+
+    Examples:
+        >>> limiter = RateLimiter()
+        >>> limiter.acquire()            # 정보 추출/다운로드 요청 직전
+        >>> limiter.success()            # 요청 성공
+        >>> limiter.penalize()           # 429 감지 → 백오프 시간(초) 반환
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, min_rate=MIN_RATE,
+                 recovery=RECOVERY_STEP, base_backoff=BASE_BACKOFF, max_backoff=MAX_BACKOFF):
+        """
+        Args:
+            rate (float): 초당 요청 수 (최대값)
+            burst (int): 버킷 크기
+            min_rate (float): 최저 요청 속도
+            recovery (float): 성공 시 올리는 요청 속도
+            base_backoff (float): 첫 백오프 (초)
+            max_backoff (float): 최대 백오프 (초)
+        """
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.recovery = recovery
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self.tokens = float(burst)
+        self.strikes = 0              # 연속 백오프 횟수 (성공하면 줄어듦)
+        self.penalties = 0            # 누적 429 감지 횟수
+        self.waited_seconds = 0.0     # 요청들이 기다린 누적 시간
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        """경과 시간만큼 토큰 채우기 (백오프 중에는 채우지 않음, 락 안에서 호출)"""
+        start = max(self._updated, self._blocked_until)
+        if now > start:
+            self.tokens = min(float(self.burst), self.tokens + (now - start) * self.rate)
+        self._updated = now
+
+    def reserve(self):
+        """
+        요청 하나를 예약하고 기다려야 할 시간 반환 (기다리지는 않음)
+
+        Returns:
+            float: 대기 시간 (초)
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            delay = max(0.0, self._blocked_until - now) + max(0.0, -self.tokens) / self.rate
+            self.waited_seconds += delay
+            return delay
+
+    def acquire(self):
+        """
+        요청 차례가 올 때까지 대기 (스레드용)
+
+        Returns:
+            float: 기다린 시간 (초)
+        """
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    async def acquire_async(self):
+        """
+        요청 차례가 올 때까지 대기 (asyncio용 - 이벤트 루프를 막지 않음)
+
+        Returns:
+            float: 기다린 시간 (초)
+        """
+        import asyncio
+
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def success(self):
+        """요청 성공 - 요청 속도를 조금씩 회복"""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.recovery)
+            if self.rate >= self.max_rate:
+                self.strikes = 0
+            elif self.strikes:
+                self.strikes -= 1
+
+    def penalize(self):
+        """
+        429 / rate-limited 감지 - 요청 속도를 절반으로 낮추고 백오프
+
+        백오프는 연속 감지 횟수에 따라 두 배씩 늘어나며 50~100% 사이에서 무작위로 정함
+        (여러 작업이 같은 순간에 다시 몰리지 않도록)
+
+        Returns:
+            float: 이번 백오프 시간 (초)
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.penalties += 1
+            self.strikes += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            backoff = min(self.max_backoff, self.base_backoff * 2 ** (self.strikes - 1))
+            backoff *= random.uniform(0.5, 1.0)
+            self._blocked_until = max(self._blocked_until, now + backoff)
+            self.tokens = min(self.tokens, 0.0)
+            return backoff
+
+    def stats(self):
+        """
+        현재 상태
+
+        Returns:
+            dict: 요청 속도, 남은 토큰, 백오프 남은 시간, 누적 429 횟수, 누적 대기 시간
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            return {
+                'rate': round(self.rate, 3),
+                'max_rate': self.max_rate,
+                'tokens': round(self.tokens, 2),
+                'blocked_seconds': round(max(0.0, self._blocked_until - now), 1),
+                'strikes': self.strikes,
+                'penalties': self.penalties,
+                'waited_seconds': round(self.waited_seconds, 1),
+            }
@@ -0,0 +1,189 @@
+"""
+폴백 전략 성공률 기록과 시도 순서 학습 (SQLite)
+
+Chrome → Safari 쿠키, player_client 조합, YouTube → YouTube Music 같은 폴백 순서를
+코드에 고정하지 않고, 전략별 최근 성공/실패와 소요 시간을 기록해 잘 되는 전략부터 시도합니다.
+
+- 범위(scope): 폴백 묶음 이름 (예: 'ytdlp.cookies', 'cli.source')
+- 최근 결과일수록 크게 반영 (반감기 HALF_LIFE마다 예전 기록의 가중치가 절반)
+- 순서 결정: 톰슨 샘플링 - 전략마다 Beta(성공+1, 실패+1)에서 값을 뽑아 큰 순서대로 시도
+  기록이 적은 전략도 가끔 앞에 나오므로 상황이 바뀌면 다시 발견됨 (탐색)
+- 기록이 없을 때는 코드의 기본 순서를 따르도록 앞 전략일수록 가상 성공을 더 줌 (기록이 쌓이면 무시됨)
+- 같은 값이면 평균 소요 시간이 짧은 전략 우선
+"""
+
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from yt_common import CACHE_DIR
+
+# 기본 설정
+DEFAULT_STATS_PATH = CACHE_DIR / 'strategies.sqlite3'
+HALF_LIFE = 3 * 24 * 60 * 60  # 3일 지난 기록은 가중치 절반
+LATENCY_ALPHA = 0.2           # 소요 시간 지수 이동 평균 계수
+DEFAULT_ORDER_PRIOR = 2.0     # 기록이 적을 때 코드의 기본 순서를 따르도록 첫 전략에 주는 가상 성공 수
+
+
+class StrategyStats:
+    """
+    전략별 성공/실패/소요 시간 저장소
+
+    여러 스레드에서 동시에 사용해도 안전 (연결 하나를 락으로 보호)
+
+    Examples:
+        >>> strategies = StrategyStats()
+        >>> for name in strategies.order('ytdlp.cookies', ['chrome', 'safari']):
+        ...     started = time.monotonic()
+        ...     try:
+        ...         download(name)
+        ...     except Exception:
+        ...         strategies.record('ytdlp.cookies', name, False, time.monotonic() - started)
+        ...         continue
+        ...     strategies.record('ytdlp.cookies', name, True, time.monotonic() - started)
+        ...     break
+    """
+
+    def __init__(self, path=DEFAULT_STATS_PATH, half_life=HALF_LIFE):
+        """
+        Args:
+            path: SQLite 파일 경로
+            half_life (float): 기록 가중치 반감기 (초)
+        """
+        self.path = str(path)
+        self.half_life = half_life
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        """처음 사용할 때 DB 연결 및 테이블 생성 (락 안에서 호출)"""
+        if self._conn is None:
+            if self.path != ':memory:':
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS strategy (
+                    scope     TEXT NOT NULL,
+                    name      TEXT NOT NULL,
+                    successes REAL NOT NULL,
+                    failures  REAL NOT NULL,
+                    latency   REAL,
+                    attempts  INTEGER NOT NULL,
+                    updated   REAL NOT NULL,
+                    PRIMARY KEY (scope, name)
+                )
+            ''')
+        return self._conn
+
+    def _decay(self, updated, now):
+        """경과 시간만큼 예전 기록의 가중치 (0~1)"""
+        return 0.5 ** (max(0.0, now - updated) / self.half_life)
+
+    def _rows(self, conn, scope, now):
+        """범위의 전략별 (감쇠 적용된 성공, 실패, 소요 시간, 시도 수, 갱신 시각)"""
+        rows = conn.execute(
+            'SELECT name, successes, failures, latency, attempts, updated FROM strategy WHERE scope = ?',
+            (scope,)
+        ).fetchall()
+        result = {}
+        for name, successes, failures, latency, attempts, updated in rows:
+            weight = self._decay(updated, now)
+            result[name] = (successes * weight, failures * weight, latency, attempts, updated)
+        return result
+
+    def order(self, scope, strategies):
+        """
+        이번 작업에서 시도할 순서 (톰슨 샘플링)
+
+        Args:
+            scope (str): 폴백 묶음 이름
+            strategies (list): 전략 이름 목록 (기록이 없으면 이 순서가 기본 우선순위)
+
+        Returns:
+            list: 시도 순서로 정렬된 전략 이름
+        """
+        now = time.time()
+        with self._lock:
+            rows = self._rows(self._connect(), scope, now)
+
+        last = max(1, len(strategies) - 1)
+
+        def score(item):
+            index, name = item
+            successes, failures, latency, _, _ = rows.get(name, (0.0, 0.0, None, 0, now))
+            prior = DEFAULT_ORDER_PRIOR * (last - index) / last
+            sample = random.betavariate(successes + 1 + prior, failures + 1)
+            return (-sample, latency if latency is not None else float('inf'), index)
+
+        return [name for _, name in sorted(enumerate(strategies), key=score)]
+
+    def record(self, scope, name, ok, seconds=None):
+        """
+        시도 결과 기록
+
+        Args:
+            scope (str): 폴백 묶음 이름
+            name (str): 전략 이름
+            ok (bool): 성공 여부
+            seconds (float): 소요 시간 (성공한 시도만 평균에 반영)
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            successes, failures, latency, attempts, _ = self._rows(conn, scope, now).get(
+                name, (0.0, 0.0, None, 0, now)
+            )
+            if ok:
+                successes += 1
+                if seconds is not None:
+                    latency = seconds if latency is None else (
+                        LATENCY_ALPHA * seconds + (1 - LATENCY_ALPHA) * latency
+                    )
+            else:
+                failures += 1
+            conn.execute(
+                'INSERT OR REPLACE INTO strategy (scope, name, successes, failures, latency, attempts, updated) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (scope, name, successes, failures, latency, attempts + 1, now)
+            )
+            conn.commit()
+
+    def stats(self, scope=None):
+        """
+        전략별 통계 (어떤 경로가 잘 되는지 확인용)
+
+        Args:
+            scope (str): 폴백 묶음 이름 (None이면 전체)
+
+        Returns:
+            list: [{'scope', 'name', 'success_rate', 'successes', 'failures',
+                    'latency_seconds', 'attempts', 'updated'}, ...] - 범위별 성공률 높은 순
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            scopes = [scope] if scope else [
+                row[0] for row in conn.execute('SELECT DISTINCT scope FROM strategy ORDER BY scope')
+            ]
+            result = []
+            for current in scopes:
+                rows = self._rows(conn, current, now)
+                entries = []
+                for name, (successes, failures, latency, attempts, updated) in rows.items():
+                    total = successes + failures
+                    entries.append({
+                        'scope': current,
+                        'name': name,
+                        'success_rate': round(successes / total, 3) if total else None,
+                        'successes': round(successes, 2),
+                        'failures': round(failures, 2),
+                        'latency_seconds': round(latency, 2) if latency is not None else None,
+                        'attempts': attempts,
+                        'updated': updated,
+                    })
+                entries.sort(key=lambda entry: -(entry['success_rate'] or 0))
+                result.extend(entries)
+        return result
@@ -0,0 +1,330 @@
+"""
+스트리밍 FLAC 저장 (임시 파일 없음)
+
+HTTP 응답 본문을 받는 즉시 ffmpeg stdin으로 넘겨 인코딩합니다.
+원본 파일을 디스크에 썼다가 다시 읽는 과정이 없으므로 마지막 바이트를 받은 뒤
+몇 초 안에 FLAC이 완성됩니다.
+
+- YouTube는 한 번에 큰 범위를 요청하면 속도를 제한하므로 Range 요청을 일정 크기로 나눠 받음
+- 진행 상황은 yt-dlp progress_hooks와 같은 형식의 dict로 전달 (기존 콜백 재사용)
+"""
+
+import os
+import re
+import socket
+import subprocess
+import threading
+import time
+import urllib.request
+from collections import deque
+
+from yt_common.library import final_filepath
+from yt_common.metrics import metrics
+from yt_common.transcode import FFmpegError, flac_args
+
+# Range 요청 하나의 크기 (yt-dlp의 YouTube http_chunk_size와 동일)
+RANGE_CHUNK_SIZE = 10 * 1024 * 1024
+
+# 응답 본문을 읽어 ffmpeg에 넘기는 단위
+READ_SIZE = 64 * 1024
+
+# 연결/읽기 제한 시간 (초)
+HTTP_TIMEOUT = 30
+
+CONTENT_RANGE_RE = re.compile(r'bytes \d+-\d+/(\d+)')
+
+
+class Cancelled(Exception):
+    """CancelToken이 취소되어 읽기를 멈춤"""
+
+
+class CancelToken:
+    """
+    스트림 취소 신호 (스레드 안전)
+
+    cancel()을 호출하면 읽는 쪽이 다음 조각 전에 Cancelled로 멈추고,
+    등록된 정리 함수(응답 소켓 끊기 등)를 바로 호출해 멈춰 있는 읽기도 깨움
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def on_cancel(self, callback):
+        """
+        취소 시 호출할 함수 등록 (이미 취소되었으면 바로 호출)
+
+        Returns:
+            함수: 등록 해제 (정상적으로 끝난 응답은 해제해 두어야 함)
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._remove(callback)
+        callback()
+        return lambda: None
+
+    def _remove(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def check(self):
+        """취소되었으면 Cancelled 발생"""
+        if self._event.is_set():
+            raise Cancelled()
+
+
+def _abort_response(response):
+    """
+    다른 스레드에서 읽고 있는 HTTP 응답 끊기
+
+    response.close()는 다른 스레드에서 대기 중인 recv를 깨우지 못하므로 소켓을 shutdown
+    (urllib은 응답의 소켓을 공개하지 않아 내부 속성을 따라감 - 없으면 close만)
+    """
+    sock = getattr(getattr(getattr(response, 'fp', None), 'raw', None), '_sock', None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+    response.close()
+
+
+def http_chunks(url, headers=None, range_size=RANGE_CHUNK_SIZE, cancel=None):
+    """
+    URL 내용을 조금씩 읽어 반환 (Range 요청을 나눠 보냄)
+
+    Args:
+        url (str): 스트림 URL
+        headers (dict): HTTP 헤더
+        range_size (int): Range 요청 하나의 크기
+        cancel (CancelToken): 취소 신호 (선택) - 취소되면 응답을 끊고 Cancelled 발생
+
+    Yields:
+        tuple: (데이터 조각, 전체 크기 또는 None)
+
+    Raises:
+        Cancelled: cancel이 취소되었을 때
+    """
+    started = time.perf_counter()
+    first = True
+    start = 0
+    total = None
+    while total is None or start < total:
+        if cancel is not None:
+            cancel.check()
+        request = urllib.request.Request(url, headers=dict(headers or {}))
+        request.add_header('Range', f'bytes={start}-{start + range_size - 1}')
+
+        with urllib.request.urlopen(request, timeout=HTTP_TIMEOUT) as response:
+            unregister = cancel.on_cancel(lambda: _abort_response(response)) if cancel else None
+            try:
+                match = CONTENT_RANGE_RE.match(response.headers.get('Content-Range', ''))
+                ranged = response.status == 206 and match
+                if ranged:
+                    total = int(match.group(1))
+
+                received = 0
+                for chunk in _read_response(response, cancel):
+                    if first:
+                        metrics.observe('first_byte', time.perf_counter() - started)
+                        first = False
+                    metrics.add_bytes(len(chunk))
+                    received += len(chunk)
+                    yield chunk, total
+            finally:
+                if unregister is not None:
+                    unregister()
+
+        # Range를 지원하지 않는 서버는 한 번에 전체를 보냄
+        if not ranged or received == 0:
+            return
+        start += received
+
+
+def _read_response(response, cancel):
+    """응답 본문을 READ_SIZE씩 읽기 (취소되면 끊긴 응답의 읽기 오류 대신 Cancelled)"""
+    while True:
+        try:
+            chunk = response.read(READ_SIZE)
+        except (OSError, ValueError, AttributeError):
+            # 취소로 소켓/응답이 닫히면 읽기 도중 오류가 남
+            if cancel is not None:
+                cancel.check()
+            raise
+        if cancel is not None:
+            cancel.check()
+        if not chunk:
+            return
+        yield chunk
+
+
+def _drain(stream, tail):
+    """stderr를 끝까지 읽어 마지막 부분만 보관 (파이프가 가득 차 멈추는 것 방지)"""
+    for line in stream:
+        tail.append(line.decode('utf-8', 'replace'))
+
+
+def stream_to_flac(chunks, output_file, compression_level=5, progress_hooks=()):
+    """
+    데이터 조각을 ffmpeg stdin으로 넘겨 FLAC로 저장
+
+    Args:
+        chunks: (데이터 조각, 전체 크기) 반복자 (http_chunks)
+        output_file (str): 저장할 FLAC 경로
+        compression_level (int): FLAC 압축 수준
+        progress_hooks: yt-dlp 형식 진행 상황 콜백 목록
+
+    Raises:
+        FFmpegError: 변환 실패 시
+    """
+    partial = output_file + '.part'
+    proc = subprocess.Popen(
+        ['ffmpeg', '-hide_banner', '-y', '-loglevel', 'error',
+         '-i', 'pipe:0', *flac_args(compression_level), partial],
+        stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    tail = deque(maxlen=20)
+    drainer = threading.Thread(target=_drain, args=(proc.stderr, tail), daemon=True)
+    drainer.start()
+
+    downloaded = 0
+    total = None
+    try:
+        # 받기와 인코딩이 동시에 진행되므로 입력이 끝날 때까지는 download 단계
+        with metrics.stage('download'):
+            try:
+                for chunk, total in chunks:
+                    proc.stdin.write(chunk)
+                    downloaded += len(chunk)
+                    progress = {'status': 'downloading', 'downloaded_bytes': downloaded, 'total_bytes': total}
+                    if total:
+                        progress['_percent_str'] = f"{downloaded * 100 / total:5.1f}%"
+                    for hook in progress_hooks:
+                        hook(progress)
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass  # ffmpeg가 먼저 종료됨 - 아래에서 종료 코드로 오류 보고
+    except BaseException:
+        proc.kill()
+        proc.wait()
+        with metrics.stage('cleanup'):
+            if os.path.exists(partial):
+                os.remove(partial)
+        raise
+
+    # 입력이 끝난 뒤 남은 인코딩
+    with metrics.stage('transcode'):
+        returncode = proc.wait()
+        drainer.join()
+        if returncode != 0:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise FFmpegError(returncode, ''.join(tail))
+
+    with metrics.stage('write'):
+        os.replace(partial, output_file)
+    for hook in progress_hooks:
+        hook({'status': 'finished', 'downloaded_bytes': downloaded, 'total_bytes': total})
+
+
+def stream_url_to_flac(url, output_file, headers=None, compression_level=5, progress_hooks=()):
+    """
+    스트림 URL → FLAC (임시 파일 없이)
+
+    Args:
+        url (str): 오디오 스트림 URL
+        output_file (str): 저장할 FLAC 경로
+        headers (dict): HTTP 헤더
+        compression_level (int): FLAC 압축 수준
+        progress_hooks: yt-dlp 형식 진행 상황 콜백 목록
+    """
+    stream_to_flac(http_chunks(url, headers), output_file, compression_level, progress_hooks)
+
+
+def selected_format(info):
+    """
+    yt-dlp가 선택한 포맷 정보
+
+    Args:
+        info (dict): process_ie_result(download=False) / extract_info 결과
+
+    Returns:
+        dict: 선택된 포맷 (url, http_headers, protocol 포함)
+    """
+    return (info.get('requested_downloads') or info.get('requested_formats') or [info])[0]
+
+
+def stream_info_to_flac(ydl, info, progress_hooks=()):
+    """
+    yt-dlp가 포맷을 선택한 info → FLAC (원본 파일을 쓰지 않음)
+
+    파일명은 ydl의 outtmpl을 따르며 확장자만 .flac으로 바꿈
+
+    Args:
+        ydl: YoutubeDL 인스턴스
+        info (dict): ydl.process_ie_result(info, download=False) 결과
+        progress_hooks: yt-dlp 형식 진행 상황 콜백 목록
+
+    Returns:
+        str: 저장된 FLAC 경로
+    """
+    fmt = selected_format(info)
+    if not fmt.get('url') or fmt.get('protocol', 'https') not in ('http', 'https'):
+        raise Exception(f"스트리밍할 수 없는 포맷입니다: {fmt.get('format_id')} ({fmt.get('protocol')})")
+
+    output_file = os.path.splitext(ydl.prepare_filename(info))[0] + '.flac'
+    stream_url_to_flac(fmt['url'], output_file, fmt.get('http_headers'), progress_hooks=progress_hooks)
+    return output_file
+
+
+def fetch_flac(ydl, info, timer, download_path, streaming=False, progress_hooks=(),
+               rate_limiter=None, log=print):
+    """
+    추출한 info로 다운로드 후 FLAC 경로 반환 (yt-dlp/, simple/ 버전 공용)
+    - 기본: yt-dlp가 원본 파일을 받은 뒤 FFmpegExtractAudio로 변환
+    - 스트리밍 모드: 응답 본문을 받는 즉시 ffmpeg stdin으로 넘겨 변환 (임시 파일 없음)
+
+    Args:
+        ydl: YoutubeDL 인스턴스
+        info: extract_info_once 결과
+        timer: YtDlpTimer (opts의 progress_hooks에 등록된 것)
+        download_path (str): 경로를 찾지 못했을 때 쓸 저장 폴더
+        streaming (bool): 스트리밍 모드 여부 (YT_STREAMING=1)
+        progress_hooks: 스트리밍 모드에서 쓸 yt-dlp 형식 진행 상황 콜백 목록
+        rate_limiter: 다운로드 요청 전에 acquire()할 RateLimiter (선택)
+        log: 로그 출력 함수
+
+    Returns:
+        str: 저장된 FLAC 경로
+    """
+    if rate_limiter is not None:
+        waited = rate_limiter.acquire()
+        if waited >= 1:
+            log(f"요청 속도 제한으로 {waited:.1f}초 대기")
+    if streaming:
+        log("스트리밍 모드: 받는 즉시 FLAC 변환 (원본 파일 저장 안 함)")
+        return stream_info_to_flac(ydl, ydl.process_ie_result(info, download=False), progress_hooks)
+
+    with timer:
+        result = ydl.process_ie_result(info, download=True)
+    title = info.get('title', 'Unknown')
+    return final_filepath(result, os.path.join(download_path, f"{title}.flac"))
@@ -0,0 +1,69 @@
+"""
+ffmpeg 스트리밍 FLAC 변환
+
+pydub(AudioSegment.from_file → export)은 곡 전체를 PCM으로 메모리에 올리므로
+3시간짜리 믹스는 수 GB의 RAM을 사용합니다.
+여기서는 ffmpeg가 입력을 조금씩 읽어 바로 인코딩하므로 길이와 상관없이 메모리 사용량이 일정합니다.
+"""
+
+import os
+import subprocess
+
+from yt_common.metrics import metrics
+
+# 오류 메시지에 포함할 ffmpeg 출력 길이
+STDERR_TAIL_CHARS = 500
+
+
+class FFmpegError(Exception):
+    """ffmpeg/streamlink 프로세스가 실패했을 때 발생"""
+
+    def __init__(self, returncode, stderr_tail):
+        super().__init__(f"ffmpeg 종료 코드 {returncode}: {stderr_tail[-STDERR_TAIL_CHARS:]}")
+        self.returncode = returncode
+        self.stderr_tail = stderr_tail
+
+
+def flac_args(compression_level=5):
+    """
+    FLAC 인코딩용 ffmpeg 출력 인자
+
+    Args:
+        compression_level (int): FLAC 압축 수준 (0~12, 음질과 무관)
+
+    Returns:
+        list: ffmpeg 인자
+    """
+    return ['-vn', '-c:a', 'flac', '-compression_level', str(compression_level), '-f', 'flac']
+
+
+def transcode_to_flac(input_file, output_file, compression_level=5):
+    """
+    오디오 파일을 FLAC로 변환 (스트리밍 - 메모리 사용량 일정)
+
+    완성 전에는 .part 파일에 쓰고 성공 시 이름을 바꾸므로
+    중간에 실패해도 불완전한 FLAC 파일이 남지 않음
+
+    Args:
+        input_file (str): 원본 오디오 파일 (webm, mp4 등)
+        output_file (str): 저장할 FLAC 경로
+        compression_level (int): FLAC 압축 수준
+
+    Raises:
+        FFmpegError: 변환 실패 시
+    """
+    partial = output_file + '.part'
+    cmd = [
+        'ffmpeg', '-hide_banner', '-nostdin', '-y', '-loglevel', 'error',
+        '-i', input_file, *flac_args(compression_level), partial,
+    ]
+
+    with metrics.stage('transcode'):
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise FFmpegError(result.returncode, result.stderr.decode('utf-8', 'replace'))
+
+    with metrics.stage('write'):
+        os.replace(partial, output_file)
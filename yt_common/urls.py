@@ -0,0 +1,150 @@
+"""
+YouTube URL 처리 유틸리티
+"""
+
+import re
+from urllib.parse import urlparse, parse_qs
+
+# YouTube 동영상 ID 형식 (11자리)
+VIDEO_ID_RE = re.compile(r'^[0-9A-Za-z_-]{11}$')
+
+
+def canonical_video_id(url):
+    """
+    YouTube URL에서 동영상 ID 추출
+
+    watch?v=, youtu.be/, shorts/, embed/, live/, music.youtube.com 형식을 모두 같은 ID로 변환
+    (플레이리스트 파라미터 등은 무시)
+
+    Args:
+        url (str): YouTube URL 또는 동영상 ID
+
+    Returns:
+        str: 동영상 ID 또는 None
+
+    Examples:
+        >>> canonical_video_id("https://www.youtube.com/watch?v=dQw4w9WgXcQ&list=PL123")
+        'dQw4w9WgXcQ'
+        >>> canonical_video_id("https://youtu.be/dQw4w9WgXcQ?si=abc")
+        'dQw4w9WgXcQ'
+        >>> canonical_video_id("https://music.youtube.com/watch?v=dQw4w9WgXcQ")
+        'dQw4w9WgXcQ'
+    """
+    if not url:
+        return None
+
+    url = url.strip()
+    if VIDEO_ID_RE.match(url):
+        return url
+
+    if '://' not in url:
+        url = 'https://' + url
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+
+    # youtu.be 짧은 URL 형식
+    if host.endswith('youtu.be'):
+        candidate = parsed.path.strip('/').split('/')[0]
+        return candidate if VIDEO_ID_RE.match(candidate) else None
+
+    if 'youtube.com' not in host:
+        return None
+
+    # watch?v= 형식
+    candidate = parse_qs(parsed.query).get('v', [None])[0]
+    if candidate and VIDEO_ID_RE.match(candidate):
+        return candidate
+
+    # /shorts/ID, /embed/ID, /live/ID, /v/ID 형식
+    parts = parsed.path.strip('/').split('/')
+    if len(parts) >= 2 and parts[0] in ('shorts', 'embed', 'live', 'v'):
+        if VIDEO_ID_RE.match(parts[1]):
+            return parts[1]
+
+    return None
+
+
+# 채널 페이지 경로 (/@이름, /channel/ID, /c/이름, /user/이름)
+CHANNEL_PATH_RE = re.compile(r'^/(@[^/]+|channel/[^/]+|c/[^/]+|user/[^/]+)')
+
+
+def is_playlist_url(url):
+    """
+    플레이리스트/채널 URL인지 확인
+
+    list= 파라미터가 있거나 채널 페이지면 True
+    (watch?v=...&list=... 처럼 동영상 ID도 있는 URL은 canonical_video_id로 함께 확인)
+
+    Examples:
+        >>> is_playlist_url("https://www.youtube.com/playlist?list=PL123")
+        True
+        >>> is_playlist_url("https://www.youtube.com/@channel/videos")
+        True
+        >>> is_playlist_url("https://youtu.be/dQw4w9WgXcQ")
+        False
+    """
+    if not url:
+        return False
+    url = url.strip()
+    if '://' not in url:
+        url = 'https://' + url
+    parsed = urlparse(url)
+    if 'youtube.com' not in parsed.netloc.lower() and not parsed.netloc.lower().endswith('youtu.be'):
+        return False
+    return bool(parse_qs(parsed.query).get('list')) or bool(CHANNEL_PATH_RE.match(parsed.path))
+
+
+# 동영상 대신 탭 목록(동영상/Shorts/라이브)을 돌려주는 채널 경로 끝부분
+CHANNEL_ROOT_TABS = ('', 'featured', 'home')
+
+
+def playlist_listing_url(url):
+    """
+    flat 추출에 넘길 플레이리스트/채널 URL
+
+    채널 첫 페이지(/@이름, /channel/ID 등)를 그대로 추출하면 yt-dlp가 동영상 대신
+    탭(동영상/Shorts/라이브) 항목을 돌려주므로 /videos 탭으로 바꿈
+    (다른 URL은 그대로)
+
+    Examples:
+        >>> playlist_listing_url("https://www.youtube.com/@channel")
+        'https://www.youtube.com/@channel/videos'
+        >>> playlist_listing_url("https://www.youtube.com/channel/UC123/featured?si=x")
+        'https://www.youtube.com/channel/UC123/videos?si=x'
+        >>> playlist_listing_url("https://www.youtube.com/@channel/shorts")
+        'https://www.youtube.com/@channel/shorts'
+        >>> playlist_listing_url("https://www.youtube.com/playlist?list=PL123")
+        'https://www.youtube.com/playlist?list=PL123'
+    """
+    parsed = urlparse(url.strip() if '://' in url else 'https://' + url.strip())
+    match = CHANNEL_PATH_RE.match(parsed.path)
+    if not match or parse_qs(parsed.query).get('list'):
+        return url
+    if parsed.path[match.end():].strip('/') not in CHANNEL_ROOT_TABS:
+        return url
+    return parsed._replace(path=match.group(0) + '/videos').geturl()
+
+
+def playlist_entry_url(entry):
+    """
+    flat 추출 항목 → 동영상 URL
+
+    채널 탭이나 하위 플레이리스트(_type이 playlist이거나 YoutubeTab 항목)처럼
+    동영상이 아닌 항목은 None (한 곡짜리 작업으로 등록되지 않도록)
+
+    Examples:
+        >>> playlist_entry_url({'_type': 'url', 'ie_key': 'Youtube', 'id': 'dQw4w9WgXcQ', 'url': 'https://www.youtube.com/watch?v=dQw4w9WgXcQ'})
+        'https://www.youtube.com/watch?v=dQw4w9WgXcQ'
+        >>> playlist_entry_url({'_type': 'url', 'ie_key': 'YoutubeTab', 'url': 'https://www.youtube.com/@channel/videos'}) is None
+        True
+    """
+    if not entry or entry.get('_type') == 'playlist':
+        return None
+    if entry.get('ie_key') not in (None, 'Youtube'):
+        return None
+    video_id = canonical_video_id(entry.get('url') or '')
+    if video_id is None and VIDEO_ID_RE.match(entry.get('id') or ''):
+        video_id = entry['id']
+    if video_id is None:
+        return None
+    return f"https://www.youtube.com/watch?v={video_id}"